@@ -6,6 +6,7 @@ Created on Wed Mar  3 09:35:27 2021
 """
 
 import json
+import time
 import pandas as pd
 
 from datetime import datetime, timedelta
@@ -14,7 +15,7 @@ from pytz import timezone
 
 class TDAccInf():
 
-    def __init__(self, TDAPI, account_id = None, method='LIFO') -> None:
+    def __init__(self, TDAPI, account_id = None, method='LIFO', quotes = None, quote_max_age = 60) -> None:
 
         """Initalizes a new instance of the Portfolio object.
 
@@ -23,8 +24,14 @@ class TDAccInf():
         TDAPI {obj} -- TD API instance object
         account_number {str} -- An accout number to associate with the Portfolio. (default: {None})
         method {str} -- 'LIFO' = Last In Fiert Out, FIFO = First in First Out. (default: {LIFO})
+        quotes {obj} -- TDQuoteBoard of a running streamer (TDStreamerClient.quotes), prices are read from it
+                        instead of requesting a quote for every position. (default: {None})
+        quote_max_age {float} -- Seconds since the last streamed update of a symbol after which its quote is
+                                 requested again, None trusts the board however old. (default: {60})
         """
         self.method = method
+        self.quotes = quotes
+        self.quote_max_age = quote_max_age
         self.account_id = account_id
         self.TDAPI = TDAPI
 
@@ -383,11 +390,15 @@ class TDAccInf():
 
     def current_liquidation_price(self, symbol,quantity):
         # Returns liquidationPrice as Mark if it is between Bid and Ask or Bid/Ask depending if the position is short or long.
-        quote = self.TDAPI.get_quote(instruments = symbol)
-        Mark = round(quote[symbol]['mark'],2)
-        Bid = round(quote[symbol]['bidPrice'],2)
-        Ask = round(quote[symbol]['askPrice'],2)
-        prevDayClose = round(quote[symbol]['closePrice'],2)
+        streamed = self.streamed_quote(symbol)
+        if streamed is not None:
+            Mark, Bid, Ask, prevDayClose = streamed
+        else:
+            quote = self.TDAPI.get_quote(instruments = symbol)
+            Mark = round(quote[symbol]['mark'],2)
+            Bid = round(quote[symbol]['bidPrice'],2)
+            Ask = round(quote[symbol]['askPrice'],2)
+            prevDayClose = round(quote[symbol]['closePrice'],2)
 
         if quantity > 0:
                 liquidationPrice = Bid
@@ -404,6 +415,23 @@ class TDAccInf():
 
         return (currentPrice, liquidationPrice, prevDayClose)
 
+    def streamed_quote(self, symbol):
+        # (Mark, Bid, Ask, Close) from the streamer quote board, None when symbol is not streamed or its
+        # last update is older than quote_max_age (REST is used)
+        if self.quotes is None:
+            return None
+        for board in self.quotes.boards.values():
+            if symbol in board:
+                if self.quote_max_age is not None:
+                    age = time.time() - board.updated[board.rows[symbol]] / 1000
+                    if age > self.quote_max_age:
+                        return None
+                prices = [board.get(symbol, field) for field in ('Mark', 'Bid Price', 'Ask Price', 'Close Price')]
+                if None in prices or any(price != price for price in prices):     #NaN
+                    return None
+                return tuple(round(price, 2) for price in prices)
+        return None
+
     # Update all balances.
     def balances_udpate(self):
         # Updates average prices, breakeven prices, target value, curret value
@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:03:17 2026
+
+@author: LC
+"""
+
+import json
+import time
+import asyncio
+import inspect
+from collections import deque
+from datetime import datetime
+
+from TDStream import TDStreamerClient
+
+
+class _LoopSocket():
+    '''
+        Stands in for td_websocket: the request methods of TDStreamerClient send through it, and the
+        frames are written in order by the sender task of the client. send returns an awaitable.
+    '''
+
+    def __init__(self, client):
+        self.client = client
+
+    def send(self, text):
+        return self.client._send(text)
+
+
+class TDEventStream():
+    '''
+        Async iterator over the data entries of one service, optionally restricted to some symbols.
+        Every entry is {'service', 'timestamp', 'content': [...]}, with only the contents of the symbols.
+        Entries are kept in a bounded queue, the oldest are dropped (and counted) when it is full.
+
+        EXAMPLES:
+        async for data in client.events('QUOTE', symbols = 'AAPL, SPY'):
+            for content in data['content']:
+                ...
+    '''
+
+    def __init__(self, client, service, symbols = None, maxsize = 10000):
+        self.client = client
+        self.service = service
+        if isinstance(symbols, str):
+            symbols = [symbol.strip() for symbol in symbols.split(',')]
+        self.symbols = set(symbols) if symbols else None
+        self.maxsize = maxsize
+        self.dropped = 0
+        self.closed = False
+        self._queue = deque()
+        self._ready = asyncio.Event()
+
+    def __repr__(self):
+        return '<TD EventStream {} - Queued = {}>'.format(self.service, len(self._queue))
+
+    def put(self, data):
+        if self.symbols is not None:
+            content = [content for content in data['content'] if content.get('key') in self.symbols]
+            if not content:
+                return
+            data = {'service': data['service'], 'timestamp': data['timestamp'], 'content': content}
+        if len(self._queue) >= self.maxsize:
+            self._queue.popleft()
+            self.dropped += 1
+        self._queue.append(data)
+        self._ready.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self._queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self._ready.clear()
+            await self._ready.wait()
+        return self._queue.popleft()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.closed = True
+        self._ready.set()
+        self.client._remove_stream(self)
+
+
+class AsyncTDStreamerClient(TDStreamerClient):
+    '''
+        TDStreamerClient running on an asyncio event loop: the websocket, the login wait, the
+        download rate sampling and the reconnection are tasks of the loop, there is no receive
+        thread and no sleep polling. Storage, parsers, quote board, books and metrics are the ones of
+        TDStreamerClient. Needs the websockets package.
+
+        Every request method (data_request_quote, subs_request, QOS_request...) returns an awaitable
+        that completes once the request is written. GET requests return the snapshot.
+        TDAPI may be the usual REST client or an async one (get_user_principals returning an awaitable).
+
+        EXAMPLES:
+        async def main():
+            client = AsyncTDStreamerClient(TDAPI)
+            await client.connect()
+            await client.data_request_quote(keys = 'SPY, AAPL')
+            headlines = await client.data_request_news_headlinelist(keys = 'SPY')
+            async for data in client.events('QUOTE', symbols = 'AAPL'):
+                print(data)
+
+        asyncio.run(main())
+    '''
+
+    def __init__(self, TDAPI, *args, login_timeout = 30, request_timeout = 10, **kwargs):
+        '''
+            Same arguments as TDStreamerClient, and:
+
+            NAME: login_timeout
+            DESC: Seconds connect() waits for the LOGIN response.
+            TYPE: Float
+
+            NAME: request_timeout
+            DESC: Seconds a GET request waits for its snapshot.
+            TYPE: Float
+        '''
+
+        super().__init__(TDAPI, *args, **kwargs)
+        self.login_timeout = login_timeout
+        self.request_timeout = request_timeout
+        self.td_websocket = _LoopSocket(self)
+        self.websocket = None
+        self.loop = None
+        self._outgoing = None
+        self._logged_in = None
+        self._closed = None
+        self._tasks = []
+        self._streams = []
+        self._snapshots = {}        # service -> futures waiting for its next snapshot
+
+    def __repr__(self):
+        return '<TD Async Streaming API - Connected = {}>'.format(self.IsLoggedIn)
+
+    '''****************************************
+    ************* Connection ******************
+    ****************************************'''
+
+    async def _grab_streaming_keys_async(self):
+        if self.TDAPI and not self._credentials_valid():
+            userPrincipalsResponse = self.TDAPI.get_user_principals(fields = ['streamerSubscriptionKeys', 'streamerConnectionInfo'])
+            if inspect.isawaitable(userPrincipalsResponse):
+                userPrincipalsResponse = await userPrincipalsResponse
+            self._streaming_info(userPrincipalsResponse)
+
+    async def connect(self):
+        '''
+            Opens the websocket, logs in and returns once the LOGIN response arrived.
+            Raises asyncio.TimeoutError when it does not within login_timeout, and ConnectionError when
+            the login is refused or the connection closes first. The websocket is closed in both cases.
+        '''
+        import websockets
+
+        self.UserLogoff = False
+
+        if self.IsLoggedIn:
+            print("Streamer already started")
+            return
+
+        self.error = False
+        self.loop = asyncio.get_running_loop()
+        await self._grab_streaming_keys_async()
+
+        websocket = self.websocket = await websockets.connect(self.uri, max_size = None)
+        self._outgoing = asyncio.Queue()
+        self._logged_in = asyncio.Event()     # set by the LOGIN response, a refused login or the close
+        self._closed = asyncio.Event()
+        tasks = self._tasks = [self.loop.create_task(self._send_loop())]
+        tasks.append(self.loop.create_task(self._receive_loop(websocket, tasks)))
+
+        try:
+            self.login_request()
+            await asyncio.wait_for(self._logged_in.wait(), self.login_timeout)
+            if not self.IsLoggedIn:
+                raise ConnectionError('Login refused or connection closed')
+        except BaseException:
+            # This connection is abandoned, it must not close the next one when it ends
+            await self._abandon(websocket, tasks)
+            raise
+        print("Streamer started")
+
+    async def _abandon(self, websocket, tasks):
+        for task in tasks:
+            if task is not asyncio.current_task():
+                task.cancel()
+        websocket.transport.abort()
+        if self.websocket is websocket:
+            self.websocket = None
+
+    def _on_login(self):
+        self.reconnector.reset()
+        self._tasks.append(self.loop.create_task(self._download_rate()))
+
+        if self.cache_data:
+            self.storage_writer.start()
+        self._logged_in.set()
+
+    async def _download_rate(self):
+        while self.IsLoggedIn:
+            self.downloadRate = self.dataLen
+            self.dataLen = 0
+            self.metrics.tick()
+            if self.bars.intervals and self.last_message_time is not None:
+                self.bars.expire(self.last_message_time)
+            self.reconnector.check()
+            await asyncio.sleep(1)
+
+    async def _receive_loop(self, websocket, tasks):
+        try:
+            async for message in websocket:
+                self._websocket_on_message(message)
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            self._websocket_on_error(error)
+        await self._on_closed(websocket, tasks)
+
+    def _handle_response_response(self, content = None):
+        super()._handle_response_response(content)
+        if content['response'][0]['command'] == 'LOGIN' and self._logged_in is not None:
+            # Refused logins too, connect() does not wait for login_timeout
+            self._logged_in.set()
+
+    async def _on_closed(self, websocket, tasks):
+
+        if websocket is not self.websocket:
+            # Late close of a connection that was abandoned or replaced, the current one is left alone
+            for task in tasks:
+                if task is not asyncio.current_task():
+                    task.cancel()
+            return
+
+        if not self._logged_in.is_set():
+            # Closed before the LOGIN response, connect() raises and abandons the connection
+            self.IsLoggedIn = False
+            self._logged_in.set()
+            return
+
+        # No longer Logged In
+        self.IsLoggedIn = False
+
+        print('-'*40)
+        print('Websocket is Closed.')
+        print('Time Closed:'.ljust(50)+str(datetime.now()))
+
+        for task in tasks:
+            if task is not asyncio.current_task():
+                task.cancel()
+
+        # Write what is pending and close the files, off the loop since it waits for the writer thread
+        await self.loop.run_in_executor(None, self.storage_writer.stop)
+        self._closed.set()
+
+        if not self.UserLogoff:
+            self.loop.create_task(self._keep_alive())
+
+    def _drop_connection(self):
+        # Stalled socket, aborted without a closing handshake so the receive loop ends right away
+        if self.websocket is not None:
+            self.websocket.transport.abort()
+
+    async def _keep_alive(self):
+        # Recover the connection after it dropped with backoff (see TDReconnect), and subscribe
+        # everything as it was before the interruption in one message
+
+        reconnector = self.reconnector
+        if reconnector.reconnecting:
+            return
+        reconnector.reconnecting = True
+        reconnector.disconnected = int(time.time() * 1000)
+        started = time.time()
+        attempt = 0
+
+        print('Recovering connection')
+        try:
+            while not self.UserLogoff:
+                await asyncio.sleep(reconnector.delay(attempt))
+                try:
+                    await self.connect()
+                    break
+                except asyncio.CancelledError:
+                    raise
+                except Exception as error:
+                    # Refused connections, timeouts and rejected handshakes (websockets.InvalidHandshake) alike
+                    attempt += 1
+                    self.metrics.incr('reconnect_failures')
+                    print('Reconnection failed:'.ljust(50) + str(error))
+        finally:
+            reconnector.reconnecting = False
+
+        if self.IsLoggedIn:
+            sent = self.resubscribe()
+            if sent is not None:
+                await sent
+            reconnector.finished(started)
+
+    async def close(self, timeout = 5):
+        '''
+            Logs out and waits for the server to close the connection.
+        '''
+        if self.IsLoggedIn:
+            self.logout_request()
+            try:
+                await asyncio.wait_for(self._closed.wait(), timeout)
+            except asyncio.TimeoutError:
+                await self.websocket.close()
+                await self._closed.wait()
+        self.UserLogoff = True
+        for stream in list(self._streams):
+            stream.close()
+
+    '''****************************************
+    ************* Sending *********************
+    ****************************************'''
+
+    def _send(self, text):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+
+        if running is self.loop:
+            future = self.loop.create_future()
+            self._outgoing.put_nowait((text, future))
+            return future
+
+        # From another thread, like an observer worker
+        return asyncio.run_coroutine_threadsafe(self._send_from_thread(text), self.loop)
+
+    async def _send_from_thread(self, text):
+        return await self._send(text)
+
+    async def _send_loop(self):
+        while True:
+            text, future = await self._outgoing.get()
+            try:
+                await self.websocket.send(text)
+                sent = True
+            except Exception as error:
+                print('Request not sent:'.ljust(50) + str(error))
+                sent = False
+            if not future.done():
+                future.set_result(sent)
+
+    def data_request(self, data_request):
+        if not self.IsLoggedIn:
+            return asyncio.ensure_future(self._connect_and_request(data_request))
+        return self.td_websocket.send(json.dumps(data_request))
+
+    async def _connect_and_request(self, data_request):
+        await self.connect()
+        return await self.td_websocket.send(json.dumps(data_request))
+
+    '''****************************************
+    ************* Streams *********************
+    ****************************************'''
+
+    def events(self, service, symbols = None, maxsize = 10000):
+        '''
+            Returns a TDEventStream, async iterator over the new data entries of service (and symbols).
+
+            NAME: symbols
+            DESC: Symbols separated by commas, or iterable. Every symbol when None.
+            TYPE: String
+
+            NAME: maxsize
+            DESC: Entries kept while the consumer is busy, the oldest are dropped past it.
+            TYPE: Int
+        '''
+        stream = TDEventStream(self, service, symbols = symbols, maxsize = maxsize)
+        self._streams.append(stream)
+        return stream
+
+    def _remove_stream(self, stream):
+        if stream in self._streams:
+            self._streams.remove(stream)
+
+    def _data_segregation(self, message):
+        super()._data_segregation(message)
+        if self._streams:
+            for data in message['data']:
+                for stream in self._streams:
+                    if stream.service == data['service']:
+                        stream.put(data)
+
+    '''****************************************
+    ************* GET Requests ****************
+    ****************************************'''
+
+    def _handle_response_snapshot(self, content = None):
+        super()._handle_response_snapshot(content)
+        for snapshot in content['snapshot']:
+            for future in self._snapshots.pop(snapshot['service'], []):
+                if not future.done():
+                    future.set_result(snapshot)
+
+    async def _get(self, service, request, *args, **kwargs):
+        # Sends a GET request and returns the snapshot answering it
+        future = self.loop.create_future() if self.loop else asyncio.get_running_loop().create_future()
+        self._snapshots.setdefault(service, []).append(future)
+        try:
+            await request(*args, **kwargs)
+            return await asyncio.wait_for(future, self.request_timeout)
+        finally:
+            if future in self._snapshots.get(service, []):
+                self._snapshots[service].remove(future)
+
+    def data_request_news_headlinelist(self, keys = 'SPY, AAPL'):
+        return self._get('NEWS_HEADLINELIST', super().data_request_news_headlinelist, keys = keys)
+
+    def data_request_news_story(self, keys):
+        return self._get('NEWS_STORY', super().data_request_news_story, keys = keys)
+
+    def data_request_chart_history_futures(self, symbol = '/ES', frequency = 'm5', period = 'd5', start_time = None, end_time = None):
+        return self._get('CHART_HISTORY_FUTURES', super().data_request_chart_history_futures, symbol = symbol,
+                         frequency = frequency, period = period, start_time = start_time, end_time = end_time)
@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:58:20 2026
+
+@author: LC
+"""
+
+import time
+import asyncio
+import inspect
+from datetime import datetime
+from collections import deque
+from threading import Lock
+from concurrent.futures import ThreadPoolExecutor
+
+
+MINUTE = 60000
+
+
+class _RateLimiter():
+    # Token bucket shared by the request threads: rate requests per second, bursts of burst
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self._lock = Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class TDBackfill():
+    '''
+        Fills the CHART_EQUITY minutes missed while the streamer was disconnected, from the REST
+        price history (TDAPI.pricehistoryDates, one minute candles).
+
+        The last chart time of every symbol is tracked as bars are segregated. On reconnection (see
+        TDReconnect) the window after it is requested for every subscribed symbol, on a pool of
+        threads limited to rate requests per second. Live bars of a symbol being filled are held
+        meanwhile, then the candles after the last stored minute and the held bars are segregated
+        together, in chart time order. Stores, storage, indicators and observers see one continuous
+        series. Filled rows have Sequence -1. Outside of a fill, live bars pass as received.
+
+        TIMESALE trades can not be rebuilt from candles: their outage windows are recorded in gaps,
+        with the last max_gaps windows.
+
+        EXAMPLES:
+        SessionObject.backfill.stats()
+        SessionObject.backfill.gaps                       # deque of {'service', 'symbol', 'start', 'end', 'filled'}
+        SessionObject.backfill.fill(['AAPL'], start, end) # epoch ms, outside of a reconnection
+    '''
+
+    def __init__(self, streamer, workers = 4, rate = 2.0, burst = 4, max_gap = 5 * 86400000, hold_timeout = 30, max_gaps = 1000):
+        '''
+            NAME: workers
+            DESC: Price history requests in flight.
+            TYPE: Int
+
+            NAME: rate
+            DESC: Price history requests per second, the API allows 120 per minute.
+            TYPE: Float
+
+            NAME: burst
+            DESC: Requests sent at once before the rate applies.
+            TYPE: Int
+
+            NAME: max_gap
+            DESC: Longest window requested per symbol, in ms, older minutes are left out.
+            TYPE: Int
+
+            NAME: hold_timeout
+            DESC: Seconds live bars are held for a symbol being filled, they are released after it.
+            TYPE: Float
+
+            NAME: max_gaps
+            DESC: Outage windows kept in gaps, the oldest ones are dropped.
+            TYPE: Int
+        '''
+
+        self.streamer = streamer
+        self.workers = workers
+        self.max_gap = max_gap
+        self.hold_timeout = hold_timeout
+        self.services = ('CHART_EQUITY',)
+        self.enabled = True
+        self.last = {}          # symbol -> last chart time segregated, epoch ms
+        self.pending = {}       # symbol -> (held since, live contents held)
+        self.ready = []         # (symbol, candles) fetched, merged by the receive thread
+        self.gaps = deque(maxlen = max_gaps)
+        self.filled = 0
+        self.errors = 0
+        self._limiter = _RateLimiter(rate, burst)
+        self._executor = None
+        self._lock = Lock()
+
+        streamer.reconnector.on_reconnect.append(self.on_reconnect)
+
+    def __repr__(self):
+        return '<TD Backfill - Pending = {}, Filled = {}>'.format(len(self.pending), self.filled)
+
+    '''****************************************
+    ************* Receive path ****************
+    ****************************************'''
+
+    def filter(self, data):
+        # Called by the segregation with every CHART_EQUITY entry, returns what has to be stored or None.
+        # Only the bars of the symbols being filled are held, every other bar (corrections too) passes.
+        if data.get('backfill'):
+            return data
+
+        last, pending = self.last, self.pending
+        kept = []
+        for content in data['content']:
+            symbol = content['key']
+            chart_time = content.get('7')
+            if chart_time is None:
+                kept.append(content)
+                continue
+            if pending and symbol in pending:
+                with self._lock:
+                    if symbol in pending:
+                        pending[symbol][1].append(content)
+                        continue
+            if chart_time > last.get(symbol, -1):
+                last[symbol] = chart_time
+            kept.append(content)
+
+        if len(kept) == len(data['content']):
+            return data
+        if not kept:
+            return None
+        return {'service': data['service'], 'timestamp': data['timestamp'], 'content': kept}
+
+    def drain(self):
+        # Called on the receive thread while symbols are pending: merges what was fetched
+        now = time.time()
+        with self._lock:
+            ready, self.ready = self.ready, []
+            for symbol, (since, held) in list(self.pending.items()):
+                if now - since > self.hold_timeout and not any(symbol == done for done, _ in ready):
+                    # Released without the candles, they are dropped if they arrive later
+                    print('Backfill still running, releasing live bars of:'.ljust(50) + symbol)
+                    ready.append((symbol, ()))
+            merged = [(symbol, candles, self.pending.pop(symbol)[1]) for symbol, candles in ready if symbol in self.pending]
+
+        for symbol, candles, held in merged:
+            self._merge(symbol, candles, held)
+
+    def _merge(self, symbol, candles, held):
+        # Candles after the last stored minute and held live bars of symbol in chart time order,
+        # live bars win on the same minute
+        last = self.last.get(symbol, -1)
+        minutes = {}
+        for candle in candles:
+            chart_time = candle['datetime']
+            if chart_time <= last:
+                continue        # minute already stored
+            minutes[chart_time] = {'key': symbol, 'seq': -1, '1': candle['open'], '2': candle['high'], '3': candle['low'],
+                                   '4': candle['close'], '5': candle['volume'], '6': -1, '7': chart_time,
+                                   '8': chart_time // 86400000}
+        for content in held:
+            minutes[content['7']] = content
+
+        content = [minutes[chart_time] for chart_time in sorted(minutes)]
+        if not content:
+            return
+        self.filled += sum(1 for item in content if item['seq'] == -1)
+
+        streamer = self.streamer
+        keys = streamer.subscriptions['CHART_EQUITY']['keys-seq']
+        sequence = keys.get(symbol, -1)
+        # Filled bars have no sequence, -1 tells the sequence test not to look for a gap before the next bar
+        keys[symbol] = -1
+        streamer._data_segregation({'data': [{'service': 'CHART_EQUITY', 'timestamp': streamer.last_message_time or int(time.time() * 1000),
+                                              'command': 'SUBS', 'backfill': True, 'content': content}]})
+        keys[symbol] = content[-1]['seq'] if content[-1]['seq'] != -1 else sequence
+        self.last[symbol] = max(last, content[-1]['7'])
+
+    '''****************************************
+    ************* Requests ********************
+    ****************************************'''
+
+    def on_reconnect(self, disconnected, reconnected):
+        # Listener of the reconnector, with the outage window in epoch ms
+        if not self.enabled:
+            return
+        subscriptions = self.streamer.subscriptions
+        for service in ('TIMESALE_EQUITY', 'TIMESALE_FUTURES', 'TIMESALE_OPTIONS'):
+            if subscriptions[service]['subscribed']:
+                for symbol in subscriptions[service]['keys-seq']:
+                    self.gaps.append({'service': service, 'symbol': symbol, 'start': disconnected, 'end': reconnected, 'filled': False})
+
+        if subscriptions['CHART_EQUITY']['subscribed']:
+            self.fill(list(subscriptions['CHART_EQUITY']['keys-seq']), end = reconnected)
+
+    def fill(self, symbols, start = None, end = None):
+        '''
+            Requests the minutes of symbols between start (after the last bar of each symbol when None)
+            and end (now when None), epoch ms, and merges them as they arrive.
+        '''
+        if self.streamer.TDAPI is None:
+            return
+        end = end if end is not None else int(time.time() * 1000)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers = self.workers, thread_name_prefix = 'backfill')
+
+        for symbol in symbols:
+            first = start if start is not None else self.last.get(symbol)
+            if first is None:
+                continue        # nothing stored yet, no gap to fill
+            first = max(first + MINUTE if start is None else first, end - self.max_gap)
+            if end - first < MINUTE:
+                continue
+            with self._lock:
+                if symbol in self.pending:
+                    continue
+                self.pending[symbol] = (time.time(), [])
+            self.gaps.append({'service': 'CHART_EQUITY', 'symbol': symbol, 'start': first, 'end': end, 'filled': True})
+            self._executor.submit(self._fetch, symbol, first, end)
+
+    def _fetch(self, symbol, start, end):
+        candles = ()
+        try:
+            self._limiter.acquire()
+            response = self.streamer.TDAPI.pricehistoryDates(symbol = symbol, periodType = 'day', frequencyType = 'minute',
+                                                             frequency = 1, startDate = datetime.utcfromtimestamp(start / 1000),
+                                                             endDate = datetime.utcfromtimestamp(end / 1000))
+            if inspect.isawaitable(response):
+                # Async TDAPI of the asyncio client
+                response = asyncio.run_coroutine_threadsafe(response, self.streamer.loop).result()
+            candles = [candle for candle in response.get('candles', ()) if start <= candle['datetime'] <= end]
+            self.streamer.metrics.incr('backfill_candles', 'CHART_EQUITY', len(candles))
+        except Exception as error:
+            self.errors += 1
+            self.streamer.metrics.incr('backfill_errors', 'CHART_EQUITY')
+            print('Backfill of {} failed:'.format(symbol).ljust(50) + str(error))
+        with self._lock:
+            self.ready.append((symbol, candles))
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait = False)
+            self._executor = None
+
+    def stats(self):
+        return {'pending': list(self.pending), 'filled': self.filled, 'errors': self.errors, 'gaps': len(self.gaps)}
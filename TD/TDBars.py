@@ -0,0 +1,301 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:41:52 2026
+
+@author: LC
+"""
+
+from collections import deque
+from threading import Lock
+
+
+# Interval units: seconds, minutes and hours are time bars, t and v are tick and volume bars
+UNITS = {'s': 1000, 'm': 60000, 'h': 3600000, 't': None, 'v': None}
+
+
+def parse_interval(interval):
+    # 'm5' -> ('m', 5), same notation as the chart frequencies ('m5', 'd5')
+    interval = interval.strip()
+    unit, size = interval[:1], interval[1:]
+    if unit not in UNITS or not size.isdigit() or int(size) <= 0:
+        raise ValueError(f'Bar interval not supported: {interval}, expected s<n>, m<n>, h<n>, t<n> or v<n>')
+    return unit, int(size)
+
+
+class Bar():
+    '''
+        OHLCV bar of one symbol and interval. start and end are the trade times (epoch ms) of the
+        first and last trades for tick and volume bars, the bounds of the period for time bars.
+    '''
+
+    __slots__ = ('symbol', 'interval', 'start', 'end', 'open', 'high', 'low', 'close',
+                 'volume', 'ticks', 'value', 'closed')
+
+    def __init__(self, symbol, interval, start, end, price, size):
+        self.symbol = symbol
+        self.interval = interval
+        self.start = start
+        self.end = end
+        self.open = self.high = self.low = self.close = price
+        self.volume = size
+        self.ticks = 1
+        self.value = price * size       # traded value, for the vwap
+        self.closed = False
+
+    def __repr__(self):
+        return '<TD Bar {} {} - {} O = {} H = {} L = {} C = {} V = {}>'.format(self.symbol, self.interval, self.start,
+                                                                            self.open, self.high, self.low, self.close, self.volume)
+
+    @property
+    def vwap(self):
+        return self.value / self.volume if self.volume else self.close
+
+    def add(self, price, size):
+        if price > self.high:
+            self.high = price
+        elif price < self.low:
+            self.low = price
+        self.close = price
+        self.volume += size
+        self.ticks += 1
+        self.value += price * size
+
+    def as_dict(self):
+        return {'symbol': self.symbol, 'interval': self.interval, 'start': self.start, 'end': self.end,
+                'open': self.open, 'high': self.high, 'low': self.low, 'close': self.close,
+                'volume': self.volume, 'ticks': self.ticks, 'vwap': self.vwap, 'closed': self.closed}
+
+
+class _Series():
+    # Current bar and the last closed bars of one (symbol, interval)
+
+    __slots__ = ('symbol', 'interval', 'unit', 'size', 'length', 'bar', 'history')
+
+    def __init__(self, symbol, interval, history):
+        self.symbol = symbol
+        self.interval = interval
+        self.unit, self.size = parse_interval(interval)
+        self.length = UNITS[self.unit] * self.size if UNITS[self.unit] else None
+        self.bar = None
+        self.history = deque(maxlen = history)
+
+    def update(self, time, price, size, closed):
+        # Adds one trade, appends the bars it closed to closed
+        bar = self.bar
+        length = self.length
+
+        if length is not None:
+            if bar is not None and time >= bar.end:
+                self._close(closed)
+                bar = None
+            if bar is None:
+                start = time - time % length
+                self.bar = Bar(self.symbol, self.interval, start, start + length, price, size)
+            else:
+                bar.add(price, size)
+            return
+
+        if bar is None:
+            bar = self.bar = Bar(self.symbol, self.interval, time, time, price, size)
+        else:
+            bar.add(price, size)
+            bar.end = time
+        if (bar.ticks if self.unit == 't' else bar.volume) >= self.size:
+            self._close(closed)
+
+    def expire(self, time, closed):
+        # Closes a time bar whose period ended without a trade after it
+        if self.length is not None and self.bar is not None and time >= self.bar.end:
+            self._close(closed)
+
+    def _close(self, closed):
+        bar, self.bar = self.bar, None
+        bar.closed = True
+        self.history.append(bar)
+        closed.append(bar)
+
+
+class TDBarEngine():
+    '''
+        Builds OHLCV bars from the TIMESALE trades as they are segregated, with constant work per trade
+        and per (symbol, interval): history is never scanned again.
+
+        Intervals use the chart frequency notation: s<n> seconds, m<n> minutes, h<n> hours (time bars
+        aligned on the epoch), t<n> every n trades, v<n> every n shares/contracts traded. A time bar
+        closes with the first trade past its period, or once a second when the streamer clock passes it.
+
+        Closed bars are delivered to the observers of the engine (bind_to) through the dispatcher of
+        the streamer, as Bar objects, and the last closed bars are kept per series (history).
+
+        EXAMPLES:
+        SessionObject.bars.add('s5, m1, h1, t100, v10000')
+        SessionObject.bars.add('m5', symbols = 'AAPL, SPY')
+        SessionObject.bars.bind_to(on_bar)                  # on_bar(bar), bar.as_dict()
+        SessionObject.bars.current('AAPL', 'm1')            # partial bar, None before the first trade
+        SessionObject.bars.closed('AAPL', 'm1', 10)         # last 10 closed bars
+        SessionObject.bars.to_pandas('AAPL', 'm1')
+    '''
+
+    def __init__(self, dispatcher = None, services = ('TIMESALE_EQUITY', 'TIMESALE_FUTURES'), history = 1000):
+        '''
+            NAME: dispatcher
+            DESC: TDDispatcher the observers of the closed bars run on.
+            TYPE: Object
+
+            NAME: services
+            DESC: Trade services the bars are built from.
+            TYPE: Tuple
+
+            NAME: history
+            DESC: Closed bars kept per (symbol, interval).
+            TYPE: Int
+        '''
+
+        self.dispatcher = dispatcher
+        self.services = tuple(services)
+        self.history = history
+        self.intervals = {}     # interval -> set of symbols, None for every symbol
+        self.series = {}        # symbol -> {interval: _Series}
+        self.closed_count = 0
+        self._observers = []
+        self.listeners = []     # called with the closed bars on the thread that closed them, like the indicators
+        self._lock = Lock()
+
+    def __repr__(self):
+        return '<TD BarEngine - Intervals = {}, Symbols = {}>'.format(list(self.intervals), len(self.series))
+
+    def add(self, intervals, symbols = None):
+        '''
+            NAME: intervals
+            DESC: Intervals separated by commas, or iterable: 's5, m1, t100, v10000'.
+            TYPE: String
+
+            NAME: symbols
+            DESC: Symbols separated by commas, or iterable. Every symbol traded when None.
+            TYPE: String
+        '''
+        if isinstance(intervals, str):
+            intervals = intervals.split(',')
+        if isinstance(symbols, str):
+            symbols = symbols.split(',')
+        symbols = {symbol.strip() for symbol in symbols} if symbols is not None else None
+
+        with self._lock:
+            for interval in intervals:
+                interval = interval.strip()
+                parse_interval(interval)
+                if symbols is None or self.intervals.get(interval, set()) is None:
+                    self.intervals[interval] = None
+                else:
+                    self.intervals[interval] = self.intervals.get(interval, set()) | symbols
+            # Series are created again with the intervals of their symbol on the next trade
+            self.series = {symbol: self._series(symbol, series) for symbol, series in self.series.items()}
+
+    def remove(self, intervals):
+        if isinstance(intervals, str):
+            intervals = intervals.split(',')
+        with self._lock:
+            for interval in intervals:
+                self.intervals.pop(interval.strip(), None)
+            self.series = {symbol: self._series(symbol, series) for symbol, series in self.series.items()}
+
+    def _series(self, symbol, current = None):
+        # {interval: _Series} of symbol, keeping the series it already has
+        current = current or {}
+        return {interval: current.get(interval) or _Series(symbol, interval, self.history)
+                for interval, symbols in self.intervals.items() if symbols is None or symbol in symbols}
+
+    def bind_to(self, callback, queue_size = None, policy = None, name = None):
+        # callback(bar) for every closed bar, on its own dispatcher worker
+        print(f'{callback} bounded to bars')
+        if callback not in self._observers:
+            self._observers.append(callback)
+        self.dispatcher.register(callback, maxsize = queue_size, policy = policy, broadcast = False, name = name)
+
+    def unbind(self, callback):
+        if callback in self._observers:
+            self._observers.remove(callback)
+        self.dispatcher.unregister(callback)
+
+    def update(self, data):
+        # Called from the receive path with one TIMESALE data entry
+        closed = []
+        with self._lock:
+            for content in data['content']:
+                symbol = content['key']
+                series = self.series.get(symbol)
+                if series is None:
+                    series = self.series[symbol] = self._series(symbol)
+                if not series:
+                    continue
+                time, price, size = content.get('1'), content.get('2'), content.get('3')
+                if time is None or price is None:
+                    continue
+                size = size or 0
+                for one in series.values():
+                    one.update(time, price, size, closed)
+            if closed:
+                self._listen(closed)
+        if closed:
+            self._emit(closed)
+
+    def expire(self, time):
+        # Closes the time bars whose period ended before time (epoch ms)
+        closed = []
+        with self._lock:
+            for series in self.series.values():
+                for one in series.values():
+                    one.expire(time, closed)
+            if closed:
+                self._listen(closed)
+        if closed:
+            self._emit(closed)
+
+    def _listen(self, closed):
+        # Under the lock, listeners get the bars in order whichever thread closed them
+        self.closed_count += len(closed)
+        for listener in self.listeners:
+            listener(closed)
+
+    def _emit(self, closed):
+        for callback in self._observers:
+            for bar in closed:
+                self.dispatcher.send(callback, bar)
+
+    def _get(self, symbol, interval):
+        series = self.series.get(symbol, {}).get(interval)
+        if series is None and interval not in self.intervals:
+            raise KeyError(f'No {interval} bars, add them with add()')
+        return series
+
+    def current(self, symbol, interval):
+        '''
+            Partial bar of symbol, as a dict, None before its first trade.
+        '''
+        series = self._get(symbol, interval)
+        bar = series.bar if series is not None else None
+        return bar.as_dict() if bar is not None else None
+
+    def closed(self, symbol, interval, n = None):
+        '''
+            Last n closed bars of symbol (every bar kept when None), oldest first.
+        '''
+        series = self._get(symbol, interval)
+        if series is None:
+            return []
+        bars = list(series.history)
+        return bars[-n:] if n else bars
+
+    def to_pandas(self, symbol, interval, partial = False):
+        # DataFrame of the closed bars indexed by the bar start, with the partial bar when partial
+        import pandas as pd
+
+        bars = [bar.as_dict() for bar in self.closed(symbol, interval)]
+        if partial:
+            current = self.current(symbol, interval)
+            if current is not None:
+                bars.append(current)
+        frame = pd.DataFrame(bars, columns = ['start', 'end', 'open', 'high', 'low', 'close', 'volume', 'ticks', 'vwap', 'closed'])
+        frame['start'] = pd.to_datetime(frame['start'], unit = 'ms')
+        frame['end'] = pd.to_datetime(frame['end'], unit = 'ms')
+        return frame.set_index('start')
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:05:48 2026
+
+@author: LC
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+
+import xmltodict
+
+from TDFields import FIELDS, SEQUENCED
+from TDJournal import read_journal
+from TDMockServer import synthetic_frames
+from TDStorage import CSVBackend
+
+
+FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'BenchData')
+
+
+class TDBenchmark():
+    '''
+        Benchmarks for the receive hot path of TDStreamerClient.
+
+        Cases:
+            json_loads              json.loads of the raw frames (_websocket_on_message)
+            on_message              the whole receive path, raw frame to callBack
+            segregation_{SERVICE}   _data_segregation (the service parser) with the frames of one service
+            seq_test                _seq_test with every sequenced content
+            xmltodict               the ACCT_ACTIVITY xml parse
+            csv_write               CSVBackend.write, one call per frame
+
+        Every case reports messages/sec, per message latency percentiles (microseconds) and the
+        memory allocated per message (tracemalloc peak while handling the message, and what is still
+        held afterwards). Results can be stored as a baseline and later runs compared against it.
+
+        Fixtures are data frames per service stored as JSON lines in BenchData/Fixtures. They are
+        recorded once, either from a TDJournal file (live frames) or from the mock server generator
+        with a fixed seed, and reused by every run so results stay comparable.
+
+        EXAMPLES:
+        python TDBenchmark.py                           # run every case
+        python TDBenchmark.py --cases segregation_QUOTE csv_write
+        python TDBenchmark.py --save-baseline           # store the results as the baseline
+        python TDBenchmark.py --record ./StreamData/Journal/journal_2020-09-14_093000.tdj.gz
+    '''
+
+    def __init__(self, folder = FOLDER, messages = 5000, alloc_messages = 500):
+        '''
+            NAME: folder
+            DESC: Folder of the fixtures (Fixtures/{service}.jsonl) and of baseline.json.
+            TYPE: String
+
+            NAME: messages
+            DESC: Messages timed per case, fixtures are looped over until this count is reached.
+            TYPE: Int
+
+            NAME: alloc_messages
+            DESC: Messages measured with tracemalloc per case, in a separate pass.
+            TYPE: Int
+        '''
+
+        self.folder = folder
+        self.messages = messages
+        self.alloc_messages = alloc_messages
+        self.fixtures = {}
+
+    def __repr__(self):
+        return '<TD Benchmark {} - Services = {}>'.format(self.folder, len(self.fixtures))
+
+    @property
+    def fixtures_folder(self):
+        return os.path.join(self.folder, 'Fixtures')
+
+    @property
+    def baseline_path(self):
+        return os.path.join(self.folder, 'baseline.json')
+
+    '''****************************************
+    ************* Fixtures ********************
+    ****************************************'''
+
+    def record(self, journal = None, frames = 200, symbols = 20, seed = 0):
+        '''
+            Writes the fixture frames. With a journal the data frames are split per service,
+            otherwise the frames of every service are generated with synthetic_frames.
+        '''
+
+        recorded = {}
+        if journal:
+            for _, message in read_journal(journal):
+                content = json.loads(message, strict = False)
+                for data in content.get('data', []):
+                    if len(recorded.setdefault(data['service'], [])) < frames:
+                        recorded[data['service']].append(json.dumps({"data": [data]}))
+        else:
+            keys = ['SYM{:04d}'.format(n) for n in range(symbols)]
+            for service in FIELDS:
+                recorded[service] = synthetic_frames(service, keys, frames, seed = seed)
+
+        if not os.path.isdir(self.fixtures_folder):
+            os.makedirs(self.fixtures_folder)
+
+        for service, lines in recorded.items():
+            with open(os.path.join(self.fixtures_folder, f'{service}.jsonl'), 'w') as f:
+                f.write('\n'.join(lines) + '\n')
+            print(f"{service} fixtures:".ljust(50) + str(len(lines)))
+
+        self.fixtures = recorded
+
+    def load(self):
+        if not os.path.isdir(self.fixtures_folder):
+            self.record()
+            return
+
+        self.fixtures = {}
+        for name in sorted(os.listdir(self.fixtures_folder)):
+            if name.endswith('.jsonl'):
+                with open(os.path.join(self.fixtures_folder, name)) as f:
+                    self.fixtures[name[:-len('.jsonl')]] = [line for line in f.read().split('\n') if line]
+
+    '''****************************************
+    ************* Cases ***********************
+    ****************************************'''
+
+    def _streamer(self):
+        from TDStream import TDStreamerClient
+
+        TDS = TDStreamerClient(None, cache_data = False)
+        TDS.replaying = True    # fixtures loop over the same sequences, never send QOS requests
+
+        def reset():
+            for service in FIELDS:
+                TDS.subscriptions[service]['keys-seq'] = {}
+        return TDS, reset
+
+    def cases(self, names = None):
+        '''
+            Returns {name: (items, function, reset)}, function is called once per item.
+        '''
+
+        TDS, reset = self._streamer()
+        raw = [frame for frames in self.fixtures.values() for frame in frames]
+        parsed = {service: [json.loads(frame, strict = False) for frame in frames] for service, frames in self.fixtures.items()}
+
+        cases = {'json_loads': (raw, lambda frame: json.loads(frame, strict = False), None),
+                 'on_message': (raw, TDS._websocket_on_message, reset)}
+
+        for service, messages in parsed.items():
+            cases[f'segregation_{service}'] = (messages, TDS._data_segregation, reset)
+
+        cases['seq_test'] = ([(service, content) for service, messages in parsed.items() if service in SEQUENCED
+                              for message in messages for content in message['data'][0]['content']],
+                             lambda item: TDS._seq_test(*item), reset)
+
+        cases['xmltodict'] = ([content['3'] for message in parsed.get('ACCT_ACTIVITY', [])
+                               for content in message['data'][0]['content'] if '3' in content],
+                              lambda xml: xmltodict.parse(xml, dict_constructor=dict), None)
+
+        if names is None or 'csv_write' in names:
+            cases['csv_write'] = self._csv_case(TDS, reset, parsed)
+
+        if names is not None:
+            cases = {name: case for name, case in cases.items() if name in names}
+        return cases
+
+    def _csv_case(self, TDS, reset, parsed):
+        # Segregates the fixtures once, then times one write per frame
+        backend = CSVBackend(tempfile.mkdtemp(prefix='tdbench_'))
+        reset()
+        spans = []
+        for service, messages in parsed.items():
+            store = TDS.subscriptions[service]['data']
+            backend.open(service, 'bench', TDS.subscriptions[service]['CSV_headers'])
+            for message in messages:
+                start = store.total
+                TDS._data_segregation(message)
+                spans.append((service, store, start, store.total))
+
+        def write(span):
+            service, store, start, stop = span
+            backend.write(service, store, start, stop)
+
+        return spans, write, None
+
+    '''****************************************
+    ************* Measure *********************
+    ****************************************'''
+
+    def measure(self, items, function, reset = None):
+
+        if not items:
+            return None
+
+        # Warm up
+        for item in items[:100]:
+            function(item)
+
+        timings = []
+        gc.collect()
+        while len(timings) < self.messages:
+            if reset:
+                reset()
+            for item in items[:self.messages - len(timings)]:
+                started = time.perf_counter_ns()
+                function(item)
+                timings.append(time.perf_counter_ns() - started)
+
+        # Allocations, separate pass since tracemalloc slows everything down
+        if reset:
+            reset()
+        peak = retained = 0
+        sample = items[:self.alloc_messages]
+        tracemalloc.start()
+        for item in sample:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            function(item)
+            current, top = tracemalloc.get_traced_memory()
+            peak += top - before
+            retained += current - before
+        tracemalloc.stop()
+
+        timings.sort()
+        def percentile(p):
+            return timings[min(len(timings) - 1, int(p / 100 * len(timings)))] / 1000
+
+        return {'messages': len(timings),
+                'messages_sec': len(timings) / (sum(timings) / 1e9),
+                'p50_us': percentile(50),
+                'p90_us': percentile(90),
+                'p99_us': percentile(99),
+                'max_us': timings[-1] / 1000,
+                'alloc_bytes_msg': peak / len(sample),
+                'retained_bytes_msg': retained / len(sample)}
+
+    def run(self, names = None):
+        if not self.fixtures:
+            self.load()
+
+        results = {}
+        for name, (items, function, reset) in self.cases(names).items():
+            result = self.measure(items, function, reset)
+            if result is not None:
+                results[name] = result
+                print(name.ljust(30) + '{messages_sec:>12,.0f} msg/s  p50 {p50_us:>9.1f}us  p99 {p99_us:>9.1f}us  '
+                                       'alloc {alloc_bytes_msg:>9,.0f}B  held {retained_bytes_msg:>9,.0f}B'.format(**result))
+        return results
+
+    '''****************************************
+    ************* Baselines *******************
+    ****************************************'''
+
+    def save_baseline(self, results, path = None):
+        path = path or self.baseline_path
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+
+        with open(path, 'w') as f:
+            json.dump({'python': sys.version.split()[0],
+                       'machine': platform.platform(),
+                       'saved': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'results': results}, f, indent=1)
+        print("Baseline saved at:".ljust(50) + path)
+
+    def compare(self, results, path = None, tolerance = 0.2):
+        '''
+            Compares results with the stored baseline. A case regresses when its throughput drops,
+            or its p50 latency or allocations per message grow, by more than tolerance (0.2 = 20%).
+            Returns the list of (case, metric, baseline, current).
+        '''
+
+        path = path or self.baseline_path
+        if not os.path.isfile(path):
+            print("No baseline at:".ljust(50) + path)
+            return []
+
+        with open(path) as f:
+            baseline = json.load(f)['results']
+
+        regressions = []
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            if result['messages_sec'] < base['messages_sec'] * (1 - tolerance):
+                regressions.append((name, 'messages_sec', base['messages_sec'], result['messages_sec']))
+            for metric in ('p50_us', 'alloc_bytes_msg'):
+                # Small absolute values are noise, allow one microsecond / 64 bytes of slack
+                slack = 1 if metric == 'p50_us' else 64
+                if result[metric] > base[metric] * (1 + tolerance) + slack:
+                    regressions.append((name, metric, base[metric], result[metric]))
+
+        for name, metric, before, after in regressions:
+            print(f"REGRESSION {name} {metric}:".ljust(50) + '{:,.1f} -> {:,.1f}'.format(before, after))
+        return regressions
+
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description='TDStreamerClient hot path benchmarks')
+    parser.add_argument('--cases', nargs='+', help='cases to run, all by default')
+    parser.add_argument('--messages', type=int, default=5000, help='messages timed per case')
+    parser.add_argument('--folder', default=FOLDER, help='fixtures and baseline folder')
+    parser.add_argument('--record', nargs='?', const='', metavar='JOURNAL',
+                        help='record the fixtures, from a journal file or from the mock generator when no file is given')
+    parser.add_argument('--save-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed regression against the baseline')
+    args = parser.parse_args()
+
+    bench = TDBenchmark(folder = args.folder, messages = args.messages)
+    if args.record is not None:
+        bench.record(journal = args.record or None)
+
+    results = bench.run(args.cases)
+    if args.save_baseline:
+        bench.save_baseline(results)
+    elif bench.compare(results, tolerance = args.tolerance):
+        sys.exit(1)
@@ -0,0 +1,451 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 20:21:53 2026
+
+@author: LC
+"""
+
+import os
+import json
+import time
+import socket
+import stat
+import struct
+import tempfile
+from collections import deque
+from threading import Thread, Condition, Lock
+
+from TDDispatcher import TDDispatcher
+from TDRouter import TDRouter, decode
+
+
+def _runtime_dir():
+    # Per user directory of the socket: $XDG_RUNTIME_DIR, or tdstream-<uid> in the temp directory
+    if os.environ.get('XDG_RUNTIME_DIR'):
+        return os.environ['XDG_RUNTIME_DIR']
+    return os.path.join(tempfile.gettempdir(), 'tdstream-{}'.format(os.getuid()))
+
+
+# Unix domain socket path, or (host, port) for a local TCP socket where AF_UNIX is not available
+BRIDGE_ADDRESS = os.path.join(_runtime_dir(), 'tdstream.sock') if hasattr(socket, 'AF_UNIX') else ('127.0.0.1', 9110)
+
+_LENGTH = struct.Struct('!I')
+
+
+'''
+    Wire format, both ways: 4 bytes big endian length + payload.
+
+        subscriber -> publisher     JSON command {"command": "SUBS" | "ADD" | "UNSUBS", "topics": [...]}
+        publisher -> subscriber     JSON list of the decoded records of one message (TDRouter.decode)
+                                    {"service", "timestamp", "key", ["seq"], field name: value, ...}
+                                    holding only the records of the topics subscribed
+
+    Topics are 'SERVICE/SYMBOL', 'SERVICE' (every symbol of the service) or '*' (everything).
+    Both sides only ever decode JSON. The Unix socket lives in a directory only its user can
+    enter (0700), the publisher refuses a directory that belongs to someone else or is open to them.
+'''
+
+
+def _socket(address):
+    if isinstance(address, str):
+        return socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    return socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+
+
+def _secure_directory(path):
+    # Creates the socket directory 0700, or checks that an existing one is private to this user
+    try:
+        os.mkdir(path, 0o700)
+    except FileExistsError:
+        pass
+    status = os.lstat(path)
+    if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid() or status.st_mode & 0o077:
+        raise PermissionError(f'{path} must be a directory of this user, closed to the others (0700)')
+
+
+def _dumps(entries):
+    return json.dumps(entries, separators = (',', ':')).encode()
+
+
+def _send(sock, payload):
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _receive(sock):
+    # Next payload, None when the peer closed the connection
+    header = _receive_exactly(sock, _LENGTH.size)
+    if header is None:
+        return None
+    return _receive_exactly(sock, _LENGTH.unpack(header)[0])
+
+
+def _receive_exactly(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+class _Filter():
+    # Topics of one subscriber
+
+    def __init__(self):
+        self.everything = False
+        self.services = set()
+        self.topics = set()     # (service, symbol)
+
+    def update(self, command, topics):
+        if command == 'SUBS':
+            self.everything = False
+            self.services = set()
+            self.topics = set()
+        for topic in topics:
+            service, _, symbol = topic.partition('/')
+            if command == 'UNSUBS':
+                if topic == '*':
+                    self.everything = False
+                elif symbol in ('', '*'):
+                    self.services.discard(service)
+                else:
+                    self.topics.discard((service, symbol))
+            elif topic == '*':
+                self.everything = True
+            elif symbol in ('', '*'):
+                self.services.add(service)
+            else:
+                self.topics.add((service, symbol))
+
+    def select(self, record):
+        # Whether the decoded record belongs to a subscribed topic
+        service = record['service']
+        return self.everything or service in self.services or (service, record.get('key')) in self.topics
+
+
+class _Connection():
+    # One subscriber of the publisher: its filter, a bounded queue of frames and a sender thread
+
+    def __init__(self, sock, name, maxsize, on_close):
+        self.sock = sock
+        self.name = name
+        self.maxsize = maxsize
+        self.filter = _Filter()
+        self.on_close = on_close
+        self.sent = 0
+        self.dropped = 0
+        self._queue = deque()
+        self._cond = Condition()
+        self._running = True
+
+    def start(self):
+        Thread(name=f'bridge_send_{self.name}', target=self._send_loop, daemon = True).start()
+        Thread(name=f'bridge_recv_{self.name}', target=self._receive_loop, daemon = True).start()
+
+    def put(self, payload):
+        with self._cond:
+            if len(self._queue) >= self.maxsize:
+                # A slow subscriber loses its oldest frames, it never delays the others
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(payload)
+            self._cond.notify()
+
+    def _send_loop(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                payload = self._queue.popleft()
+            try:
+                _send(self.sock, payload)
+                self.sent += 1
+            except OSError:
+                self.close()
+                return
+
+    def _receive_loop(self):
+        while self._running:
+            try:
+                payload = _receive(self.sock)
+            except OSError:
+                payload = None
+            if payload is None:
+                self.close()
+                return
+            try:
+                request = json.loads(payload)
+                self.filter.update(request['command'], request.get('topics', ()))
+            except (ValueError, KeyError, TypeError) as error:
+                print(f'Bridge subscriber {self.name} sent an invalid command: {error}')
+
+    def close(self):
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        self.on_close(self)
+
+    def stats(self):
+        return {'queued': len(self._queue), 'sent': self.sent, 'dropped': self.dropped}
+
+
+class TDBridgePublisher():
+    '''
+        Re-broadcasts the data of one TDStreamerClient to local subscriber processes (TDBridgeClient),
+        so many processes share one login and one JSON decode.
+
+        The receive path only enqueues the data entries (a bounded queue, oldest messages dropped
+        when the fan-out falls behind). A fan-out thread decodes them into named records, filters
+        them per subscriber topic, encodes each subscriber's share once in JSON and hands it to that
+        subscriber's sender thread. Every subscriber has a bounded queue (oldest frames dropped when full).
+
+        EXAMPLES:
+        SessionObject.start_bridge()                            # default address
+        SessionObject.start_bridge(('127.0.0.1', 9110))         # TCP, localhost only
+    '''
+
+    def __init__(self, address = BRIDGE_ADDRESS, queue_size = 10000, pending_size = 10000):
+        '''
+            NAME: address
+            DESC: Unix domain socket path, or (host, port) for TCP.
+            TYPE: String or Tuple
+
+            NAME: queue_size
+            DESC: Frames kept per subscriber before the oldest ones are dropped.
+            TYPE: Int
+
+            NAME: pending_size
+            DESC: Messages waiting for the fan-out thread before the oldest ones are dropped.
+            TYPE: Int
+        '''
+
+        self.address = address
+        self.queue_size = queue_size
+        self.pending_size = pending_size
+        self.connections = []
+        self.published = 0
+        self.dropped = 0
+        self._pending = deque()
+        self._cond = Condition()
+        self._lock = Lock()
+        self._running = False
+        self._server = None
+        self._accepted = 0
+
+    def __repr__(self):
+        return '<TD BridgePublisher {} - Subscribers = {}>'.format(self.address, len(self.connections))
+
+    def start(self):
+        if self._running:
+            return
+        if isinstance(self.address, str):
+            _secure_directory(os.path.dirname(self.address))
+            if os.path.exists(self.address):
+                os.unlink(self.address)     # left behind by a previous publisher
+        self._server = _socket(self.address)
+        if not isinstance(self.address, str):
+            self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind(self.address)
+        if isinstance(self.address, str):
+            os.chmod(self.address, 0o600)       # same user only
+        else:
+            self.address = self._server.getsockname()
+        self._server.listen()
+        self._running = True
+
+        Thread(name='bridge_accept_thread', target=self._accept_loop, daemon = True).start()
+        Thread(name='bridge_fanout_thread', target=self._fanout_loop, daemon = True).start()
+        print("Bridge publishing at:".ljust(50) + str(self.address))
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        for connection in list(self.connections):
+            connection.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def publish(self, entries):
+        # Called from the receive path with the data entries of one message, only enqueues
+        if self.connections:
+            with self._cond:
+                if len(self._pending) >= self.pending_size:
+                    # The receive path never waits for the fan-out, the oldest message is lost
+                    self._pending.popleft()
+                    self.dropped += 1
+                self._pending.append(entries)
+                self._cond.notify()
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            self._accepted += 1
+            connection = _Connection(sock, str(self._accepted), self.queue_size, self._remove)
+            with self._lock:
+                self.connections = self.connections + [connection]
+            connection.start()
+
+    def _remove(self, connection):
+        with self._lock:
+            self.connections = [other for other in self.connections if other is not connection]
+
+    def _fanout_loop(self):
+        while True:
+            with self._cond:
+                while self._running and not self._pending:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                entries = self._pending.popleft()
+
+            records = [decode(data['service'], data['timestamp'], content) for data in entries for content in data['content']]
+            whole = None
+            for connection in self.connections:
+                select = connection.filter.select
+                selected = [record for record in records if select(record)]
+                if not selected:
+                    continue
+                if len(selected) == len(records):
+                    # Subscribers of everything in the message share one payload
+                    if whole is None:
+                        whole = _dumps(records)
+                    connection.put(whole)
+                else:
+                    connection.put(_dumps(selected))
+            self.published += 1
+
+    def stats(self):
+        # Fan-out queue of the publisher, per subscriber queue depth, frames sent and dropped
+        stats = {'publisher': {'queued': len(self._pending), 'published': self.published, 'dropped': self.dropped}}
+        stats.update((connection.name, connection.stats()) for connection in self.connections)
+        return stats
+
+
+class TDBridgeClient():
+    '''
+        Subscriber of a TDBridgePublisher, for processes that want live data without their own login.
+        Observers are registered like on TDStreamerClient and run on their own dispatcher workers;
+        they are called with the list of decoded records of one message (see TDRouter.decode):
+            [{'service': 'QUOTE', 'timestamp': ..., 'key': 'AAPL', 'Bid Price': 115.3, ...}, ...]
+
+        EXAMPLES:
+        client = TDBridgeClient()
+        client.subscribe(['QUOTE/AAPL', 'QUOTE/SPY', 'TIMESALE_EQUITY'])
+        client.bind_to(on_data)
+        client.bind_to(on_trade, services = 'TIMESALE_EQUITY', fields = 'Last Price, Last Size')
+        ...
+        client.close()
+    '''
+
+    def __init__(self, address = BRIDGE_ADDRESS, observer_queue_size = 1000, observer_policy = 'drop_oldest'):
+        '''
+            NAME: address
+            DESC: Address of the publisher, see TDBridgePublisher.
+            TYPE: String or Tuple
+
+            NAME: observer_queue_size
+            DESC: Pending entries kept per observer.
+            TYPE: Int
+
+            NAME: observer_policy
+            DESC: Observer overflow policy, see TDDispatcher.
+            TYPE: String
+        '''
+
+        self.address = address
+        self.received = 0
+        self._observers = []
+        self.dispatcher = TDDispatcher(maxsize = observer_queue_size, policy = observer_policy)
+        self.router = TDRouter(self.dispatcher)
+        self._sock = _socket(address)
+        self._sock.connect(address)
+        self._running = True
+        self._thread = Thread(name='bridge_client_thread', target=self._receive_loop, daemon = True)
+        self._thread.start()
+
+    def __repr__(self):
+        return '<TD BridgeClient {} - Received = {}>'.format(self.address, self.received)
+
+    def _command(self, command, topics):
+        if isinstance(topics, str):
+            topics = [topic.strip() for topic in topics.split(',')]
+        _send(self._sock, json.dumps({'command': command, 'topics': list(topics)}).encode())
+
+    def subscribe(self, topics = '*'):
+        # Replaces the topics: 'SERVICE/SYMBOL', 'SERVICE' or '*'
+        self._command('SUBS', topics)
+
+    def add(self, topics):
+        self._command('ADD', topics)
+
+    def unsubscribe(self, topics):
+        self._command('UNSUBS', topics)
+
+    def bind_to(self, callback, queue_size = None, policy = None, services = None, symbols = None, fields = None, name = None):
+        '''
+            Register an observer, called from its own worker thread with lists of records.
+            services, symbols and fields filter the records of the subscribed topics like on
+            TDStreamerClient.bind_to, every record is delivered without them.
+            See TDStreamerClient.bind_to for the parameters.
+        '''
+        print(f'{callback} bounded')
+        if callback not in self._observers:
+            self._observers.append(callback)
+        routed = services is not None or symbols is not None or fields is not None
+        self.dispatcher.register(callback, maxsize = queue_size, policy = policy, broadcast = not routed, name = name)
+        if routed:
+            self.router.add(callback, services = services, symbols = symbols, fields = fields)
+        else:
+            self.router.remove(callback)
+
+    def unbind(self, callback):
+        if callback in self._observers:
+            self._observers.remove(callback)
+        self.router.remove(callback)
+        self.dispatcher.unregister(callback)
+
+    def observer_stats(self):
+        return self.dispatcher.stats()
+
+    def _receive_loop(self):
+        while self._running:
+            try:
+                payload = _receive(self._sock)
+            except OSError:
+                payload = None
+            if payload is None:
+                if self._running:
+                    print('Bridge publisher closed the connection at:'.ljust(50) + str(time.strftime('%H:%M:%S')))
+                self._running = False
+                return
+            records = json.loads(payload)
+            self.received += len(records)
+            self.dispatcher.publish(records)
+            if self.router.routes:
+                self.router.route_records(records)
+
+    def close(self):
+        self._running = False
+        try:
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._sock.close()
+        self.dispatcher.stop()
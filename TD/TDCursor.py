@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 21:46:30 2026
+
+@author: LC
+"""
+
+import asyncio
+from itertools import islice
+from threading import Condition
+
+
+class CursorHub():
+    '''
+        Wakes the cursors waiting for new rows. TDStreamerClient calls notify() after every message
+        it handled, which costs nothing while no cursor is waiting.
+    '''
+
+    def __init__(self):
+        self.waiting = 0
+        self._cond = Condition()
+        self._events = set()        # (loop, asyncio.Event) of the async cursors waiting
+
+    def __repr__(self):
+        return '<TD CursorHub - Waiting = {}>'.format(self.waiting)
+
+    def notify(self):
+        with self._cond:
+            self._cond.notify_all()
+            events, self._events = self._events, set()
+        for loop, event in events:
+            loop.call_soon_threadsafe(event.set)
+
+    def wait(self, predicate, timeout = None):
+        # Blocks until predicate() is true, False on timeout
+        with self._cond:
+            self.waiting += 1
+            try:
+                return self._cond.wait_for(predicate, timeout)
+            finally:
+                self.waiting -= 1
+
+    async def wait_async(self, predicate, timeout = None):
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        with self._cond:
+            if predicate():
+                return True
+            self.waiting += 1
+            self._events.add((loop, event))
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return predicate()
+        finally:
+            with self._cond:
+                self.waiting -= 1
+                self._events.discard((loop, event))
+
+
+class TDCursor():
+    '''
+        Reads the rows of one service (or response type) as they are stored, from its own position.
+
+        Iterating a cursor yields every row after its position and then blocks until new rows
+        arrive (or timeout). Rows are read in place from the store (TickStore.since / segments),
+        the store is never copied. With symbols, TickStore rows of other symbols are skipped on
+        their Ticker code without being decoded.
+
+        EXAMPLES:
+        for row in SessionObject.cursor('TIMESALE_EQUITY', symbols = 'AAPL'):       # blocks for new rows
+            print(row)
+
+        cursor = SessionObject.cursor('ACCT_ACTIVITY')
+        for activity in cursor.poll():          # rows stored since the last call, never blocks
+            ...
+
+        async for row in SessionObject.cursor('QUOTE', symbols = ['SPY']):
+            ...
+    '''
+
+    def __init__(self, streamer, name, symbols = None, start = None, timeout = None):
+        '''
+            NAME: name
+            DESC: Service name or response type ('notify', 'response', 'snapshot').
+            TYPE: String
+
+            NAME: symbols
+            DESC: Symbols separated by commas, or iterable. Every symbol when None. Services only, the
+                  messages of the response types have no symbol.
+            TYPE: String
+
+            NAME: start
+            DESC: Absolute position of the first row, rows spilled to disk are read back. Only new rows when None.
+            TYPE: Int
+
+            NAME: timeout
+            DESC: Seconds the iteration waits for a new row before it stops. Forever when None.
+            TYPE: Float
+        '''
+
+        self.streamer = streamer
+        self.name = name
+        self.store = streamer._data_store(name)
+        self.timeout = timeout
+        self.position = self.store.total if start is None else start
+        self.closed = False
+        self._hub = streamer.cursors
+        self._rows = iter(())
+
+        if isinstance(symbols, str):
+            symbols = [symbol.strip() for symbol in symbols.split(',')]
+        self.symbols = set(symbols) if symbols else None
+        if self.symbols is not None and name not in streamer.subscriptions:
+            raise ValueError(f'{name} messages have no symbol, symbols only filter the rows of a service')
+
+        # Where the symbol is in a row: Ticker column of TickStores, key of the ACCT_ACTIVITY records
+        names = getattr(self.store, 'names', None)
+        self._key = names.index('Ticker') if names is not None and 'Ticker' in names else 2
+
+    def __repr__(self):
+        return '<TD Cursor {} - Position = {}, Behind = {}>'.format(self.name, self.position, self.behind)
+
+    @property
+    def behind(self):
+        # Rows stored after the position, matching or not
+        return self.store.total - self.position
+
+    def close(self):
+        self.closed = True
+        self._hub.notify()
+
+    def _matching(self, rows):
+        key, symbols = self._key, self.symbols
+        return (row for row in rows if row[key] in symbols)
+
+    def _in_place(self, start, stop):
+        # In memory rows of the symbols, filtered on the Ticker codes before decoding
+        store = self.store
+        known = store._codes['Ticker']
+        codes = {known[symbol] for symbol in self.symbols if symbol in known}
+        for chunk, first, last in store.segments(start, stop):
+            tickers = chunk[self._key]
+            for i in range(first, last):
+                if tickers[i] in codes:
+                    yield from store._rows(chunk, i + 1, i)
+
+    def _batch(self):
+        # Rows between the position and the current end of the store, the position moves past them
+        store = self.store
+        start, stop = self.position, store.total
+        if start >= stop:
+            return None
+        self.position = stop
+
+        if start < store.offset:
+            # Evicted rows, read back from the spill files then from memory
+            rows = self.streamer.read_data(self.name, start, stop)
+            return rows if self.symbols is None else self._matching(rows)
+        if self.symbols is None:
+            return islice(store.since(start), stop - start)
+        if getattr(store, 'names', None) is not None and 'Ticker' in store.categories:
+            return self._in_place(start, stop)
+        return self._matching(islice(store.since(start), stop - start))
+
+    def poll(self):
+        '''
+            Yields the rows stored since the last read, without blocking.
+        '''
+        yield from self._rows
+        while True:
+            batch = self._batch()
+            if batch is None:
+                return
+            yield from batch
+
+    def _next(self):
+        # Next available row, None when there is none yet
+        for row in self._rows:
+            return row
+        while True:
+            batch = self._batch()
+            if batch is None:
+                return None
+            self._rows = iter(batch)
+            for row in self._rows:
+                return row
+
+    def _ready(self):
+        return self.closed or self.store.total > self.position
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        while True:
+            row = self._next()
+            if row is not None:
+                return row
+            if self.closed or not self._hub.wait(self._ready, self.timeout) or self.closed:
+                raise StopIteration
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while True:
+            row = self._next()
+            if row is not None:
+                return row
+            if self.closed or not await self._hub.wait_async(self._ready, self.timeout) or self.closed:
+                raise StopAsyncIteration
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:05:12 2026
+
+@author: LC
+"""
+
+import time
+from threading import Event
+
+from TDDispatcher import TDDispatcher
+
+
+# A control message published among a flood of data frames reaches a slow observer under every policy
+
+for policy in TDDispatcher.POLICIES:
+
+    received = []
+    release = Event()
+
+    def observer(message = None):
+        release.wait()
+        received.append(message)
+
+    dispatcher = TDDispatcher(maxsize = 2, policy = policy)
+    dispatcher.register(observer)
+
+    dispatcher.publish()
+    time.sleep(0.1)                     # the worker is now stuck in the first callback
+    dispatcher.publish()
+    dispatcher.publish('MISS SEQUENCE', control = True)
+    if policy != 'block':
+        for _ in range(100):            # the block policy would wait for the observer here
+            dispatcher.publish()
+    release.set()
+
+    for _ in range(100):
+        time.sleep(0.01)
+        if dispatcher.stats()['observer']['queued'] == 0:
+            break
+    dispatcher.stop()
+
+    # the symbols policy hands lists of records, the control message is one of them
+    messages = [item for message in received for item in (message if isinstance(message, list) else [message])]
+    assert 'MISS SEQUENCE' in messages, (policy, received)
+    print(policy.ljust(20) + 'MISS SEQUENCE delivered, ' + str(len(received)) + ' calls')
+
+
+# A slow 'symbols' observer never blocks the publisher, trades past its queue size are kept and counted
+
+received = []
+release = Event()
+
+def trades(records):
+    release.wait()
+    received.extend(records)
+
+dispatcher = TDDispatcher(maxsize = 10, policy = 'symbols')
+dispatcher.register(trades)
+
+started = time.perf_counter()
+for n in range(1000):
+    dispatcher.publish([{'service': 'TIMESALE_EQUITY', 'key': 'AAPL', 'seq': n}])
+assert time.perf_counter() - started < 1, 'the publisher waited for the observer'
+release.set()
+
+for _ in range(100):
+    time.sleep(0.01)
+    if len(received) == 1000:
+        break
+stats = dispatcher.stats()['trades']
+dispatcher.stop()
+
+assert [record['seq'] for record in received] == list(range(1000)), 'trades lost or out of order'
+assert stats['overflow'] > 0
+print('symbols'.ljust(20) + 'publisher never blocked, overflow = ' + str(stats['overflow']))
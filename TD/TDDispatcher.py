@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 09:12:41 2026
+
+@author: LC
+"""
+
+import time
+from collections import deque
+from threading import Thread, Condition
+
+from TDFields import SEQUENCED
+
+
+class TDDispatcher():
+    '''
+        Observer dispatcher for TDStreamerClient.
+
+        Every observer gets one long-lived worker thread and one bounded queue, so a slow
+        callback only delays itself and never the websocket receive loop.
+
+        Control messages (published with control True, ie. callBack('MISS SEQUENCE'))
+        go through a side queue of their own: they are never dropped nor conflated, whatever the policy,
+        and are delivered before the pending data messages.
+
+        Overflow policies (what happens when an observer queue is full):
+
+        policy          behaviour
+        block           publisher waits until the observer frees a slot (lossless, may stall the receive loop)
+        drop_oldest     oldest queued message is discarded to make room for the new one
+        conflate        queued messages are collapsed so only the most recent one is delivered
+        symbols         per symbol conflation, for observers bound with filters (records, see TDRouter):
+                        state services (QUOTE, LEVELONE_*, books...) keep one merged record per symbol,
+                        only the latest values are delivered and the updates merged are counted;
+                        append only services (TIMESALE_*, CHART_*, ACCT_ACTIVITY, NEWS_HEADLINE) are
+                        delivered losslessly: past maxsize their queue keeps growing instead of blocking
+                        the publisher, and the records over it are counted as overflow
+    '''
+
+    POLICIES = ('block', 'drop_oldest', 'conflate', 'symbols')
+
+    def __init__(self, maxsize = 1000, policy = 'drop_oldest'):
+        '''
+            NAME: maxsize
+            DESC: Default queue length for every new observer.
+            TYPE: Int
+
+            NAME: policy
+            DESC: Default overflow policy for every new observer: 'block', 'drop_oldest' or 'conflate'.
+            TYPE: String
+        '''
+
+        if policy not in self.POLICIES:
+            raise ValueError(f'Unknown overflow policy {policy}, valid ones are {self.POLICIES}')
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self._workers = {}
+
+    def __repr__(self):
+        return '<TD Dispatcher - Observers = {}>'.format(len(self._workers))
+
+    def register(self, callback, maxsize = None, policy = None, broadcast = True, name = None):
+        '''
+            Starts a worker for callback. Registering the same callback twice replaces its worker.
+            Workers with broadcast False are left out of publish and only get what send hands them.
+            name keys the observer in stats and names its thread, the qualified name of the callback
+            by default, with its id when another observer has the same (bound methods of two objects).
+        '''
+
+        if callback in self._workers:
+            self.unregister(callback)
+
+        names = {worker.name for worker in self._workers.values()}
+        if name is None:
+            name = getattr(callback, '__qualname__', repr(callback))
+            if name in names:
+                name = f'{name}@{id(callback):x}'
+        elif name in names:
+            raise ValueError(f'An observer is already named {name}')
+
+        policy = policy or self.policy
+        worker = (_SymbolWorker if policy == 'symbols' else _ObserverWorker)(callback,
+                                                                             maxsize = maxsize or self.maxsize,
+                                                                             policy = policy,
+                                                                             name = name)
+        worker.broadcast = broadcast
+        self._workers[callback] = worker
+        worker.start()
+        return worker
+
+    def unregister(self, callback):
+        worker = self._workers.pop(callback, None)
+        if worker:
+            worker.stop()
+
+    def publish(self, message = None, control = False):
+        # Called from the websocket thread, only enqueues. control messages take the lossless side queue
+        for worker in list(self._workers.values()):
+            if worker.broadcast:
+                worker.put(message, control)
+
+    def send(self, callback, message):
+        # Enqueues message for one observer only (TDRouter)
+        worker = self._workers.get(callback)
+        if worker is not None:
+            worker.put(message)
+
+    def stats(self):
+        '''
+            Returns per observer counters:
+                queued      messages waiting to be delivered
+                max_queued  high water mark of the queue
+                delivered   messages handed to the callback
+                dropped     messages lost by drop_oldest
+                conflated   messages collapsed by conflate
+                errors      exceptions raised by the callback
+                lag         seconds between publish and callback of the last message
+                max_lag     worst lag seen
+        '''
+        return {worker.name: worker.stats() for worker in self._workers.values()}
+
+    def stop(self):
+        for callback in list(self._workers):
+            self.unregister(callback)
+
+
+class _ObserverWorker():
+
+    def __init__(self, callback, maxsize, policy, name = None):
+
+        if policy not in TDDispatcher.POLICIES:
+            raise ValueError(f'Unknown overflow policy {policy}, valid ones are {TDDispatcher.POLICIES}')
+
+        self.callback = callback
+        self.maxsize = max(1, int(maxsize))
+        self.policy = policy
+        self.name = name or getattr(callback, '__qualname__', repr(callback))
+        self.broadcast = True
+
+        self._queue = deque()
+        self._control = deque()     # control messages, lossless and never conflated
+        self._cond = Condition()
+        self._running = False
+
+        self.max_queued = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.conflated = 0
+        self.errors = 0
+        self.lag = 0.0
+        self.max_lag = 0.0
+
+    def start(self):
+        self._running = True
+        self._thread = Thread(name=f'observer_{self.name}',
+                              target=self._run,
+                              daemon = True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def put(self, message, control = False):
+        item = (time.perf_counter(), message)
+
+        with self._cond:
+            if control:
+                self._control.append(item)
+                self._cond.notify_all()
+                return
+
+            if len(self._queue) >= self.maxsize:
+
+                if self.policy == 'block':
+                    while self._running and len(self._queue) >= self.maxsize:
+                        self._cond.wait()
+
+                elif self.policy == 'drop_oldest':
+                    self._queue.popleft()
+                    self.dropped += 1
+
+            if self.policy == 'conflate' and self._queue:
+                # Keep the enqueue time of the oldest pending message so lag stays honest
+                item = (self._queue[0][0], message)
+                self.conflated += len(self._queue)
+                self._queue.clear()
+
+            self._queue.append(item)
+            if len(self._queue) > self.max_queued:
+                self.max_queued = len(self._queue)
+            self._cond.notify_all()
+
+    def _run(self):
+
+        while True:
+            with self._cond:
+                while self._running and not self._queue and not self._control:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                enqueued, message = (self._control or self._queue).popleft()
+                # Wake a publisher waiting on a full queue (block policy)
+                self._cond.notify_all()
+
+            self.lag = time.perf_counter() - enqueued
+            if self.lag > self.max_lag:
+                self.max_lag = self.lag
+
+            try:
+                self.callback(message)
+            except Exception as error:
+                self.errors += 1
+                print(f'Observer {self.name} raised: {error}')
+
+            self.delivered += 1
+
+    def stats(self):
+        return {'policy': self.policy,
+                'queued': len(self._queue) + len(self._control),
+                'max_queued': self.max_queued,
+                'delivered': self.delivered,
+                'dropped': self.dropped,
+                'conflated': self.conflated,
+                'errors': self.errors,
+                'lag': self.lag,
+                'max_lag': self.max_lag}
+
+
+class _SymbolWorker(_ObserverWorker):
+    # Worker of the 'symbols' policy, the callback gets a list of records per call
+
+    def __init__(self, callback, maxsize, policy, name = None):
+        _ObserverWorker.__init__(self, callback, maxsize, policy, name)
+        self._latest = {}           # (service, symbol) -> merged record waiting for delivery
+        self._since = None          # enqueue time of the oldest pending record
+        self.conflated_symbols = {}     # (service, symbol) -> updates merged into a pending record
+        self.overflow = 0           # lossless records queued past maxsize
+
+    def put(self, records, control = False):
+        now = time.perf_counter()
+
+        with self._cond:
+            if control:
+                self._control.append(records)
+                records = []
+            elif not isinstance(records, list):
+                records = [records]
+            for record in records:
+                if not isinstance(record, dict) or record.get('service') in SEQUENCED:
+                    # Lossless, and the publisher (the receive thread) never waits: the queue grows past maxsize
+                    if len(self._queue) >= self.maxsize:
+                        self.overflow += 1
+                    self._queue.append(record)
+                    continue
+
+                key = (record['service'], record.get('key'))
+                pending = self._latest.get(key)
+                if pending is None:
+                    # Copied, records are shared between observers
+                    self._latest[key] = dict(record)
+                else:
+                    pending.update(record)
+                    self.conflated += 1
+                    self.conflated_symbols[key] = self.conflated_symbols.get(key, 0) + 1
+
+            if self._since is None and (self._queue or self._latest or self._control):
+                self._since = now
+            pending = len(self._queue) + len(self._latest) + len(self._control)
+            if pending > self.max_queued:
+                self.max_queued = pending
+            self._cond.notify_all()
+
+    def _run(self):
+
+        while True:
+            with self._cond:
+                while self._running and not self._queue and not self._latest and not self._control:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                # Control messages first, in the list with the records
+                records = list(self._control) + list(self._queue) + list(self._latest.values())
+                self._control.clear()
+                self._queue.clear()
+                self._latest = {}
+                enqueued, self._since = self._since, None
+
+            self.lag = time.perf_counter() - enqueued
+            if self.lag > self.max_lag:
+                self.max_lag = self.lag
+
+            try:
+                self.callback(records)
+            except Exception as error:
+                self.errors += 1
+                print(f'Observer {self.name} raised: {error}')
+
+            self.delivered += len(records)
+
+    def stats(self):
+        stats = _ObserverWorker.stats(self)
+        stats['queued'] = len(self._queue) + len(self._latest) + len(self._control)
+        stats['overflow'] = self.overflow
+        stats['conflated_symbols'] = {'/'.join(map(str, key)): count for key, count in list(self.conflated_symbols.items())}
+        return stats
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:10:52 2026
+
+@author: LC
+"""
+
+# Streaming fields per service, as documented in the TDStreamerClient.data_request_* methods.
+# {service: {field id: (field name, type)}}, type in double, long, int, String, char, boolean, list.
+# 'key' (symbol) and 'seq' (sequence) are sent as named keys and are not listed.
+#
+# LEVELONE_FOREX: the TD documentation numbers both Product and Trading Hours as 23,
+# the fields below follow the order actually streamed (Mark is 29).
+#
+# Sizes and volumes are whole shares or contracts, they are listed as long even where the
+# documentation types them double so every store keeps them as int64.
+
+FIELDS = {
+    'ACCT_ACTIVITY': {
+        1: ('Account', 'String'),
+        2: ('Message Type', 'String'),
+        3: ('Message Data', 'String'),
+        },
+    'ACTIVES_NASDAQ': {
+        1: ('Actives Data', 'String'),
+        },
+    'ACTIVES_NYSE': {
+        1: ('Actives Data', 'String'),
+        },
+    'ACTIVES_OTCBB': {
+        1: ('Actives Data', 'String'),
+        },
+    'ACTIVES_OPTIONS': {
+        1: ('Actives Data', 'String'),
+        },
+    'CHART_EQUITY': {
+        1: ('Open Price', 'double'),
+        2: ('High Price', 'double'),
+        3: ('Low Price', 'double'),
+        4: ('Close Price', 'double'),
+        5: ('Volume', 'long'),
+        6: ('Sequence', 'long'),
+        7: ('Chart Time', 'long'),
+        8: ('Chart Day', 'int'),
+        },
+    'CHART_FUTURES': {
+        1: ('ChartTime', 'long'),
+        2: ('Open Price', 'double'),
+        3: ('High Price', 'double'),
+        4: ('Low Price', 'double'),
+        5: ('Close Price', 'double'),
+        6: ('Volume', 'long'),
+        },
+    'CHART_OPTIONS': {
+        1: ('ChartTime', 'long'),
+        2: ('Open Price', 'double'),
+        3: ('High Price', 'double'),
+        4: ('Low Price', 'double'),
+        5: ('Close Price', 'double'),
+        6: ('Volume', 'long'),
+        },
+    'QUOTE': {
+        1: ('Bid Price', 'double'),
+        2: ('Ask Price', 'double'),
+        3: ('Last Price', 'double'),
+        4: ('Bid Size', 'long'),
+        5: ('Ask Size', 'long'),
+        6: ('Ask ID', 'char'),
+        7: ('Bid ID', 'char'),
+        8: ('Total Volume', 'long'),
+        9: ('Last Size', 'long'),
+        10: ('Trade Time', 'int'),
+        11: ('Quote Time', 'int'),
+        12: ('High Price', 'double'),
+        13: ('Low Price', 'double'),
+        14: ('Bid Tick', 'char'),
+        15: ('Close Price', 'double'),
+        16: ('Exchange ID', 'char'),
+        17: ('Marginable', 'boolean'),
+        18: ('Shortable', 'boolean'),
+        19: ('Island Bid', 'double'),
+        20: ('Island Ask', 'double'),
+        21: ('Island Volume', 'int'),
+        22: ('Quote Day', 'int'),
+        23: ('Trade Day', 'int'),
+        24: ('Volatility', 'double'),
+        25: ('Description', 'String'),
+        26: ('Last ID', 'char'),
+        27: ('Digits', 'int'),
+        28: ('Open Price', 'double'),
+        29: ('Net Change', 'double'),
+        30: ('52 Week High', 'double'),
+        31: ('52 Week Low', 'double'),
+        32: ('PE Ratio', 'double'),
+        33: ('Dividend Amount', 'double'),
+        34: ('Dividend Yield', 'double'),
+        35: ('Island Bid Size', 'int'),
+        36: ('Island Ask Size', 'int'),
+        37: ('NAV', 'double'),
+        38: ('Fund Price', 'double'),
+        39: ('Exchange Name', 'String'),
+        40: ('Dividend Date', 'String'),
+        41: ('Regular Market Quote', 'boolean'),
+        42: ('Regular Market Trade', 'boolean'),
+        43: ('Regular Market Last Price', 'double'),
+        44: ('Regular Market Last Size', 'long'),
+        45: ('Regular Market Trade Time', 'int'),
+        46: ('Regular Market Trade Day', 'int'),
+        47: ('Regular Market Net Change', 'double'),
+        48: ('Security Status', 'String'),
+        49: ('Mark', 'double'),
+        50: ('Quote Time in Long', 'long'),
+        51: ('Trade Time in Long', 'long'),
+        52: ('Regular Market Trade Time in', 'long'),
+        },
+    'OPTION': {
+        1: ('Description', 'String'),
+        2: ('Bid Price', 'double'),
+        3: ('Ask Price', 'double'),
+        4: ('Last Price', 'double'),
+        5: ('High Price', 'double'),
+        6: ('Low Price', 'double'),
+        7: ('Close Price', 'double'),
+        8: ('Total Volume', 'long'),
+        9: ('Open Interest', 'int'),
+        10: ('Volatility', 'double'),
+        11: ('Quote Time', 'long'),
+        12: ('Trade Time', 'long'),
+        13: ('Money Intrinsic Value', 'double'),
+        14: ('Quote Day', 'int'),
+        15: ('Trade Day', 'int'),
+        16: ('Expiration Year', 'int'),
+        17: ('Multiplier', 'double'),
+        18: ('Digits', 'int'),
+        19: ('Open Price', 'double'),
+        20: ('Bid Size', 'long'),
+        21: ('Ask Size', 'long'),
+        22: ('Last Size', 'long'),
+        23: ('Net Change', 'double'),
+        24: ('Strike Price', 'double'),
+        25: ('Contract Type', 'char'),
+        26: ('Underlying', 'String'),
+        27: ('Expiration Month', 'int'),
+        28: ('Deliverables', 'String'),
+        29: ('Time Value', 'double'),
+        30: ('Expiration Day', 'int'),
+        31: ('Days to Expiration', 'int'),
+        32: ('Delta', 'double'),
+        33: ('Gamma', 'double'),
+        34: ('Theta', 'double'),
+        35: ('Vega', 'double'),
+        36: ('Rho', 'double'),
+        37: ('Security Status', 'String'),
+        38: ('Theoretical Option Value', 'double'),
+        39: ('Underlying Price', 'double'),
+        40: ('UV Expiration Type', 'char'),
+        41: ('Mark', 'double'),
+        },
+    'LISTED_BOOK': {
+        1: ('Level2 Time', 'long'),
+        2: ('Bid Book', 'list'),
+        3: ('Ask Book', 'list'),
+        },
+    'NASDAQ_BOOK': {
+        1: ('Level2 Time', 'long'),
+        2: ('Bid Book', 'list'),
+        3: ('Ask Book', 'list'),
+        },
+    'OPTIONS_BOOK': {
+        1: ('Level2 Time', 'long'),
+        2: ('Bid Book', 'list'),
+        3: ('Ask Book', 'list'),
+        },
+    'LEVELONE_FUTURES': {
+        1: ('Bid Price', 'double'),
+        2: ('Ask Price', 'double'),
+        3: ('Last Price', 'double'),
+        4: ('Bid Size', 'long'),
+        5: ('Ask Size', 'long'),
+        6: ('Ask ID', 'char'),
+        7: ('Bid ID', 'char'),
+        8: ('Total Volume', 'long'),
+        9: ('Last Size', 'long'),
+        10: ('Quote Time', 'long'),
+        11: ('Trade Time', 'long'),
+        12: ('High Price', 'double'),
+        13: ('Low Price', 'double'),
+        14: ('Close Price', 'double'),
+        15: ('Exchange ID', 'char'),
+        16: ('Description', 'String'),
+        17: ('Last ID', 'char'),
+        18: ('Open Price', 'double'),
+        19: ('Net Change', 'double'),
+        20: ('Future Percent Change', 'double'),
+        21: ('Exhange Name', 'String'),
+        22: ('Security Status', 'String'),
+        23: ('Open Interest', 'int'),
+        24: ('Mark', 'double'),
+        25: ('Tick', 'double'),
+        26: ('Tick Amount', 'double'),
+        27: ('Product', 'String'),
+        28: ('Future Price Format', 'String'),
+        29: ('Future Trading Hours', 'String'),
+        30: ('Future Is Tradable', 'boolean'),
+        31: ('Future Multiplier', 'double'),
+        32: ('Future Is Active', 'boolean'),
+        33: ('Future Settlement Price', 'double'),
+        34: ('Future Active Symbol', 'String'),
+        35: ('Future Expiration Date', 'long'),
+        },
+    'LEVELONE_FOREX': {
+        1: ('Bid Price', 'double'),
+        2: ('Ask Price', 'double'),
+        3: ('Last Price', 'double'),
+        4: ('Bid Size', 'long'),
+        5: ('Ask Size', 'long'),
+        6: ('Total Volume', 'long'),
+        7: ('Last Size', 'long'),
+        8: ('Quote Time', 'long'),
+        9: ('Trade Time', 'long'),
+        10: ('High Price', 'double'),
+        11: ('Low Price', 'double'),
+        12: ('Close Price', 'double'),
+        13: ('Exchange ID', 'char'),
+        14: ('Description', 'String'),
+        15: ('Open Price', 'double'),
+        16: ('Net Change', 'double'),
+        17: ('Percent Change', 'double'),
+        18: ('Exchange Name', 'String'),
+        19: ('Digits', 'int'),
+        20: ('Security Status', 'String'),
+        21: ('Tick', 'double'),
+        22: ('Tick Amount', 'double'),
+        23: ('Product', 'String'),
+        24: ('Trading Hours', 'String'),
+        25: ('Is Tradable', 'boolean'),
+        26: ('Market Maker', 'String'),
+        27: ('52 Week High', 'double'),
+        28: ('52 Week Low', 'double'),
+        29: ('Mark', 'double'),
+        },
+    'TIMESALE_EQUITY': {
+        1: ('Trade Time', 'long'),
+        2: ('Last Price', 'double'),
+        3: ('Last Size', 'long'),
+        4: ('Last Sequence', 'long'),
+        },
+    'TIMESALE_FUTURES': {
+        1: ('Trade Time', 'long'),
+        2: ('Last Price', 'double'),
+        3: ('Last Size', 'long'),
+        4: ('Last Sequence', 'long'),
+        },
+    'TIMESALE_OPTIONS': {
+        1: ('Trade Time', 'long'),
+        2: ('Last Price', 'double'),
+        3: ('Last Size', 'long'),
+        4: ('Last Sequence', 'long'),
+        },
+    'NEWS_HEADLINE': {
+        1: ('Error Code', 'double'),
+        2: ('Story Datetime', 'long'),
+        3: ('Headline ID', 'String'),
+        4: ('Status', 'char'),
+        5: ('Headline', 'String'),
+        6: ('Story ID', 'String'),
+        7: ('Count for Keyword', 'int'),
+        8: ('Keyword Array', 'String'),
+        9: ('Is Hot', 'boolean'),
+        10: ('Story Source', 'char'),
+        },
+    }
+
+
+# Services whose messages carry a 'seq' per key
+SEQUENCED = ('ACCT_ACTIVITY', 'CHART_EQUITY', 'CHART_FUTURES', 'CHART_OPTIONS', 'NEWS_HEADLINE',
+             'TIMESALE_EQUITY', 'TIMESALE_FUTURES', 'TIMESALE_OPTIONS')
+
+# Book services, fields 2 and 3 are lists of price levels
+BOOKS = ('LISTED_BOOK', 'NASDAQ_BOOK', 'OPTIONS_BOOK')
+
+# Free text fields, close to unique per message: stored as they are and evicted with their rows,
+# a dictionary of their values would only grow
+TEXT = {
+    'ACTIVES_NASDAQ': ('Actives Data',),
+    'ACTIVES_NYSE': ('Actives Data',),
+    'ACTIVES_OTCBB': ('Actives Data',),
+    'ACTIVES_OPTIONS': ('Actives Data',),
+    'NEWS_HEADLINE': ('Headline ID', 'Headline', 'Story ID', 'Keyword Array'),
+    }
@@ -0,0 +1,390 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:05:14 2026
+
+@author: LC
+"""
+
+import math
+from array import array
+from collections import deque
+from threading import Lock
+
+
+NAN = float('nan')
+
+# Content keys of (time, high, low, close, volume) per streaming service, trades have one price
+SOURCES = {
+    'TIMESALE_EQUITY':  ('1', '2', '2', '2', '3'),
+    'TIMESALE_FUTURES': ('1', '2', '2', '2', '3'),
+    'TIMESALE_OPTIONS': ('1', '2', '2', '2', '3'),
+    'CHART_EQUITY':     ('7', '2', '3', '4', '5'),
+    'CHART_FUTURES':    ('1', '3', '4', '5', '6'),
+    'CHART_OPTIONS':    ('1', '3', '4', '5', '6'),
+    }
+
+
+'''****************************************
+************* Indicators ******************
+****************************************'''
+
+# Every indicator takes one bar (or one trade, high = low = close) per update, in constant time,
+# and reads NaN until it has seen period samples.
+
+
+class EMA():
+    # Exponential moving average of the close, alpha = 2 / (period + 1), seeded with the first close
+
+    bars = False
+
+    def __init__(self, period = 20):
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.average = NAN
+        self.value = NAN
+
+    def update(self, time, high, low, close, volume):
+        self.count += 1
+        if self.count == 1:
+            self.average = close
+        else:
+            self.average += self.alpha * (close - self.average)
+        if self.count >= self.period:
+            self.value = self.average
+        return self.value
+
+
+class RollingStd():
+    # Sample standard deviation of the last period closes, running mean and squared deviations (Welford)
+
+    bars = False
+
+    def __init__(self, period = 20):
+        self.period = period
+        self.window = deque()
+        self.mean = 0.0
+        self.squares = 0.0
+        self.value = NAN
+
+    def update(self, time, high, low, close, volume):
+        window = self.window
+        window.append(close)
+        n = len(window)
+        delta = close - self.mean
+        self.mean += delta / n
+        self.squares += delta * (close - self.mean)
+        if n > self.period:
+            old = window.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean -= delta / n
+            self.squares -= delta * (old - self.mean)
+        if n >= self.period and n > 1:
+            variance = self.squares / (n - 1)
+            self.value = math.sqrt(variance) if variance > 0 else 0.0
+        return self.value
+
+
+class RSI():
+    # Wilder's relative strength index of the closes
+
+    bars = False
+
+    def __init__(self, period = 14):
+        self.period = period
+        self.count = 0
+        self.previous = None
+        self.gain = 0.0
+        self.loss = 0.0
+        self.value = NAN
+
+    def update(self, time, high, low, close, volume):
+        previous, self.previous = self.previous, close
+        if previous is None:
+            return self.value
+        change = close - previous
+        gain, loss = (change, 0.0) if change > 0 else (0.0, -change)
+        period = self.period
+        self.count += 1
+        if self.count <= period:
+            # Simple average of the first changes
+            self.gain += gain / period
+            self.loss += loss / period
+            if self.count < period:
+                return self.value
+        else:
+            self.gain = (self.gain * (period - 1) + gain) / period
+            self.loss = (self.loss * (period - 1) + loss) / period
+        self.value = 100.0 if self.loss == 0 else 100.0 - 100.0 / (1.0 + self.gain / self.loss)
+        return self.value
+
+
+class ATR():
+    # Wilder's average true range, needs bars
+
+    bars = True
+
+    def __init__(self, period = 14):
+        self.period = period
+        self.count = 0
+        self.previous = None
+        self.average = 0.0
+        self.value = NAN
+
+    def update(self, time, high, low, close, volume):
+        previous, self.previous = self.previous, close
+        true_range = high - low if previous is None else max(high, previous) - min(low, previous)
+        period = self.period
+        self.count += 1
+        if self.count <= period:
+            self.average += true_range / period
+            if self.count < period:
+                return self.value
+        else:
+            self.average = (self.average * (period - 1) + true_range) / period
+        self.value = self.average
+        return self.value
+
+
+class VWAP():
+    # Volume weighted average of the typical price (high + low + close) / 3, reset every exchange day
+
+    bars = False
+
+    def __init__(self, period = None, clock = None):
+        self.period = period
+        self.clock = clock
+        self.day = None
+        self.value_traded = 0.0
+        self.volume = 0.0
+        self.value = NAN
+
+    def update(self, time, high, low, close, volume):
+        if time is not None:
+            day = (time + (self.clock.offset(time) if self.clock is not None else 0)) // 86400000
+            if day != self.day:
+                self.day = day
+                self.value_traded = self.volume = 0.0
+        if volume:
+            self.value_traded += (high + low + close) / 3 * volume
+            self.volume += volume
+            self.value = self.value_traded / self.volume
+        return self.value
+
+
+INDICATORS = {'EMA': EMA, 'STD': RollingStd, 'RSI': RSI, 'ATR': ATR, 'VWAP': VWAP}
+
+
+class _Registration():
+    # One named indicator: its source, symbol filter, state per symbol and snapshot column
+
+    __slots__ = ('name', 'kind', 'source', 'period', 'symbols', 'states', 'column')
+
+    def __init__(self, name, kind, source, period, symbols, capacity):
+        self.name = name
+        self.kind = kind
+        self.source = source
+        self.period = period
+        self.symbols = symbols
+        self.states = {}        # symbol -> indicator
+        self.column = array('d', [NAN]) * capacity
+
+
+class TDIndicatorEngine():
+    '''
+        Indicators updated incrementally, per symbol, as the data they are registered on arrives:
+        a streaming service (TIMESALE_* trades, CHART_* bars) or a bar interval of the bar engine
+        ('m1', 't100'...). Each update costs constant time, nothing is recomputed over history.
+
+        Every indicator writes its latest value in a column indexed by symbol row (like the quote
+        board), so the values of every symbol are read at once with to_numpy / to_pandas.
+
+        Kinds: EMA, STD (rolling sample standard deviation), RSI, ATR (bar sources) and VWAP (session).
+
+        EXAMPLES:
+        SessionObject.indicators.add('ema20', 'EMA', 'CHART_EQUITY', period = 20)
+        SessionObject.indicators.add('rsi', 'RSI', 'm5', period = 14, symbols = 'AAPL, SPY')    # m5 bars are added
+        SessionObject.indicators.add('vwap', 'VWAP', 'TIMESALE_EQUITY')
+        SessionObject.indicators.get('AAPL', 'ema20')
+        SessionObject.indicators.to_pandas()             # one row per symbol, one column per indicator
+    '''
+
+    def __init__(self, bars = None, clock = None, capacity = 256):
+        '''
+            NAME: bars
+            DESC: TDBarEngine of the bar interval sources.
+            TYPE: Object
+
+            NAME: clock
+            DESC: ExchangeClock, VWAP resets on the exchange day. UTC days when None.
+            TYPE: Object
+
+            NAME: capacity
+            DESC: Symbol rows allocated up front, doubled when full.
+            TYPE: Int
+        '''
+
+        self.bars = bars
+        self.clock = clock
+        self.capacity = capacity
+        self.symbols = []       # row -> symbol
+        self.rows = {}          # symbol -> row
+        self.updated = array('q', bytes(8 * capacity))      # time of the last update, epoch ms
+        self.indicators = {}    # name -> _Registration
+        self.sources = {}       # source -> tuple of registrations
+        self.updates = 0
+        self._lock = Lock()
+        if bars is not None:
+            bars.listeners.append(self.on_bars)
+
+    def __repr__(self):
+        return '<TD IndicatorEngine - Indicators = {}, Symbols = {}>'.format(list(self.indicators), len(self.symbols))
+
+    def add(self, name, kind, source, period = 14, symbols = None):
+        '''
+            NAME: name
+            DESC: Name of the indicator, column of the snapshot.
+            TYPE: String
+
+            NAME: kind
+            DESC: 'EMA', 'STD', 'RSI', 'ATR' or 'VWAP'.
+            TYPE: String
+
+            NAME: source
+            DESC: Streaming service (TIMESALE_EQUITY, CHART_EQUITY...) or bar interval of SessionObject.bars ('m1', 't100'...).
+            TYPE: String
+
+            NAME: period
+            DESC: Samples of the indicator, ignored by VWAP.
+            TYPE: Int
+
+            NAME: symbols
+            DESC: Symbols separated by commas, or iterable. Every symbol of the source when None.
+            TYPE: String
+        '''
+
+        kind = kind.upper()
+        if kind not in INDICATORS:
+            raise ValueError(f'Unknown indicator {kind}, expected one of {list(INDICATORS)}')
+        bar_source = source not in SOURCES
+        if bar_source and self.bars is None:
+            raise ValueError(f'{source} is not a streaming service and there is no bar engine')
+        if INDICATORS[kind].bars and source.startswith('TIMESALE'):
+            raise ValueError(f'{kind} needs bars, use a CHART service or a bar interval')
+        if isinstance(symbols, str):
+            symbols = symbols.split(',')
+        symbols = {symbol.strip() for symbol in symbols} if symbols is not None else None
+
+        if bar_source:
+            self.bars.add(source, symbols = symbols)
+
+        with self._lock:
+            registration = _Registration(name, kind, source, period, symbols, self.capacity)
+            self.indicators[name] = registration
+            self._index()
+
+    def remove(self, name):
+        with self._lock:
+            self.indicators.pop(name, None)
+            self._index()
+
+    def _index(self):
+        sources = {}
+        for registration in self.indicators.values():
+            sources.setdefault(registration.source, []).append(registration)
+        self.sources = {source: tuple(registrations) for source, registrations in sources.items()}
+
+    def _row(self, symbol):
+        row = self.rows.get(symbol)
+        if row is not None:
+            return row
+        with self._lock:
+            row = self.rows.get(symbol)
+            if row is not None:
+                return row
+            row = len(self.symbols)
+            if row == self.capacity:
+                grow = self.capacity
+                for registration in self.indicators.values():
+                    registration.column.extend(array('d', [NAN]) * grow)
+                self.updated.extend(array('q', bytes(8 * grow)))
+                self.capacity += grow
+            self.symbols.append(symbol)
+            self.rows[symbol] = row
+            return row
+
+    def _state(self, registration, symbol):
+        state = registration.states.get(symbol)
+        if state is None:
+            indicator = INDICATORS[registration.kind]
+            state = indicator(registration.period, self.clock) if indicator is VWAP else indicator(registration.period)
+            registration.states[symbol] = state
+        return state
+
+    def _apply(self, registrations, symbol, time, high, low, close, volume):
+        row = None
+        for registration in registrations:
+            if registration.symbols is not None and symbol not in registration.symbols:
+                continue
+            if row is None:
+                row = self._row(symbol)
+            registration.column[row] = self._state(registration, symbol).update(time, high, low, close, volume)
+        if row is not None:
+            if time is not None:
+                self.updated[row] = time
+            self.updates += 1
+
+    def update(self, data):
+        # Called from the receive path with one data entry of a streaming source
+        registrations = self.sources.get(data['service'])
+        if not registrations:
+            return
+        time, high, low, close, volume = SOURCES[data['service']]
+        for content in data['content']:
+            price = content.get(close)
+            if price is None:
+                continue
+            self._apply(registrations, content['key'], content.get(time), content.get(high, price),
+                        content.get(low, price), price, content.get(volume) or 0)
+
+    def on_bars(self, bars):
+        # Listener of the bar engine, with the bars it just closed
+        sources = self.sources
+        for bar in bars:
+            registrations = sources.get(bar.interval)
+            if registrations:
+                self._apply(registrations, bar.symbol, bar.end, bar.high, bar.low, bar.close, bar.volume)
+
+    '''****************************************
+    ************* Queries *********************
+    ****************************************'''
+
+    def get(self, symbol, name, default = NAN):
+        # Latest value of the indicator name for symbol
+        registration = self.indicators.get(name)
+        row = self.rows.get(symbol)
+        if registration is None or row is None:
+            return default
+        return registration.column[row]
+
+    def to_numpy(self, names = None):
+        '''
+            Returns (symbols, {name: array}) with one entry per symbol, NaN where the indicator has no
+            value yet. Arrays are copies, the indicators keep updating.
+        '''
+        import numpy as np
+
+        rows = len(self.symbols)
+        symbols = np.array(self.symbols[:rows], dtype = object)
+        columns = {'Timestamp': np.frombuffer(self.updated, dtype = np.int64, count = rows).copy()}
+        for name in names or list(self.indicators):
+            columns[name] = np.frombuffer(self.indicators[name].column, dtype = np.float64, count = rows).copy()
+        return symbols, columns
+
+    def to_pandas(self, names = None):
+        # DataFrame indexed by Ticker, one column per indicator
+        import pandas as pd
+
+        symbols, columns = self.to_numpy(names)
+        return pd.DataFrame(columns, index = pd.Index(symbols, name = 'Ticker'))
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 13:31:09 2026
+
+@author: LC
+"""
+
+import os
+import gzip
+import zlib
+import time
+import struct
+import argparse
+from queue import SimpleQueue
+from threading import Thread
+from datetime import datetime
+
+
+# Record header: receive time (ns since epoch, int64) and payload length (uint32), little endian
+RECORD = struct.Struct('<qI')
+
+
+class TDJournal():
+    '''
+        Raw websocket journal.
+
+        Every frame received by TDStreamerClient._websocket_on_message is appended, untouched, with its
+        local receive timestamp to a gzip compressed file of length prefixed records:
+
+            ./StreamData/Journal/journal_{date}_{time}.tdj.gz
+            [int64 receive ns][uint32 length][payload utf-8] ...
+
+        The receive thread only puts the frame in a queue, compression and disk writes happen in
+        the journal thread.
+    '''
+
+    def __init__(self, folder = './StreamData/Journal', compresslevel = 1):
+        '''
+            NAME: folder
+            DESC: Folder for the journal files.
+            TYPE: String
+
+            NAME: compresslevel
+            DESC: gzip level, 1 is the fastest.
+            TYPE: Int
+        '''
+
+        self.folder = folder
+        self.compresslevel = compresslevel
+        self.path = None
+        self.records = 0
+        self._queue = SimpleQueue()
+        self._thread = None
+
+    def __repr__(self):
+        return '<TD Journal {} - Records = {}>'.format(self.path, self.records)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return
+
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+
+        self.path = os.path.join(self.folder, 'journal_{}.tdj.gz'.format(datetime.now().strftime('%Y-%m-%d_%H%M%S')))
+        self._thread = Thread(name='journal_thread',
+                              target=self._run,
+                              daemon = True)
+        self._thread.start()
+
+    def stop(self, timeout = 5):
+        if self.running:
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+    def write(self, message, received = None):
+        # Called from the receive thread
+        self._queue.put((received or time.time_ns(), message))
+
+    def _run(self):
+
+        with gzip.open(self.path, 'ab', compresslevel=self.compresslevel) as f:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+
+                # Drain whatever else is waiting so several frames share one write
+                items = [item]
+                while not self._queue.empty():
+                    item = self._queue.get()
+                    if item is None:
+                        break
+                    items.append(item)
+
+                for received, message in items:
+                    payload = message.encode('utf-8') if isinstance(message, str) else message
+                    f.write(RECORD.pack(received, len(payload)))
+                    f.write(payload)
+                self.records += len(items)
+
+                if item is None:
+                    break
+                f.flush()
+
+
+def read_journal(path):
+    '''
+        Yields (receive ns since epoch, message) for every record of a journal file. A journal cut by
+        a crash or damaged ends at its last complete record.
+    '''
+
+    with gzip.open(path, 'rb') as f:
+        while True:
+            try:
+                header = f.read(RECORD.size)
+                if len(header) < RECORD.size:
+                    # End of file, or a record cut by a crash
+                    return
+                received, length = RECORD.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    return
+                message = payload.decode('utf-8')
+            except (EOFError, zlib.error, gzip.BadGzipFile, UnicodeDecodeError) as error:
+                # Compressed stream cut by a crash (no end marker) or damaged, the last complete record was read
+                print('Journal {} ends early:'.format(path).ljust(50) + str(error))
+                return
+            yield received, message
+
+
+class TDReplay():
+    '''
+        Feeds a journal back through TDStreamerClient._websocket_on_message, so frames go through the
+        same decode, segregation, storage and callback path as live data.
+
+        NAME: streamer
+        DESC: TDStreamerClient instance. It does not need to be connected, TDStreamerClient(None) is enough.
+        TYPE: Object
+
+        NAME: path
+        DESC: Journal file.
+        TYPE: String
+
+        NAME: speed
+        DESC: 1 = real time, N = N times faster, 0 or None = as fast as possible.
+        TYPE: Float
+
+        EXAMPLES:
+        TDS = TDStreamerClient(None, cache_data = False)
+        TDReplay(TDS, './StreamData/Journal/journal_2020-09-14_093000.tdj.gz', speed = 10).run()
+    '''
+
+    def __init__(self, streamer, path, speed = 1.0):
+        self.streamer = streamer
+        self.path = path
+        self.speed = speed
+        self.messages = 0
+        self.bytes = 0
+        self.elapsed = 0.0
+        self._stop = False
+        self._thread = None
+
+    def __repr__(self):
+        return '<TD Replay {} - Messages = {}>'.format(self.path, self.messages)
+
+    def run(self):
+        '''
+            Replays the whole journal in the calling thread. Returns the replay stats.
+        '''
+
+        streamer = self.streamer
+        streamer.replaying = True
+        started = time.perf_counter()
+        first = None
+
+        try:
+            for received, message in read_journal(self.path):
+                if self._stop:
+                    break
+
+                if self.speed:
+                    if first is None:
+                        first = received
+                    # Keep the original spacing between frames, scaled by speed
+                    wait = started + (received - first) / 1e9 / self.speed - time.perf_counter()
+                    if wait > 0:
+                        time.sleep(wait)
+
+                streamer._websocket_on_message(message)
+                self.messages += 1
+                self.bytes += len(message)
+        finally:
+            streamer.replaying = False
+            self.elapsed = time.perf_counter() - started
+
+        return self.stats()
+
+    def start(self):
+        # Replays in a background thread
+        self._thread = Thread(name='replay_thread',
+                              target=self.run,
+                              daemon = True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop = True
+        if self._thread:
+            self._thread.join()
+
+    def stats(self):
+        return {'messages': self.messages,
+                'bytes': self.bytes,
+                'elapsed': self.elapsed,
+                'messages_sec': self.messages / self.elapsed if self.elapsed else 0.0}
+
+
+if __name__ == '__main__':
+
+    # Offline replay, ie. python TDJournal.py ./StreamData/Journal/journal_2020-09-14_093000.tdj.gz --speed 0
+    from TDStream import TDStreamerClient
+
+    parser = argparse.ArgumentParser(description='Replay a TDStreamerClient journal')
+    parser.add_argument('path')
+    parser.add_argument('--speed', type=float, default=0, help='1 = real time, N = N times faster, 0 = as fast as possible')
+    args = parser.parse_args()
+
+    TDS = TDStreamerClient(None, cache_data = False)
+    print(TDReplay(TDS, args.path, speed = args.speed).run())
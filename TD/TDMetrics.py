@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 16:41:12 2026
+
+@author: LC
+"""
+
+import json
+import time
+from bisect import bisect_left
+from threading import Thread, Lock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DECODE_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.05)
+
+
+class Histogram():
+    '''
+        Fixed bucket histogram. observe() is a bisect and two additions, cheap enough for the receive path.
+    '''
+
+    def __init__(self, buckets = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)    # last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def __repr__(self):
+        return '<TD Histogram - Count = {}, p50 = {}, p99 = {}>'.format(self.count, self.percentile(50), self.percentile(99))
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def percentile(self, p):
+        # Upper bound of the bucket holding the p-th percentile, None when empty or beyond the last bucket
+        if not self.count:
+            return None
+        target = p / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def snapshot(self):
+        return {'count': self.count,
+                'sum': self.sum,
+                'mean': self.sum / self.count if self.count else None,
+                'p50': self.percentile(50),
+                'p90': self.percentile(90),
+                'p99': self.percentile(99)}
+
+
+class TDMetrics():
+    '''
+        Metrics registry for TDStreamerClient.
+
+        The receive path feeds it once per frame (frame) and once per data message (data):
+            frames, bytes and json decode time
+            per service and per symbol message counts
+            per service segregation time
+            per service latency, local receive time minus the server 'timestamp' of the message
+
+        tick() turns the counts into per second rates. TDStreamerClient calls it every second while
+        logged in, and pulls refresh rates older than a second. Gauges (observer queue depths, writer
+        lag, dropped messages...) are callables read when the metrics are pulled.
+
+        Pull API:   snapshot() returns a dictionary
+        HTTP:       serve(port) exposes /metrics (Prometheus text format) and /metrics.json
+
+        EXAMPLES:
+        SessionObject.metrics.snapshot()['services']['TIMESALE_EQUITY']['messages_sec']
+        SessionObject.metrics.serve(9108)       # curl http://127.0.0.1:9108/metrics
+    '''
+
+    def __init__(self, per_symbol = True):
+        '''
+            NAME: per_symbol
+            DESC: Count messages per symbol too, off saves a dictionary update per message.
+            TYPE: Boolean
+        '''
+
+        self.per_symbol = per_symbol
+        self.started = time.time()
+
+        self.frames = 0
+        self.bytes = 0
+        self.decode = Histogram(DECODE_BUCKETS)
+
+        self.services = {}      # service -> {'frames', 'messages', 'symbols', 'latency', 'segregation'}
+        self.counters = {}      # name -> {label: value}
+        self.histograms = {}    # name -> {label: Histogram}
+        self.rates = {}         # rate name -> value per second, refreshed by tick
+        self._gauges = {}       # name -> (function, label, help)
+
+        self._last_tick = time.monotonic()
+        self._last_counts = {}
+        self._lock = Lock()
+        self._server = None
+
+    def __repr__(self):
+        return '<TD Metrics - Frames = {}, Services = {}>'.format(self.frames, list(self.services))
+
+    '''****************************************
+    ************* Receive path ****************
+    ****************************************'''
+
+    def frame(self, nbytes, decode_seconds):
+        self.frames += 1
+        self.bytes += nbytes
+        self.decode.observe(decode_seconds)
+
+    def _service(self, service):
+        metrics = self.services.get(service)
+        if metrics is None:
+            metrics = self.services[service] = {'frames': 0,
+                                                'messages': 0,
+                                                'symbols': {},
+                                                'latency': Histogram(LATENCY_BUCKETS),
+                                                'segregation': Histogram(DECODE_BUCKETS)}
+        return metrics
+
+    def data(self, message, received, segregation_seconds):
+        '''
+            NAME: message
+            DESC: Decoded data message, {'data': [{'service', 'timestamp', 'content': [...]}]}.
+            TYPE: Dict
+
+            NAME: received
+            DESC: Local receive time, seconds since epoch.
+            TYPE: Float
+        '''
+
+        data = message['data']
+        share = segregation_seconds / len(data)
+        for entry in data:
+            metrics = self._service(entry['service'])
+            content = entry['content']
+            metrics['frames'] += 1
+            metrics['messages'] += len(content)
+            metrics['latency'].observe(received - entry['timestamp'] / 1000)
+            metrics['segregation'].observe(share)
+
+            if self.per_symbol:
+                symbols = metrics['symbols']
+                for item in content:
+                    key = item.get('key')
+                    symbols[key] = symbols.get(key, 0) + 1
+
+    def incr(self, name, label = '', value = 1):
+        counter = self.counters.setdefault(name, {})
+        counter[label] = counter.get(label, 0) + value
+
+    def observe(self, name, value, label = '', buckets = LATENCY_BUCKETS):
+        histograms = self.histograms.setdefault(name, {})
+        histogram = histograms.get(label)
+        if histogram is None:
+            histogram = histograms[label] = Histogram(buckets)
+        histogram.observe(value)
+
+    def gauge(self, name, function, label = None, help = ''):
+        '''
+            Registers a gauge read on every pull. function returns a number, or {label value: number}
+            when label names the label (ie. label = 'observer').
+        '''
+        self._gauges[name] = (function, label, help)
+
+    '''****************************************
+    ************* Rates ***********************
+    ****************************************'''
+
+    def tick(self):
+        '''
+            Refreshes the per second rates with the counts since the previous tick.
+        '''
+
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._last_tick
+            if elapsed <= 0:
+                return
+
+            counts = {('frames',): self.frames, ('bytes',): self.bytes}
+            for service, metrics in list(self.services.items()):
+                counts[('service', service)] = metrics['messages']
+                for symbol, count in list(metrics['symbols'].items()):
+                    counts[('symbol', service, symbol)] = count
+
+            last = self._last_counts
+            self.rates = {key: (count - last.get(key, 0)) / elapsed for key, count in counts.items()}
+            self._last_counts = counts
+            self._last_tick = now
+
+    def _refresh(self):
+        # Pulls between ticks reuse the last rates, stale ones (no tick thread, ie. replay) are refreshed
+        if time.monotonic() - self._last_tick >= 1:
+            self.tick()
+
+    def _read_gauges(self):
+        values = {}
+        for name, (function, label, _) in list(self._gauges.items()):
+            try:
+                values[name] = function()
+            except Exception as e:
+                values[name] = None
+                print(f'Metrics gauge {name} failed: {e}')
+        return values
+
+    '''****************************************
+    ************* Pull API ********************
+    ****************************************'''
+
+    def snapshot(self):
+        '''
+            Returns every metric as a dictionary. Rates are per second over the last tick.
+        '''
+
+        self._refresh()
+        rates = self.rates
+        services = {}
+        for service, metrics in list(self.services.items()):
+            services[service] = {'frames': metrics['frames'],
+                                 'messages': metrics['messages'],
+                                 'messages_sec': rates.get(('service', service), 0.0),
+                                 'latency': metrics['latency'].snapshot(),
+                                 'segregation': metrics['segregation'].snapshot(),
+                                 'symbols': {symbol: {'messages': count,
+                                                      'messages_sec': rates.get(('symbol', service, symbol), 0.0)}
+                                             for symbol, count in list(metrics['symbols'].items())}}
+
+        return {'uptime': time.time() - self.started,
+                'frames': self.frames,
+                'frames_sec': rates.get(('frames',), 0.0),
+                'bytes': self.bytes,
+                'bytes_sec': rates.get(('bytes',), 0.0),
+                'decode': self.decode.snapshot(),
+                'services': services,
+                'counters': {name: dict(values) for name, values in self.counters.items()},
+                'histograms': {name: {label: histogram.snapshot() for label, histogram in values.items()}
+                               for name, values in self.histograms.items()},
+                'gauges': self._read_gauges()}
+
+    def busiest(self, n = 10):
+        # (service, symbol, messages/sec) sorted by rate, to find what saturates the stream
+        rates = [(key[1], key[2], rate) for key, rate in self.rates.items() if key[0] == 'symbol']
+        return sorted(rates, key=lambda item: item[2], reverse=True)[:n]
+
+    '''****************************************
+    ************* Prometheus ******************
+    ****************************************'''
+
+    @staticmethod
+    def _labels(**labels):
+        items = ['{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+                 for name, value in labels.items() if value not in (None, '')]
+        return '{' + ','.join(items) + '}' if items else ''
+
+    def _histogram_lines(self, name, histogram, **labels):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{self._labels(**labels, le=bound)} {cumulative}')
+        lines.append(f'{name}_bucket{self._labels(**labels, le="+Inf")} {histogram.count}')
+        lines.append(f'{name}_sum{self._labels(**labels)} {histogram.sum}')
+        lines.append(f'{name}_count{self._labels(**labels)} {histogram.count}')
+        return lines
+
+    def prometheus(self):
+        '''
+            Returns the metrics in the Prometheus text exposition format.
+        '''
+
+        self._refresh()
+        rates = self.rates
+        services = list(self.services.items())
+        lines = ['# TYPE td_frames_total counter', f'td_frames_total {self.frames}',
+                 '# TYPE td_bytes_total counter', f'td_bytes_total {self.bytes}',
+                 '# TYPE td_frames_per_second gauge', f'td_frames_per_second {rates.get(("frames",), 0.0)}',
+                 '# TYPE td_bytes_per_second gauge', f'td_bytes_per_second {rates.get(("bytes",), 0.0)}',
+                 '# TYPE td_decode_seconds histogram']
+        lines += self._histogram_lines('td_decode_seconds', self.decode)
+
+        lines.append('# TYPE td_service_messages_total counter')
+        lines += [f'td_service_messages_total{self._labels(service=service)} {metrics["messages"]}' for service, metrics in services]
+        lines.append('# TYPE td_service_messages_per_second gauge')
+        lines += [f'td_service_messages_per_second{self._labels(service=service)} {rates.get(("service", service), 0.0)}'
+                  for service, _ in services]
+
+        lines.append('# TYPE td_symbol_messages_total counter')
+        lines += [f'td_symbol_messages_total{self._labels(service=service, symbol=symbol)} {count}'
+                  for service, metrics in services for symbol, count in list(metrics['symbols'].items())]
+        lines.append('# TYPE td_symbol_messages_per_second gauge')
+        lines += [f'td_symbol_messages_per_second{self._labels(service=service, symbol=symbol)} {rates.get(("symbol", service, symbol), 0.0)}'
+                  for service, metrics in services for symbol in list(metrics['symbols'])]
+
+        lines.append('# HELP td_latency_seconds Local receive time minus the server timestamp of the message')
+        lines.append('# TYPE td_latency_seconds histogram')
+        for service, metrics in services:
+            lines += self._histogram_lines('td_latency_seconds', metrics['latency'], service=service)
+        lines.append('# TYPE td_segregation_seconds histogram')
+        for service, metrics in services:
+            lines += self._histogram_lines('td_segregation_seconds', metrics['segregation'], service=service)
+
+        for name, values in list(self.counters.items()):
+            lines.append(f'# TYPE td_{name}_total counter')
+            lines += [f'td_{name}_total{self._labels(label=label)} {value}' for label, value in list(values.items())]
+
+        for name, values in list(self.histograms.items()):
+            lines.append(f'# TYPE td_{name} histogram')
+            for label, histogram in list(values.items()):
+                lines += self._histogram_lines(f'td_{name}', histogram, label=label)
+
+        gauges = self._read_gauges()
+        for name, (_, label, help) in list(self._gauges.items()):
+            value = gauges.get(name)
+            if value is None:
+                continue
+            if help:
+                lines.append(f'# HELP td_{name} {help}')
+            lines.append(f'# TYPE td_{name} gauge')
+            if isinstance(value, dict):
+                lines += [f'td_{name}{self._labels(**{label or "label": key})} {item}' for key, item in value.items()]
+            else:
+                lines.append(f'td_{name} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+    '''****************************************
+    ************* HTTP endpoint ***************
+    ****************************************'''
+
+    def serve(self, port = 9108, host = '127.0.0.1'):
+        '''
+            Starts the HTTP endpoint in a daemon thread: /metrics (Prometheus) and /metrics.json.
+        '''
+
+        if self._server is not None:
+            return self._server
+
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.startswith('/metrics.json'):
+                    body = json.dumps(metrics.snapshot(), default=str).encode()
+                    content_type = 'application/json'
+                elif self.path.startswith('/metrics'):
+                    body = metrics.prometheus().encode()
+                    content_type = 'text/plain; version=0.0.4'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        Thread(name='metrics_http_thread', target=self._server.serve_forever, daemon = True).start()
+        print("Metrics served at:".ljust(50) + 'http://{}:{}/metrics'.format(host, self._server.server_address[1]))
+        return self._server
+
+    def stop_serving(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:41:27 2026
+
+@author: LC
+"""
+
+import os
+import gzip
+import json
+import time
+import shutil
+import tempfile
+
+from TDStream import TDStreamerClient
+from TDFields import FIELDS, BOOKS
+from TDJournal import TDReplay, read_journal
+from TDMockServer import synthetic_frames
+
+
+# Mock server fixtures replayed through the receive path, no login nor socket involved.
+# Spills and journals are written under a temporary folder, removed at the end.
+
+here = os.getcwd()
+folder = tempfile.mkdtemp()
+os.chdir(folder)
+
+KEYS = ['SYM{:02d}'.format(n) for n in range(10)]
+DTYPES = {'q': 'int64', 'd': 'float64', 'S': 'int32', 'O': 'object'}
+
+
+def contents(frames):
+    return [(data['service'], data['timestamp'], content) for frame in frames for data in json.loads(frame)['data'] for content in data['content']]
+
+
+def same_rows(a, b):
+    # Row by row equality, NaN (fields never received) equal to NaN
+    a, b = list(map(tuple, a)), list(map(tuple, b))
+    return len(a) == len(b) and all(x == y or (x != x and y != y) for row_a, row_b in zip(a, b) for x, y in zip(row_a, row_b))
+
+
+def wait_idle(streamer, timeout = 10):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if all(stats['queued'] == 0 for stats in streamer.observer_stats().values()):
+            return
+        time.sleep(0.01)
+    raise AssertionError(f'observers still busy: {streamer.observer_stats()}')
+
+
+# Every service is stored by its parser, one row per content (book level events aside), in the column types of its schema
+
+TDS = TDStreamerClient(None, cache_data = False)
+for service in FIELDS:
+    frames = synthetic_frames(service, KEYS, 20)
+    for frame in frames:
+        TDS._websocket_on_message(frame)
+    store = TDS.subscriptions[service]['data']
+    expected = len(contents(frames))
+    if service in BOOKS:
+        assert len(store) > 0, service
+    else:
+        assert len(store) == expected, (service, len(store), expected)
+    if hasattr(store, 'columns'):
+        arrays = store.to_numpy()
+        for name, kind in store.columns:
+            assert str(arrays[name].dtype) == DTYPES[kind], (service, name, arrays[name].dtype, kind)
+    print(service.ljust(20) + f'{len(store)} rows')
+
+# Values land in their columns: the first TIMESALE_EQUITY row is the first trade of the fixtures
+_, timestamp, content = contents(synthetic_frames('TIMESALE_EQUITY', KEYS, 1))[0]
+row = next(iter(TDS.read_data('TIMESALE_EQUITY', 0, 1)))
+assert tuple(row)[1:] == (content['key'], content['seq'], content['2'], content['3'], content['4'], timestamp), row
+assert TDS.subscriptions['TIMESALE_EQUITY']['data'].to_numpy()['DateTime'][0] == content['1']
+print('TIMESALE_EQUITY'.ljust(20) + 'first row ' + str(tuple(row)))
+
+
+# Observers under each policy, slower than the frames they are handed
+
+TDS = TDStreamerClient(None, cache_data = False)
+calls = {}
+latest = {}
+
+def observer(policy):
+    def callback(message = None):
+        time.sleep(0.001)
+        calls[policy] = calls.get(policy, 0) + 1
+    return callback
+
+def on_quotes(records):
+    time.sleep(0.001)
+    for record in records:
+        latest[record['key']] = record
+
+for policy in ('block', 'drop_oldest', 'conflate'):
+    TDS.bind_to(observer(policy), queue_size = 5, policy = policy, name = policy)
+TDS.bind_to(on_quotes, queue_size = 5, policy = 'symbols', services = 'QUOTE', name = 'symbols')
+
+frames = synthetic_frames('QUOTE', KEYS, 200)
+for frame in frames:
+    TDS._websocket_on_message(frame)
+wait_idle(TDS)
+
+stats = TDS.observer_stats()
+assert calls['block'] == len(frames), calls
+for policy in ('drop_oldest', 'conflate'):
+    assert 0 < calls[policy] <= len(frames), (policy, calls)
+    assert stats[policy]['delivered'] + stats[policy]['dropped'] + stats[policy]['conflated'] == len(frames), stats[policy]
+# The symbols policy ends on the latest quote of every symbol
+assert set(latest) == set(KEYS), latest.keys()
+for key, record in latest.items():
+    assert record['Bid Price'] == TDS.quotes.get(key, 'Bid Price'), (key, record)
+for policy in ('block', 'drop_oldest', 'conflate', 'symbols'):
+    print(policy.ljust(20) + f"{stats[policy]['delivered']} delivered, {stats[policy]['dropped']} dropped, {stats[policy]['conflated']} conflated")
+
+
+# Retention evicts to the spill files, read_data still returns every row in order
+
+frames = synthetic_frames('TIMESALE_EQUITY', KEYS, 2000)
+
+reference = TDStreamerClient(None, cache_data = False)
+for frame in frames:
+    reference._websocket_on_message(frame)
+
+TDS = TDStreamerClient(None, cache_data = False)
+TDS.retention.spill = True
+TDS.set_retention('TIMESALE_EQUITY', max_count = 5000)
+for frame in frames:
+    TDS._websocket_on_message(frame)
+
+store = TDS.subscriptions['TIMESALE_EQUITY']['data']
+assert store.offset > 0, 'nothing was evicted'
+assert len(store) - store.offset < len(reference.subscriptions['TIMESALE_EQUITY']['data']), (len(store), store.offset)
+rows = [tuple(row) for row in TDS.read_data('TIMESALE_EQUITY', 0)]
+assert same_rows(rows, reference.read_data('TIMESALE_EQUITY', 0)), 'rows differ across the spills'
+tail = [tuple(row) for row in TDS.read_data('TIMESALE_EQUITY', store.offset - 10, store.offset + 10)]
+assert tail == rows[store.offset - 10:store.offset + 10], 'rows differ at the spill boundary'
+print('retention'.ljust(20) + f'{store.offset} rows spilled, {len(rows)} read back')
+
+
+# Journal round trip: the frames come back untouched, a replay stores the same rows, a cut journal ends at its last whole record
+
+frames = [frame for service in ('QUOTE', 'TIMESALE_EQUITY', 'CHART_EQUITY', 'NASDAQ_BOOK') for frame in synthetic_frames(service, KEYS, 50)]
+
+TDS = TDStreamerClient(None, cache_data = False)
+TDS.start_journal('./Journal')
+path = TDS.journal.path
+for frame in frames:
+    TDS._websocket_on_message(frame)
+TDS.stop_journal()
+
+assert [message for _, message in read_journal(path)] == frames, 'journal does not hold the frames received'
+
+replayed = TDStreamerClient(None, cache_data = False)
+TDReplay(replayed, path, speed = 0).run()
+for service in ('QUOTE', 'TIMESALE_EQUITY', 'CHART_EQUITY', 'NASDAQ_BOOK'):
+    assert same_rows(replayed.read_data(service, 0), TDS.read_data(service, 0)), service
+print('journal'.ljust(20) + f'{len(frames)} frames replayed')
+
+with open(path, 'rb') as f:
+    raw = f.read()
+truncated = os.path.join(folder, 'truncated.tdj.gz')
+
+# Compressed stream cut by a crash: the gzip trailer only (no record lost), then half of the file
+for cut in (len(raw) - 5, len(raw) // 2):
+    with open(truncated, 'wb') as f:
+        f.write(raw[:cut])
+    messages = [message for _, message in read_journal(truncated)]
+    assert messages == frames[:len(messages)], cut
+    if cut == len(raw) - 5:
+        assert len(messages) == len(frames), len(messages)
+    else:
+        assert 0 < len(messages) < len(frames), len(messages)
+    print('truncated journal'.ljust(20) + f'{len(messages)} of {len(frames)} frames at {cut} bytes')
+
+# Last record cut in the middle of its payload
+with gzip.open(path, 'rb') as f:
+    records = f.read()
+with gzip.open(truncated, 'wb') as f:
+    f.write(records[:len(records) - len(frames[-1]) // 2])
+messages = [message for _, message in read_journal(truncated)]
+assert messages == frames[:-1], len(messages)
+print('truncated record'.ljust(20) + f'{len(messages)} of {len(frames)} frames')
+
+os.chdir(here)
+shutil.rmtree(folder, ignore_errors = True)
@@ -0,0 +1,539 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 14:22:30 2026
+
+@author: LC
+"""
+
+import json
+import time
+import base64
+import random
+import socket
+import struct
+import hashlib
+import argparse
+from threading import Thread, Lock
+
+from TDFields import FIELDS, SEQUENCED, BOOKS
+
+
+MOCK_CREDENTIALS = {"userid": "MOCK0001",
+                    "token": "mocktoken",
+                    "company": "AMER",
+                    "segment": "AMER",
+                    "cddomain": "A000000000000000",
+                    "usergroup": "ACCT",
+                    "accesslevel": "ACCT",
+                    "authorized": "Y",
+                    "timestamp": 0,
+                    "appid": "MOCK",
+                    "acl": "AKBPDTESFRTHTLTOTVQSRFSDSPSPMM"}
+
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class _Connection():
+    '''
+        Minimal server side websocket (RFC 6455): handshake, text frames, ping/pong and close.
+    '''
+
+    def __init__(self, sock):
+        self.sock = sock
+        self._send_lock = Lock()
+        self.closed = False
+
+    def handshake(self):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                return False
+            request += chunk
+
+        key = None
+        for line in request.decode('latin-1').split('\r\n'):
+            if line.lower().startswith('sec-websocket-key:'):
+                key = line.split(':', 1)[1].strip()
+        if key is None:
+            return False
+
+        accept = base64.b64encode(hashlib.sha1((key + GUID).encode()).digest()).decode()
+        self.sock.sendall(('HTTP/1.1 101 Switching Protocols\r\n'
+                           'Upgrade: websocket\r\n'
+                           'Connection: Upgrade\r\n'
+                           f'Sec-WebSocket-Accept: {accept}\r\n\r\n').encode())
+        return True
+
+    def _recv_exact(self, n):
+        data = b''
+        while len(data) < n:
+            chunk = self.sock.recv(n - len(data))
+            if not chunk:
+                raise ConnectionError('Client closed the connection')
+            data += chunk
+        return data
+
+    def recv(self):
+        # Returns the next text message, None when the connection is closed
+        message = b''
+        while True:
+            first, second = self._recv_exact(2)
+            opcode = first & 0x0F
+            length = second & 0x7F
+            if length == 126:
+                length, = struct.unpack('>H', self._recv_exact(2))
+            elif length == 127:
+                length, = struct.unpack('>Q', self._recv_exact(8))
+            mask = self._recv_exact(4) if second & 0x80 else None
+            payload = self._recv_exact(length)
+            if mask:
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+
+            if opcode == 0x8:
+                self.close()
+                return None
+            if opcode == 0x9:
+                self._send_frame(0xA, payload)
+                continue
+            if opcode in (0x0, 0x1, 0x2):
+                message += payload
+                if first & 0x80:
+                    return message.decode('utf-8')
+
+    def _send_frame(self, opcode, payload):
+        header = bytes([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header += bytes([length])
+        elif length < 65536:
+            header += bytes([126]) + struct.pack('>H', length)
+        else:
+            header += bytes([127]) + struct.pack('>Q', length)
+        with self._send_lock:
+            self.sock.sendall(header + payload)
+
+    def send(self, message):
+        if not self.closed:
+            self._send_frame(0x1, message.encode('utf-8'))
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                self._send_frame(0x8, b'')
+            except OSError:
+                pass
+            self.sock.close()
+
+
+class _Generator():
+    '''
+        Synthetic content for every streaming service, following TDFields.FIELDS.
+        Level one services send every field on the first update of a key and only a few
+        changed fields afterwards, like the real streamer.
+    '''
+
+    def __init__(self, seed = None):
+        self.random = random.Random(seed)
+        self.price = {}
+        self.volume = {}
+        self.seq = {}
+        self.sent_full = set()
+
+    def _walk(self, key):
+        price = self.price.get(key) or self.random.uniform(20, 400)
+        price = round(max(0.01, price + self.random.gauss(0, price * 0.0005)), 2)
+        self.price[key] = price
+        return price
+
+    def _next_seq(self, service, key):
+        seq = self.seq.get((service, key), -1) + 1
+        self.seq[(service, key)] = seq
+        return seq
+
+    def _value(self, key, name, kind, price, now):
+        if 'Volume' in name:
+            self.volume[key] = self.volume.get(key, 0) + self.random.randint(1, 50) * 100
+            return self.volume[key]
+        if 'Size' in name:
+            return self.random.randint(1, 50) * 100
+        if kind == 'double':
+            if 'Price' in name or name in ('Mark', 'Tick', '52 Week High', '52 Week Low'):
+                return price
+            return round(self.random.uniform(-1, 1), 4)
+        if kind == 'long':
+            if 'Time' in name or 'Date' in name:
+                return now
+            return self.random.randint(1, 50) * 100
+        if kind == 'int':
+            return self.random.randint(0, 30)
+        if kind == 'boolean':
+            return True
+        if kind == 'char':
+            return self.random.choice('QNPZ')
+        return f'{key} {name}'
+
+    def _book_side(self, price, step, now):
+        levels = []
+        for level in range(self.random.randint(1, 5)):
+            orders = [{"0": self.random.choice(('NSDQ', 'ARCX', 'BATS', 'EDGX')),
+                       "1": self.random.randint(1, 20) * 100,
+                       "2": now - self.random.randint(0, 5000)} for _ in range(self.random.randint(1, 3))]
+            levels.append({"0": round(price + step * (level + 1), 2),
+                           "1": sum(order["1"] for order in orders),
+                           "2": len(orders),
+                           "3": orders})
+        return levels
+
+    def content(self, service, key, fields, now):
+
+        price = self._walk(key)
+        content = {"key": key}
+
+        if service in SEQUENCED:
+            content["seq"] = self._next_seq(service, key)
+
+        if service in BOOKS:
+            content["1"] = now
+            content["2"] = self._book_side(price, -0.01, now)
+            content["3"] = self._book_side(price, 0.01, now)
+            return content
+
+        if service == 'ACCT_ACTIVITY':
+            content.update({"1": "MOCK0001", "2": "OrderEntryRequest",
+                            "3": "<OrderEntryRequestMessage><Order><OrderKey>{}</OrderKey></Order></OrderEntryRequestMessage>".format(content["seq"])})
+            return content
+
+        if service.startswith('ACTIVES'):
+            content["1"] = "{};0;{};1;{}".format(self.random.randint(0, 10 ** 6), now, key)
+            return content
+
+        if service.startswith('TIMESALE'):
+            content.update({"1": now, "2": price, "3": float(self.random.randint(1, 20) * 100), "4": self.random.randint(0, 10 ** 6)})
+            return content
+
+        if service == 'CHART_EQUITY':
+            content.update({"1": price, "2": price + 0.05, "3": price - 0.05, "4": price,
+                            "5": float(self.random.randint(1, 500) * 100), "6": now // 60000, "7": now // 60000 * 60000, "8": now // 86400000})
+            return content
+
+        if service in ('CHART_FUTURES', 'CHART_OPTIONS'):
+            content.update({"1": now // 60000 * 60000, "2": price, "3": price + 0.05, "4": price - 0.05, "5": price,
+                            "6": float(self.random.randint(1, 500) * 100)})
+            return content
+
+        # Level one (QUOTE, OPTION, LEVELONE_*) and NEWS_HEADLINE
+        table = FIELDS[service]
+        ids = [i for i in fields if i in table]
+        if (service, key) in self.sent_full:
+            prices = [i for i in ids if 'Price' in table[i][0] or table[i][0] == 'Mark']
+            others = [i for i in ids if i not in prices]
+            ids = prices[:3] + self.random.sample(others, min(len(others), self.random.randint(0, 3)))
+        else:
+            self.sent_full.add((service, key))
+
+        for i in ids:
+            name, kind = table[i]
+            content[str(i)] = self._value(key, name, kind, price, now)
+        return content
+
+
+def _data_frame(service, timestamp, content):
+    return json.dumps({"data": [{"service": service,
+                                 "timestamp": timestamp,
+                                 "command": "SUBS",
+                                 "content": content}]})
+
+
+def synthetic_frames(service, keys, count, batch = 10, fields = None, seed = 0, start = 1600000000000, step = 10):
+    '''
+        Returns count data frames (JSON strings) of service as the server would send them.
+        The seed and the clock (start epoch ms, step ms between frames) are fixed, so the
+        frames are the same on every run.
+    '''
+
+    generator = _Generator(seed)
+    fields = fields or sorted(FIELDS[service])
+    frames = []
+    for n in range(count):
+        now = start + n * step
+        chosen = [keys[(n * batch + i) % len(keys)] for i in range(min(batch, len(keys)))]
+        frames.append(_data_frame(service, now, [generator.content(service, key, fields, now) for key in chosen]))
+    return frames
+
+
+class TDMockServer():
+    '''
+        Local websocket server speaking the TD Ameritrade streamer protocol, for tests and benchmarks.
+
+        Answers LOGIN, LOGOUT, QOS, SUBS, ADD, UNSUBS and GET requests, sends heartbeats and generates
+        synthetic data frames for every subscribed service of the TDStreamerClient docstring table.
+
+        NAME: rate
+        DESC: Data frames per second per connection, 0 = as fast as possible.
+        TYPE: Float
+
+        NAME: batch
+        DESC: Symbols per data frame (entries in content).
+        TYPE: Int
+
+        NAME: heartbeat
+        DESC: Seconds between heartbeats.
+        TYPE: Float
+
+        EXAMPLES:
+        server = TDMockServer(rate = 5000)
+        server.start()
+        TDS = TDStreamerClient(None, cache_data = False)
+        server.attach(TDS)
+        TDS.connect()
+        TDS.data_request_timesale_equity(keys = 'SPY, AAPL')
+    '''
+
+    def __init__(self, host = '127.0.0.1', port = 0, rate = 100, batch = 10, heartbeat = 10, seed = None):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.batch = batch
+        self.heartbeat = heartbeat
+        self.seed = seed
+        self.frames_sent = 0
+        self._connections = []
+        self._running = False
+
+    def __repr__(self):
+        return '<TD Mock Streamer {} - Frames sent = {}>'.format(self.uri, self.frames_sent)
+
+    @property
+    def uri(self):
+        return f'ws://{self.host}:{self.port}/ws'
+
+    def start(self):
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((self.host, self.port))
+        self._server.listen()
+        self.port = self._server.getsockname()[1]
+        self._running = True
+        Thread(name='mock_server_thread', target=self._accept, daemon = True).start()
+        print("TD Mock Streamer listening at:".ljust(50) + self.uri)
+
+    def stop(self):
+        self._running = False
+        for connection in self._connections:
+            connection.close()
+        self._server.close()
+
+    def attach(self, streamer):
+        # Points a TDStreamerClient at this server, no TDAPI needed
+        streamer.uri = self.uri
+        streamer.credentials = dict(MOCK_CREDENTIALS)
+        streamer.streamerSubscriptionKey = 'MOCKKEY'
+
+    def drop_connections(self):
+        # Closes every client socket, to exercise reconnection
+        for connection in list(self._connections):
+            connection.close()
+
+    def _accept(self):
+        while self._running:
+            try:
+                sock, _ = self._server.accept()
+            except OSError:
+                return
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            Thread(name='mock_client_thread', target=self._serve, args=(sock,), daemon = True).start()
+
+    def _serve(self, sock):
+
+        connection = _Connection(sock)
+        if not connection.handshake():
+            sock.close()
+            return
+        self._connections.append(connection)
+
+        state = {'subscriptions': {}, 'logged': False}
+        try:
+            while not connection.closed:
+                message = connection.recv()
+                if message is None:
+                    break
+                for request in json.loads(message)['requests']:
+                    self._handle(connection, state, request)
+        except (ConnectionError, OSError, ValueError):
+            pass
+        finally:
+            connection.close()
+            if connection in self._connections:
+                self._connections.remove(connection)
+
+    def _respond(self, connection, request, msg, code = 0):
+        connection.send(json.dumps({"response": [{"service": request['service'],
+                                                  "requestid": request.get('requestid'),
+                                                  "command": request['command'],
+                                                  "timestamp": _now_ms(),
+                                                  "content": {"code": code, "msg": msg}}]}))
+
+    def _handle(self, connection, state, request):
+
+        command = request['command']
+        service = request['service']
+        parameters = request.get('parameters', {})
+
+        if command == 'LOGIN':
+            state['logged'] = True
+            self._respond(connection, request, '29-3')
+            Thread(name='mock_generator_thread', target=self._generate, args=(connection, state), daemon = True).start()
+
+        elif command == 'LOGOUT':
+            self._respond(connection, request, 'SUCCESS')
+            connection.close()
+
+        elif command == 'QOS':
+            self._respond(connection, request, 'QoS command succeeded. Set qoslevel={}'.format(parameters.get('qoslevel')))
+
+        elif command in ('SUBS', 'ADD', 'UNSUBS'):
+            keys = [key.strip() for key in str(parameters.get('keys', '')).split(',') if key.strip()]
+            fields = [int(field) for field in str(parameters.get('fields', '')).split(',') if field.strip().isdigit()]
+            subscriptions = state['subscriptions']
+
+            if command == 'UNSUBS':
+                if service in subscriptions:
+                    subscriptions[service]['keys'] = [key for key in subscriptions[service]['keys'] if key not in keys]
+                    if not subscriptions[service]['keys']:
+                        subscriptions.pop(service)
+            else:
+                if command == 'SUBS' or service not in subscriptions:
+                    subscriptions[service] = {'keys': [], 'fields': fields}
+                subscriptions[service]['keys'].extend(key for key in keys if key not in subscriptions[service]['keys'])
+                subscriptions[service]['fields'] = fields
+
+            self._respond(connection, request, '{} command succeeded'.format(command))
+
+        elif command == 'GET':
+            keys = parameters.get('keys') or parameters.get('symbol') or ''
+            connection.send(json.dumps({"snapshot": [{"service": service,
+                                                      "timestamp": _now_ms(),
+                                                      "command": "GET",
+                                                      "content": [{"key": key.strip(), "1": 0} for key in keys.split(',')]}]}))
+
+    def _generate(self, connection, state):
+
+        generator = _Generator(self.seed)
+        interval = 1 / self.rate if self.rate else 0
+        next_frame = time.perf_counter()
+        next_heartbeat = time.monotonic() + self.heartbeat
+        cursor = {}
+
+        while self._running and not connection.closed:
+
+            if time.monotonic() >= next_heartbeat:
+                connection.send(json.dumps({"notify": [{"heartbeat": str(_now_ms())}]}))
+                next_heartbeat += self.heartbeat
+
+            subscriptions = [(service, sub) for service, sub in list(state['subscriptions'].items()) if sub['keys']]
+            if not subscriptions:
+                time.sleep(0.01)
+                next_frame = time.perf_counter()
+                continue
+
+            # Round robin over services, each frame carries up to batch keys of one service
+            service, sub = subscriptions[self.frames_sent % len(subscriptions)]
+            keys = sub['keys']
+            start = cursor.get(service, 0)
+            chosen = [keys[(start + n) % len(keys)] for n in range(min(self.batch, len(keys)))]
+            cursor[service] = (start + len(chosen)) % len(keys)
+
+            now = _now_ms()
+            frame = _data_frame(service, now, [generator.content(service, key, sub['fields'], now) for key in chosen])
+            try:
+                connection.send(frame)
+            except OSError:
+                return
+            self.frames_sent += 1
+
+            if interval:
+                next_frame += interval
+                wait = next_frame - time.perf_counter()
+                if wait > 0:
+                    time.sleep(wait)
+
+
+def run_load_test(rate = 1000, symbols = 20, services = ('TIMESALE_EQUITY', 'QUOTE'), duration = 10, batch = 10):
+    '''
+        Starts a TDMockServer, connects a TDStreamerClient to it, subscribes synthetic symbols
+        (SYM0000, SYM0001, ...) and reports throughput and tick to callback latency.
+        Latency is measured from the server frame timestamp to the observer call.
+    '''
+
+    from TDStream import TDStreamerClient
+
+    server = TDMockServer(rate = rate, batch = batch)
+    server.start()
+
+    TDS = TDStreamerClient(None, cache_data = False)
+    server.attach(TDS)
+
+    latencies = []
+    def on_data(message = None):
+        if TDS.last_message_time:
+            latencies.append(time.time() * 1000 - TDS.last_message_time)
+    TDS.bind_to(on_data)
+
+    TDS.connect()
+    keys = ', '.join('SYM{:04d}'.format(n) for n in range(symbols))
+    for service in services:
+        if service == 'ACCT_ACTIVITY':
+            TDS.data_request_account_activity()
+        else:
+            getattr(TDS, 'data_request_' + service.lower())(keys = keys)
+
+    time.sleep(1)   # warm up
+    sent, received, started = server.frames_sent, TDS.messages_received, time.perf_counter()
+    latencies.clear()
+    time.sleep(duration)
+    elapsed = time.perf_counter() - started
+    sent, received = server.frames_sent - sent, TDS.messages_received - received
+
+    TDS.logout_request()
+    server.stop()
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p / 100 * len(latencies)))] if latencies else None
+
+    return {'sent_sec': sent / elapsed,
+            'received_sec': received / elapsed,
+            'backlog': sent - received,
+            'latency_ms_p50': percentile(50),
+            'latency_ms_p99': percentile(99),
+            'latency_ms_max': latencies[-1] if latencies else None,
+            'observer': TDS.observer_stats()}
+
+
+if __name__ == '__main__':
+
+    # Load test on a laptop, ie. python TDMockServer.py --rate 0 --symbols 50 --services TIMESALE_EQUITY NASDAQ_BOOK
+    parser = argparse.ArgumentParser(description='TD streamer mock server and load generator')
+    parser.add_argument('--rate', type=float, default=1000, help='data frames per second, 0 = as fast as possible')
+    parser.add_argument('--symbols', type=int, default=20)
+    parser.add_argument('--batch', type=int, default=10, help='symbols per data frame')
+    parser.add_argument('--services', nargs='+', default=['TIMESALE_EQUITY', 'QUOTE'])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--serve', action='store_true', help='only run the server until interrupted')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.serve:
+        server = TDMockServer(port = args.port, rate = args.rate, batch = args.batch)
+        server.start()
+        while True:
+            time.sleep(1)
+    else:
+        print(run_load_test(rate = args.rate, symbols = args.symbols, services = args.services,
+                            duration = args.duration, batch = args.batch))
@@ -0,0 +1,188 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:31:27 2026
+
+@author: LC
+"""
+
+from bisect import bisect_left
+from itertools import accumulate
+from threading import Lock
+
+
+class _Side():
+    '''
+        One side of a book, levels sorted best first. Immutable once built, so readers can keep
+        using a side while the next snapshot is applied.
+    '''
+
+    __slots__ = ('prices', 'sizes', 'orders', 'cumulative', 'levels', '_keys', '_index')
+
+    def __init__(self, levels, descending):
+        # levels: raw message levels {'0': price, '1': size, '2': number of orders, '3': [orders]}
+        levels = sorted(levels, key=lambda level: level['0'], reverse=descending)
+        self.levels = levels
+        self.prices = [level['0'] for level in levels]
+        self.sizes = [level['1'] for level in levels]
+        self.orders = [level['2'] for level in levels]
+        self.cumulative = list(accumulate(self.sizes))
+        # Ascending keys for bisect, bids are negated
+        self._keys = [-price for price in self.prices] if descending else self.prices
+        self._index = {price: n for n, price in enumerate(self.prices)}
+
+    def find(self, price, descending):
+        n = bisect_left(self._keys, -price if descending else price)
+        return n if n < len(self.prices) and self.prices[n] == price else None
+
+
+_EMPTY = _Side((), False)
+
+
+class OrderBook():
+    '''
+        Price level state of one symbol for NASDAQ_BOOK, LISTED_BOOK or OPTIONS_BOOK.
+
+        Book messages carry the whole book of the symbol, apply() swaps both sides at once and
+        returns the levels that changed. Queries read the current state:
+            top, spread, mid                O(1)
+            depth(n), cumulative(side, n)   O(1) (plus the n levels returned)
+            imbalance(n)                    O(1)
+            size_at(side, price)            O(log n)
+    '''
+
+    def __init__(self, service, symbol):
+        self.service = service
+        self.symbol = symbol
+        self.time = None        # book time of the last snapshot, epoch ms
+        self.updates = 0
+        self._state = (_EMPTY, _EMPTY)
+
+    def __repr__(self):
+        return '<TD OrderBook {} {} - Top = {}>'.format(self.service, self.symbol, self.top())
+
+    def _side(self, side):
+        bid, ask = self._state
+        return bid if side == 'Bid' else ask
+
+    def apply(self, time, bids, asks):
+        '''
+            Replaces the book with a new snapshot. Returns the level events
+            [(side, price, size, number of orders)], size 0 meaning the level is gone.
+        '''
+
+        old_bid, old_ask = self._state
+        bid, ask = _Side(bids, True), _Side(asks, False)
+        self._state = (bid, ask)
+        self.time = time
+        self.updates += 1
+
+        events = []
+        for name, old, new in (('Bid', old_bid, bid), ('Ask', old_ask, ask)):
+            previous = old._index
+            for price, size, orders in zip(new.prices, new.sizes, new.orders):
+                n = previous.get(price)
+                if n is None or old.sizes[n] != size or old.orders[n] != orders:
+                    events.append((name, price, size, orders))
+            current = new._index
+            for price in old.prices:
+                if price not in current:
+                    events.append((name, price, 0, 0))
+        return events
+
+    '''****************************************
+    ************* Queries *********************
+    ****************************************'''
+
+    def top(self):
+        # (bid, bid size, ask, ask size), None for an empty side
+        bid, ask = self._state
+        return (bid.prices[0] if bid.prices else None, bid.sizes[0] if bid.sizes else None,
+                ask.prices[0] if ask.prices else None, ask.sizes[0] if ask.sizes else None)
+
+    def spread(self):
+        bid, ask = self._state
+        if bid.prices and ask.prices:
+            return ask.prices[0] - bid.prices[0]
+        return None
+
+    def mid(self):
+        bid, ask = self._state
+        if bid.prices and ask.prices:
+            return (ask.prices[0] + bid.prices[0]) / 2
+        return None
+
+    def depth(self, n = 5):
+        '''
+            Returns {'Bid': [(price, size, orders)], 'Ask': [...]} for the n best levels of each side.
+        '''
+        bid, ask = self._state
+        return {'Bid': list(zip(bid.prices[:n], bid.sizes[:n], bid.orders[:n])),
+                'Ask': list(zip(ask.prices[:n], ask.sizes[:n], ask.orders[:n]))}
+
+    def levels(self, side):
+        return len(self._side(side).prices)
+
+    def cumulative(self, side, n = None):
+        # Size from the best level through level n (all levels when None)
+        cumulative = self._side(side).cumulative
+        if not cumulative:
+            return 0
+        if n is None or n >= len(cumulative):
+            return cumulative[-1]
+        return cumulative[n - 1] if n > 0 else 0
+
+    def imbalance(self, n = 1):
+        # (bid size - ask size) / (bid size + ask size) over the n best levels, from -1 (asks) to 1 (bids)
+        bid_size, ask_size = self.cumulative('Bid', n), self.cumulative('Ask', n)
+        total = bid_size + ask_size
+        return (bid_size - ask_size) / total if total else None
+
+    def size_at(self, side, price):
+        side_state = self._side(side)
+        n = side_state.find(price, side == 'Bid')
+        return side_state.sizes[n] if n is not None else 0
+
+    def orders(self, side, level = 0):
+        # [(router, size, time)] of one level of the last snapshot
+        levels = self._side(side).levels
+        if level >= len(levels):
+            return []
+        return [(order['0'], order['1'], order['2']) for order in levels[level].get('3', ())]
+
+
+class TDBookEngine():
+    '''
+        Order books of every symbol of the book services, fed by the book parsers (TDParsers).
+
+        EXAMPLES:
+        book = SessionObject.books.book('AAPL')               # NASDAQ_BOOK by default
+        book.top(), book.depth(10), book.imbalance(5)
+        SessionObject.books.book('SPY', 'LISTED_BOOK').cumulative('Ask', 3)
+    '''
+
+    def __init__(self):
+        self.books = {}     # (service, symbol) -> OrderBook
+        self._lock = Lock()
+
+    def __repr__(self):
+        return '<TD BookEngine - Books = {}>'.format(len(self.books))
+
+    def book(self, symbol, service = 'NASDAQ_BOOK'):
+        '''
+            Returns the OrderBook of symbol, None if no snapshot was received yet.
+        '''
+        return self.books.get((service, symbol))
+
+    def symbols(self, service = None):
+        return [symbol for (book_service, symbol) in list(self.books) if service is None or book_service == service]
+
+    def apply(self, service, symbol, time, bids, asks):
+        book = self.books.get((service, symbol))
+        if book is None:
+            with self._lock:
+                book = self.books.setdefault((service, symbol), OrderBook(service, symbol))
+        return book.apply(time, bids, asks)
+
+    def top(self, service = 'NASDAQ_BOOK'):
+        # {symbol: (bid, bid size, ask, ask size)} for every book of service
+        return {symbol: book.top() for (book_service, symbol), book in list(self.books.items()) if book_service == service}
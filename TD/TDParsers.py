@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 17:20:04 2026
+
+@author: LC
+"""
+
+import xmltodict
+
+from TDFields import FIELDS, SEQUENCED, BOOKS, TEXT
+from TDTickStore import SCHEMAS
+from TDOrderBook import TDBookEngine
+
+
+# TDFields type -> TickStore column kind
+KINDS = {'double': 'd', 'long': 'q', 'int': 'q', 'boolean': 'q', 'char': 'S', 'String': 'S'}
+
+# Level one services only send the fields that changed since the previous message of a key.
+# Their rows carry a 'Fields' bitmask (bit n set = field n was sent), the fields not sent read
+# as NaN for doubles, 0 for integers and '' for strings (sparse TickStore).
+DELTAS = ('QUOTE', 'OPTION', 'LEVELONE_FUTURES', 'LEVELONE_FOREX')
+
+NAN = float('nan')
+
+
+def schema(service):
+    '''
+        Returns the TickStore columns of service, None for the services kept as records (ACCT_ACTIVITY).
+
+        TIMESALE_EQUITY and CHART_EQUITY keep their historical CSV layout, the books store level
+        events (TDTickStore.SCHEMAS).
+        Every other service is laid out field by field:
+            Timestamp, Ticker, [Sequence], [Fields], one column per field in id order
+        Free text fields (TDFields.TEXT) are object columns, the other strings are dictionary encoded.
+    '''
+
+    if service in SCHEMAS:
+        return SCHEMAS[service]
+    if service in BOOKS:
+        return SCHEMAS['NASDAQ_BOOK']
+    if service not in FIELDS or service == 'ACCT_ACTIVITY':
+        return None
+
+    columns = [('Timestamp', 'q'), ('Ticker', 'S')]
+    if service in SEQUENCED:
+        columns.append(('Sequence', 'q'))
+    if service in DELTAS:
+        columns.append(('Fields', 'q'))
+    text = TEXT.get(service, ())
+    columns += [(name, 'O' if name in text else KINDS[kind]) for _, (name, kind) in sorted(FIELDS[service].items())]
+    return tuple(columns)
+
+
+def requested_fields(service, fields = None):
+    '''
+        Field ids of service from a request field list ('0,1,2,3' or iterable), all of them when fields is None.
+        Ids the service does not stream (like 0, the symbol) are left out.
+    '''
+
+    table = FIELDS.get(service, {})
+    if fields is None:
+        return sorted(table)
+    if isinstance(fields, str):
+        fields = fields.split(',')
+    ids = set()
+    for field in fields:
+        field = str(field).strip()
+        if field.isdigit() and int(field) in table:
+            ids.add(int(field))
+    return sorted(ids)
+
+
+def make_parser(service, store, fields = None, seq_test = None, books = None, quotes = None):
+    '''
+        Builds the decoder of one service. It is compiled once per subscription: slots, defaults and
+        bitmasks are resolved here, so decoding a message is a single pass over its content.
+
+        NAME: service
+        DESC: Service name.
+        TYPE: String
+
+        NAME: store
+        DESC: TickStore (or RecordBuffer for ACCT_ACTIVITY) the rows are appended to.
+                  Services laid out field by field need a sparse TickStore.
+        TYPE: Object
+
+        NAME: fields
+        DESC: Requested field list, as sent in the SUBS request. Fields not requested are ignored.
+        TYPE: String
+
+        NAME: seq_test
+        DESC: Called as seq_test(service, content) for every content of the sequenced services.
+        TYPE: Callable
+
+        NAME: books
+        DESC: TDBookEngine updated by the book services, a private one is used when None.
+        TYPE: Object
+
+        NAME: quotes
+        DESC: TDQuoteBoard the level one services merge their messages into, none when None.
+        TYPE: Object
+
+        Returns parser(data), data being one entry of a message 'data' list.
+    '''
+
+    if service == 'ACCT_ACTIVITY':
+        return _account_activity_parser(service, store, seq_test)
+    if service == 'TIMESALE_EQUITY':
+        return _timesale_equity_parser(service, store, seq_test)
+    if service == 'CHART_EQUITY':
+        return _chart_equity_parser(service, store, seq_test)
+    if service in BOOKS:
+        return _book_parser(service, store, books if books is not None else TDBookEngine())
+    if schema(service) is None:
+        return None
+    board = quotes.boards.get(service) if quotes is not None else None
+    return _field_parser(service, store, requested_fields(service, fields), seq_test, board)
+
+
+def _account_activity_parser(service, store, seq_test):
+    append = store.append
+
+    def parse(data):
+        timestamp = data['timestamp']
+        for content in data['content']:
+            #service, timestamp, seq, key, MessageType, account#, Content
+            kind = content['2']
+            if kind != 'SUBSCRIBED' and kind != 'ERROR':
+                append((service, timestamp, content['key'], content['seq'], kind, content['1'],
+                        xmltodict.parse(content['3'], dict_constructor=dict)[kind + "Message"])) #dict to avoid OrderedDict
+            else:
+                append((service, timestamp, content['key'], content['seq'], kind))
+            seq_test(service, content)
+    return parse
+
+
+def _timesale_equity_parser(service, store, seq_test):
+    append = store.append
+
+    def parse(data):
+        timestamp = data['timestamp']
+        for content in data['content']:
+            #DateTime, Ticker, Sequence, Price, Size, LastSequence, Message_Timestamp
+            append((content['1'], content['key'], content['seq'], content['2'], content['3'], content['4'], timestamp))
+            seq_test(service, content)
+    return parse
+
+
+def _chart_equity_parser(service, store, seq_test):
+    append = store.append
+
+    def parse(data):
+        timestamp = data['timestamp']
+        for content in data['content']:
+            #DateTime, Ticker, Sequence, open_price, high, low ,close_price, volume, LastSequence, ChartDay, Message_Timestamp
+            append((content['7'], content['key'], content['seq'], content['1'], content['2'], content['3'],
+                    content['4'], content['5'], content['6'], content['8'], timestamp))
+            seq_test(service, content)
+    return parse
+
+
+def _book_parser(service, store, books):
+    append = store.append
+    apply = books.apply
+
+    def parse(data):
+        timestamp = data['timestamp']
+        for content in data['content']:
+            key = content['key']
+            time = content['1']
+            # Every message is a full snapshot, only the levels that changed are stored
+            #DateTime, Ticker, [Bid/Ask], Price, Size, Num_Orders, Message_Timestamp
+            for side, price, size, orders in apply(service, key, time, content.get('2', ()), content.get('3', ())):
+                append((time, key, side, price, size, orders, timestamp))
+    return parse
+
+
+def _field_parser(service, store, ids, seq_test, board = None):
+
+    columns = schema(service)
+    names = [name for name, _ in columns]
+    table = FIELDS[service]
+    delta = service in DELTAS
+
+    # content key -> (row slot, Fields bit)
+    slots = {'key': (names.index('Ticker'), 0)}
+    if service in SEQUENCED:
+        slots['seq'] = (names.index('Sequence'), 0)
+    for field in ids:
+        slots[str(field)] = (names.index(table[field][0]), 1 << field)
+
+    mask_slot = names.index('Fields') if delta else None
+    sequenced = service in SEQUENCED
+    append = store.append_sparse
+
+    if board is not None:
+        return _merging_field_parser(service, slots, mask_slot, append, board)
+
+    def parse(data):
+        timestamp = data['timestamp']
+        for content in data['content']:
+            # Only the slots sent are written, the store is sparse
+            row = [(0, timestamp)]
+            mask = 0
+            for key, value in content.items():
+                slot = slots.get(key)
+                if slot is not None:
+                    index, bit = slot
+                    row.append((index, value))
+                    mask |= bit
+            if delta:
+                row.append((mask_slot, mask))
+            append(row)
+            if sequenced:
+                seq_test(service, content)
+    return parse
+
+
+def _merging_field_parser(service, slots, mask_slot, append, board):
+    # Level one parser that also merges every field sent, requested or not, into the quote board
+    # in the same pass over the content.
+    # content key -> (row slot or None when not requested, Fields bit, board column)
+    merged = {key: (slots.get(key, (None, 0))[0], bit, column) for key, (column, bit) in board.slots.items()}
+    ticker = slots['key'][0]
+    board_row = board.row
+    touch = board.touch
+
+    def parse(data):
+        timestamp = data['timestamp']
+        for content in data['content']:
+            symbol = content['key']
+            line = board_row(symbol)
+            row = [(0, timestamp), (ticker, symbol)]
+            mask = received = 0
+            for key, value in content.items():
+                slot = merged.get(key)
+                if slot is not None:
+                    index, bit, column = slot
+                    try:
+                        column[line] = value
+                    except (TypeError, OverflowError):
+                        column[line] = NAN
+                    received |= bit
+                    if index is not None:
+                        row.append((index, value))
+                        mask |= bit
+            row.append((mask_slot, mask))
+            append(row)
+            touch(line, received, timestamp)
+    return parse
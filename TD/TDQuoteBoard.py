@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:12:40 2026
+
+@author: LC
+"""
+
+from array import array
+from threading import Lock
+
+from TDFields import FIELDS
+from TDParsers import DELTAS
+
+
+NAN = float('nan')
+
+# Numeric fields are kept as doubles (epoch ms and sizes are exact up to 2**53), char and String as objects
+NUMERIC = ('double', 'long', 'int', 'boolean')
+
+
+class QuoteBoard():
+    '''
+        Latest state of every symbol of one level one service (QUOTE, OPTION, LEVELONE_FUTURES, LEVELONE_FOREX).
+
+        Level one messages only carry the fields that changed, merge() writes them over the previous
+        values so the board always holds the full record of each symbol. Each field is one column
+        (array('d') or a list for strings) indexed by the symbol row:
+            get(symbol, field)      O(1)
+            quote(symbol)           O(fields)
+            to_numpy(), to_pandas() copy of every symbol, one array per field
+    '''
+
+    def __init__(self, service, capacity = 256):
+        '''
+            NAME: service
+            DESC: Level one service of the board.
+            TYPE: String
+
+            NAME: capacity
+            DESC: Rows allocated up front, doubled when full.
+            TYPE: Int
+        '''
+
+        self.service = service
+        self.capacity = capacity
+        self.symbols = []           # row -> symbol
+        self.rows = {}              # symbol -> row
+        self.updates = 0
+        self.updated = array('q', bytes(8 * capacity))      # message timestamp of the last merge, epoch ms
+        self.received = array('q', bytes(8 * capacity))     # bitmask of the fields received so far
+        self._lock = Lock()
+
+        # Columns are grown in place, the references below stay valid
+        self.fields = {}            # field name -> (column, bit)
+        self.slots = {}             # content key -> (column, bit)
+        self._numeric = set()
+        for field, (name, kind) in sorted(FIELDS[service].items()):
+            if kind in NUMERIC:
+                column = array('d', [NAN]) * capacity
+                self._numeric.add(name)
+            else:
+                column = [None] * capacity
+            self.fields[name] = self.slots[str(field)] = (column, 1 << field)
+
+    def __repr__(self):
+        return '<TD QuoteBoard {} - Symbols = {}>'.format(self.service, len(self.symbols))
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        return symbol in self.rows
+
+    def row(self, symbol):
+        # Row of symbol, added when new
+        row = self.rows.get(symbol)
+        return row if row is not None else self._add(symbol)
+
+    def _add(self, symbol):
+        with self._lock:
+            row = self.rows.get(symbol)
+            if row is not None:
+                return row
+            row = len(self.symbols)
+            if row == self.capacity:
+                grow = self.capacity
+                for name, (column, _) in self.fields.items():
+                    column.extend(array('d', [NAN]) * grow if name in self._numeric else [None] * grow)
+                self.updated.extend(array('q', bytes(8 * grow)))
+                self.received.extend(array('q', bytes(8 * grow)))
+                self.capacity += grow
+            self.symbols.append(symbol)
+            self.rows[symbol] = row
+            return row
+
+    def merge(self, content, timestamp):
+        '''
+            Writes the fields of one message content (field id keys, 'key' = symbol) over the record of its symbol.
+            The field parsers do the same inline, in their own pass over the content.
+        '''
+
+        row = self.row(content['key'])
+        slots = self.slots
+        received = 0
+        for key, value in content.items():
+            slot = slots.get(key)
+            if slot is not None:
+                column, bit = slot
+                try:
+                    column[row] = value
+                except (TypeError, OverflowError):
+                    column[row] = NAN
+                received |= bit
+        self.touch(row, received, timestamp)
+
+    def touch(self, row, received, timestamp):
+        self.received[row] |= received
+        self.updated[row] = timestamp
+        self.updates += 1
+
+    '''****************************************
+    ************* Queries *********************
+    ****************************************'''
+
+    def get(self, symbol, field, default = None):
+        '''
+            Latest value of field (name, like 'Bid Price') for symbol, default when the symbol or
+            the field was never received.
+        '''
+        row = self.rows.get(symbol)
+        slot = self.fields.get(field)
+        if row is None or slot is None:
+            return default
+        column, bit = slot
+        return column[row] if self.received[row] & bit else default
+
+    def quote(self, symbol):
+        # {field name: value} of the fields received for symbol, None for an unknown symbol
+        row = self.rows.get(symbol)
+        if row is None:
+            return None
+        received = self.received[row]
+        record = {name: column[row] for name, (column, bit) in self.fields.items() if received & bit}
+        record['Timestamp'] = self.updated[row]
+        return record
+
+    def to_numpy(self, fields = None):
+        '''
+            Returns (symbols, {field name: array}) with one entry per symbol, fields never received read
+            as NaN (numeric) or None. Arrays are copies, the board keeps updating.
+        '''
+        import numpy as np
+
+        rows = len(self.symbols)
+        symbols = np.array(self.symbols[:rows], dtype = object)
+        columns = {'Timestamp': np.frombuffer(self.updated, dtype = np.int64, count = rows).copy()}
+        for name in fields or self.fields:
+            column, _ = self.fields[name]
+            if name in self._numeric:
+                columns[name] = np.frombuffer(column, dtype = np.float64, count = rows).copy()
+            else:
+                columns[name] = np.array(column[:rows], dtype = object)
+        return symbols, columns
+
+    def to_pandas(self, fields = None):
+        # DataFrame indexed by Ticker, one column per field
+        import pandas as pd
+
+        symbols, columns = self.to_numpy(fields)
+        return pd.DataFrame(columns, index = pd.Index(symbols, name = 'Ticker'))
+
+
+class TDQuoteBoard():
+    '''
+        Quote boards of the level one services, merged by the field parsers (TDParsers).
+
+        EXAMPLES:
+        SessionObject.quotes.get('AAPL', 'Bid Price')                   # QUOTE by default
+        SessionObject.quotes.get('/ES', 'Mark', 'LEVELONE_FUTURES')
+        SessionObject.quotes.quote('AAPL')                              # {'Bid Price': 115.3, ...}
+        SessionObject.quotes.to_pandas('QUOTE', ['Bid Price', 'Ask Price', 'Mark'])
+    '''
+
+    def __init__(self, services = DELTAS, capacity = 256):
+        self.boards = {service: QuoteBoard(service, capacity) for service in services}
+
+    def __repr__(self):
+        return '<TD QuoteBoard - {}>'.format(', '.join(f'{service} = {len(board)}' for service, board in self.boards.items()))
+
+    def board(self, service = 'QUOTE'):
+        return self.boards[service]
+
+    def get(self, symbol, field, service = 'QUOTE', default = None):
+        return self.boards[service].get(symbol, field, default)
+
+    def quote(self, symbol, service = 'QUOTE'):
+        return self.boards[service].quote(symbol)
+
+    def symbols(self, service = 'QUOTE'):
+        return list(self.boards[service].symbols)
+
+    def to_numpy(self, service = 'QUOTE', fields = None):
+        return self.boards[service].to_numpy(fields)
+
+    def to_pandas(self, service = 'QUOTE', fields = None):
+        return self.boards[service].to_pandas(fields)
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 23:31:45 2026
+
+@author: LC
+"""
+
+import time
+import random
+from threading import Thread, Event, Lock
+
+
+# Reconnection durations, in seconds
+RECONNECT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+
+class TDReconnector():
+    '''
+        Keeps a TDStreamerClient connected.
+
+        Stalls: the streamer sends heartbeats every few seconds, so a connection without any frame for
+        stall_timeout seconds is dead even if the socket never closed: it is dropped and reconnected.
+        Services can also get their own data silence timeout (set_stall_timeout), a silent service is
+        subscribed again without dropping the connection.
+
+        Reconnection: first attempt right away, then exponential backoff with full jitter
+        (uniform between 0 and min(max_delay, base_delay * 2 ** attempt)). connect() reuses the cached
+        streamer credentials, and every subscription is sent again in one batched message.
+
+        Metrics (SessionObject.metrics): reconnects, reconnect_failures, stalls{service} counters and
+        the reconnect_seconds histogram, from the drop to the resubscription.
+
+        Listeners added to on_reconnect are called with (disconnected, reconnected) epoch ms once the
+        subscriptions are sent again.
+
+        EXAMPLES:
+        SessionObject.reconnector.stall_timeout = 20
+        SessionObject.reconnector.set_stall_timeout('TIMESALE_EQUITY', 30)     # during market hours
+        SessionObject.reconnector.stats()
+    '''
+
+    def __init__(self, streamer, stall_timeout = 30, base_delay = 0.5, max_delay = 60):
+        '''
+            NAME: stall_timeout
+            DESC: Seconds without any frame (data or heartbeat) before the connection is dropped. None disables it.
+            TYPE: Float
+
+            NAME: base_delay
+            DESC: Backoff of the second attempt, doubled on every failed attempt, in seconds.
+            TYPE: Float
+
+            NAME: max_delay
+            DESC: Backoff cap, in seconds.
+            TYPE: Float
+        '''
+
+        self.streamer = streamer
+        self.stall_timeout = stall_timeout
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.service_timeouts = {}      # service -> seconds of data silence before it is subscribed again
+        self.last_frame = None          # epoch seconds of the last frame received
+        self.last_data = {}             # service -> epoch seconds of its last data entry
+        self.reconnecting = False
+        self.reconnects = 0
+        self.stalls = 0
+        self.last_duration = None
+        self.disconnected = None        # epoch ms of the last drop
+        self.on_reconnect = []
+        self._stop = Event()
+        self._lock = Lock()
+
+    def __repr__(self):
+        return '<TD Reconnector - Reconnects = {}, Stalls = {}>'.format(self.reconnects, self.stalls)
+
+    def set_stall_timeout(self, service, seconds):
+        # Data silence allowed for service before it is subscribed again, None removes it
+        if seconds is None:
+            self.service_timeouts.pop(service, None)
+        else:
+            self.service_timeouts[service] = seconds
+
+    def delay(self, attempt):
+        # Seconds to wait before attempt (0 for the first one)
+        if attempt == 0:
+            return 0.0
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def frame(self, received):
+        self.last_frame = received
+
+    def data(self, message, received):
+        last = self.last_data
+        for data in message['data']:
+            last[data['service']] = received
+
+    def reset(self):
+        # A new connection starts the silence clocks
+        now = time.time()
+        self.last_frame = now
+        self.last_data = {service: now for service in self.last_data}
+
+    '''****************************************
+    ************* Stall detection *************
+    ****************************************'''
+
+    def check(self):
+        # Called every second while logged in, from the download rate loop
+        streamer = self.streamer
+        if self.reconnecting or not streamer.IsLoggedIn:
+            return
+        now = time.time()
+
+        if self.stall_timeout is not None and self.last_frame is not None and now - self.last_frame > self.stall_timeout:
+            self.stalls += 1
+            streamer.metrics.incr('stalls', 'connection')
+            print('No frame received for:'.ljust(50) + str(round(now - self.last_frame, 1)) + ' s, dropping the connection')
+            self.last_frame = now
+            streamer._drop_connection()
+            return
+
+        silent = []
+        for service, timeout in list(self.service_timeouts.items()):
+            if not streamer.subscriptions[service]['subscribed']:
+                continue
+            last = self.last_data.setdefault(service, now)
+            if now - last > timeout:
+                silent.append(service)
+                self.last_data[service] = now
+        if silent:
+            self.stalls += len(silent)
+            for service in silent:
+                streamer.metrics.incr('stalls', service)
+            print('No data received, subscribing again:'.ljust(50) + ', '.join(silent))
+            streamer.resubscribe(silent)
+
+    '''****************************************
+    ************* Reconnection ****************
+    ****************************************'''
+
+    def schedule(self):
+        # Called when the connection closed without a logout, starts one reconnection thread
+        with self._lock:
+            if self.reconnecting:
+                return
+            self.reconnecting = True
+        self.disconnected = int(time.time() * 1000)
+        self._stop.clear()
+        Thread(name='reconnect_thread', target=self._run, daemon = True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        streamer = self.streamer
+        started = time.time()
+        attempt = 0
+        print('Recovering connection')
+        try:
+            while not streamer.UserLogoff and not self._stop.is_set():
+                if self._stop.wait(self.delay(attempt)):
+                    break
+                if streamer.connect():
+                    break
+                attempt += 1
+                streamer.metrics.incr('reconnect_failures')
+                print('Reconnection failed, attempt:'.ljust(50) + str(attempt))
+        finally:
+            self.reconnecting = False
+
+        if streamer.IsLoggedIn:
+            streamer.resubscribe()
+            self.finished(started)
+
+    def finished(self, started):
+        # Records a reconnection that started at started (epoch seconds) and calls the listeners
+        self.last_duration = time.time() - started
+        self.reconnects += 1
+        self.streamer.metrics.incr('reconnects')
+        self.streamer.metrics.observe('reconnect_seconds', self.last_duration, buckets = RECONNECT_BUCKETS)
+        print('Reconnected in:'.ljust(50) + str(round(self.last_duration, 3)) + ' s')
+
+        reconnected = int(time.time() * 1000)
+        for listener in self.on_reconnect:
+            try:
+                listener(self.disconnected, reconnected)
+            except Exception as error:
+                print(f'Reconnect listener {listener} raised: {error}')
+
+    def stats(self):
+        now = time.time()
+        return {'reconnects': self.reconnects, 'stalls': self.stalls, 'reconnecting': self.reconnecting,
+                'last_duration': self.last_duration,
+                'silence': {service: now - last for service, last in list(self.last_data.items())}}
@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 11:20:36 2026
+
+@author: LC
+"""
+
+import os
+import time
+import pickle
+import struct
+from threading import Lock
+from datetime import datetime
+
+
+class RetentionPolicy():
+    '''
+        Limits for the rows kept in memory for one service or response type.
+        Any limit left as None is not enforced.
+
+        NAME: max_count
+        DESC: Maximum rows in memory.
+        TYPE: Int
+
+        NAME: max_age
+        DESC: Seconds a sealed chunk may stay in memory.
+        TYPE: Float
+
+        NAME: max_bytes
+        DESC: Maximum memory used by the rows (estimated for RecordBuffer, exact for TickStore).
+        TYPE: Int
+
+        Eviction works on whole sealed chunks, so memory never goes below one chunk per store.
+    '''
+
+    def __init__(self, max_count = None, max_age = None, max_bytes = None):
+        self.max_count = max_count
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+
+    def __repr__(self):
+        return '<TD RetentionPolicy - max_count = {}, max_age = {}, max_bytes = {}>'.format(self.max_count, self.max_age, self.max_bytes)
+
+
+class SpillStore():
+    '''
+        On disk store for evicted chunks.
+
+        One file per name and day under folder ({name}_{date}.spill). Each record is a length prefixed
+        pickle of (first position, payload). An index kept in memory maps positions to file offsets
+        so reads only touch the chunks they need.
+    '''
+
+    _header = struct.Struct('<Q')
+
+    def __init__(self, folder = './StreamData/Spill'):
+        self.folder = folder
+        self._index = {}    # name -> [(first position, rows, path, file offset)]
+        self._lock = Lock()
+
+    def __repr__(self):
+        return '<TD SpillStore {} - Names = {}>'.format(self.folder, len(self._index))
+
+    def write(self, name, first, rows, payload):
+
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+
+        today = datetime.today().strftime('%Y-%m-%d')
+        path = os.path.join(self.folder, f'{name.replace("/", "_")}_{today}.spill')
+        blob = pickle.dumps((first, payload), protocol=pickle.HIGHEST_PROTOCOL)
+
+        with self._lock:
+            with open(path, 'ab') as f:
+                offset = f.tell()
+                f.write(self._header.pack(len(blob)))
+                f.write(blob)
+            self._index.setdefault(name, []).append((first, rows, path, offset))
+
+    def read(self, name, start = 0, stop = None):
+        '''
+            Yields (first position, payload) for the spilled chunks overlapping [start, stop).
+        '''
+
+        with self._lock:
+            entries = list(self._index.get(name, []))
+
+        for first, rows, path, offset in entries:
+            if first + rows <= start or (stop is not None and first >= stop):
+                continue
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                size, = self._header.unpack(f.read(self._header.size))
+                yield pickle.loads(f.read(size))
+
+    def spilled(self, name):
+        # Rows of name currently on disk
+        return sum(rows for _, rows, _, _ in self._index.get(name, []))
+
+
+class TDRetention():
+    '''
+        Retention layer for the in memory stream data.
+
+        Stores (TickStore or RecordBuffer) are trimmed chunk by chunk according to their policy.
+        Evicted chunks are written to the SpillStore, and read() stitches the spilled chunks and the
+        rows still in memory back together so callers do not need to know where a row lives.
+    '''
+
+    def __init__(self, spill_folder = './StreamData/Spill', spill = True):
+        '''
+            NAME: spill_folder
+            DESC: Folder for the spilled chunks.
+            TYPE: String
+
+            NAME: spill
+            DESC: If False evicted chunks are dropped instead of written to disk.
+            TYPE: Boolean
+        '''
+
+        self.policies = {}
+        self.spill = spill
+        self.spill_store = SpillStore(spill_folder)
+        self.evicted = {}   # name -> rows evicted
+
+    def __repr__(self):
+        return '<TD Retention - Policies = {}>'.format(self.policies)
+
+    def set_policy(self, name, max_count = None, max_age = None, max_bytes = None):
+        if max_count is None and max_age is None and max_bytes is None:
+            self.policies.pop(name, None)
+        else:
+            self.policies[name] = RetentionPolicy(max_count, max_age, max_bytes)
+
+    def enforce(self, name, store, stored = None):
+        '''
+            Evicts sealed chunks of store until it fits its policy.
+
+            NAME: stored
+            DESC: Absolute position already persisted by the CSV writer. Chunks beyond it are kept
+                  so the writer never misses rows. None when nothing else reads the store.
+            TYPE: Int
+
+            Returns the number of rows evicted.
+        '''
+
+        policy = self.policies.get(name)
+        if policy is None:
+            return 0
+
+        sealed = store.sealed_chunks()
+        if not sealed:
+            return 0
+
+        now = time.time()
+        count = len(store)
+        nbytes = store.nbytes if policy.max_bytes is not None else 0
+        n_chunks = 0
+
+        for first, rows, sealed_at, chunk_bytes in sealed:
+            if stored is not None and first + rows > stored:
+                break
+
+            over_count = policy.max_count is not None and count > policy.max_count
+            over_bytes = policy.max_bytes is not None and nbytes > policy.max_bytes
+            over_age = policy.max_age is not None and now - sealed_at > policy.max_age
+            if not (over_count or over_bytes or over_age):
+                break
+
+            n_chunks += 1
+            count -= rows
+            nbytes -= chunk_bytes
+
+        if not n_chunks:
+            return 0
+
+        evicted = 0
+        for first, payload in store.evict(n_chunks):
+            if self.spill:
+                self.spill_store.write(name, first, store.chunk_size, payload)
+            evicted += store.chunk_size
+
+        self.evicted[name] = self.evicted.get(name, 0) + evicted
+        return evicted
+
+    def read(self, name, store, start = 0, stop = None):
+        '''
+            Yields the rows of name from absolute position start to stop, reading spilled chunks
+            from disk and the rest from memory.
+        '''
+
+        position = start
+        if self.spill and position < store.offset:
+            for first, payload in self.spill_store.read(name, start, stop):
+                for i, row in enumerate(store.decode(payload)):
+                    if first + i < position:
+                        continue
+                    if stop is not None and first + i >= stop:
+                        return
+                    yield row
+                    position = first + i + 1
+
+        # Rows evicted without spill are gone, carry on with what is in memory
+        position = max(position, store.offset)
+        for row in store.since(position):
+            if stop is not None and position >= stop:
+                return
+            yield row
+            position += 1
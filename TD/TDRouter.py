@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 22:20:08 2026
+
+@author: LC
+"""
+
+from threading import Lock
+
+from TDFields import FIELDS
+
+
+# {service: {content key: field name}}, contents use the field ids as keys
+NAMES = {service: {str(field): name for field, (name, _) in table.items()} for service, table in FIELDS.items()}
+
+
+def decode(service, timestamp, content, fields = None):
+    '''
+        Record of one content: {'service', 'timestamp', 'key', ['seq'], field name: value}.
+        With fields (content keys) only those are kept, None when the content has none of them.
+    '''
+    names = NAMES.get(service, {})
+    record = {'service': service, 'timestamp': timestamp, 'key': content.get('key')}
+    if 'seq' in content:
+        record['seq'] = content['seq']
+    found = False
+    for key, value in content.items():
+        if fields is not None and key not in fields:
+            continue
+        name = names.get(key)
+        if name is not None:
+            record[name] = value
+            found = True
+    if fields is not None and not found:
+        return None
+    return record
+
+
+class _Route():
+
+    __slots__ = ('callback', 'services', 'symbols', 'fields', 'names')     # fields: {service: content keys} or None
+
+    def __init__(self, callback, services, symbols, fields, names):
+        self.callback = callback
+        self.services = services
+        self.symbols = symbols
+        self.fields = fields
+        self.names = names          # field names of fields, for records decoded already
+
+
+# Record keys kept whatever the fields of a route
+_BASE = ('service', 'timestamp', 'key', 'seq')
+
+
+def _names(value):
+    # 'A, B' or iterable -> set, None stays None
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(',')
+    return {str(item).strip() for item in value if str(item).strip()}
+
+
+class TDRouter():
+    '''
+        Routing index of the observers registered with filters (bind_to services/symbols/fields).
+
+        Routes are indexed by (service, symbol), with None standing for any service or any symbol,
+        so a message only costs four dictionary lookups per content plus the work for the observers
+        that actually match. Each matching observer is handed, through its own dispatcher worker,
+        the list of decoded records (see decode) of the message it subscribed to.
+    '''
+
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self.routes = {}        # callback -> _Route
+        self._index = {}        # (service or None, symbol or None) -> tuple of routes
+        self._lock = Lock()
+
+    def __repr__(self):
+        return '<TD Router - Routes = {}>'.format(len(self.routes))
+
+    def add(self, callback, services = None, symbols = None, fields = None):
+        '''
+            NAME: services
+            DESC: Service names separated by commas, or iterable. Every service when None.
+            TYPE: String
+
+            NAME: symbols
+            DESC: Symbols separated by commas, or iterable. Every symbol when None.
+            TYPE: String
+
+            NAME: fields
+            DESC: Field ids or names. Records only carry these fields, and contents with none of them
+                  are not delivered. Every field when None.
+            TYPE: String
+        '''
+
+        services, symbols = _names(services), _names(symbols)
+        names = None
+        if fields is not None:
+            # Field names are turned into the ids (content keys) they have in each service
+            wanted = _names(fields)
+            fields = {service: {key for key, name in table.items() if name in wanted or key in wanted}
+                      for service, table in NAMES.items()}
+            names = {NAMES[service][key] for service, keys in fields.items() for key in keys}
+
+        with self._lock:
+            self.routes[callback] = _Route(callback, services, symbols, fields, names)
+            self._rebuild()
+
+    def remove(self, callback):
+        with self._lock:
+            if self.routes.pop(callback, None) is not None:
+                self._rebuild()
+
+    def _rebuild(self):
+        # Readers use the previous index until the new one is swapped in
+        index = {}
+        for route in self.routes.values():
+            for service in route.services or (None,):
+                for symbol in route.symbols or (None,):
+                    index.setdefault((service, symbol), []).append(route)
+        self._index = {key: tuple(routes) for key, routes in index.items()}
+
+    def route(self, entries):
+        # Called from the receive path with the data entries of one message
+        index = self._index
+        if not index:
+            return
+
+        deliveries = {}
+        for data in entries:
+            service = data['service']
+            timestamp = data['timestamp']
+            every = index.get((service, None), ()) + index.get((None, None), ())
+            for content in data['content']:
+                key = content.get('key')
+                routes = every + index.get((service, key), ()) + index.get((None, key), ())
+                if not routes:
+                    continue
+                shared = None
+                for route in routes:
+                    if route.fields is None:
+                        if shared is None:
+                            shared = decode(service, timestamp, content)
+                        record = shared
+                    else:
+                        record = decode(service, timestamp, content, route.fields.get(service, ()))
+                        if record is None:
+                            continue
+                    deliveries.setdefault(route.callback, []).append(record)
+
+        for callback, records in deliveries.items():
+            self.dispatcher.send(callback, records)
+
+    def route_records(self, records):
+        # Same as route, for records decoded already (TDBridgeClient)
+        index = self._index
+        if not index:
+            return
+
+        deliveries = {}
+        for record in records:
+            service = record['service']
+            key = record.get('key')
+            routes = (index.get((service, None), ()) + index.get((None, None), ())
+                      + index.get((service, key), ()) + index.get((None, key), ()))
+            for route in routes:
+                selected = record
+                if route.names is not None:
+                    names = route.names
+                    if not any(name in names for name in record):
+                        continue
+                    selected = {name: value for name, value in record.items() if name in names or name in _BASE}
+                deliveries.setdefault(route.callback, []).append(selected)
+
+        for callback, records in deliveries.items():
+            self.dispatcher.send(callback, records)
@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 19:48:06 2026
+
+@author: LC
+"""
+
+import os
+import time
+from threading import Lock
+from multiprocessing import shared_memory, resource_tracker
+
+
+SHARED_NAME = 'TDQuotes'
+SHARED_FIELDS = ('Bid Price', 'Ask Price', 'Last Price', 'Bid Size', 'Ask Size', 'Last Size', 'Mark')
+
+MAGIC = 0x5444515532        # 'TDQU2'
+NAN = float('nan')
+HEADER_WORDS = 8            # magic, capacity, fields, published symbols, writer pid, reserved
+NAME_BYTES = 32             # field names, utf-8 null padded
+KEY_BYTES = 64              # row keys 'SERVICE SYMBOL', utf-8 null padded
+
+# Header words
+_MAGIC, _CAPACITY, _FIELDS, _COUNT, _PID = range(5)
+
+
+'''
+    Segment layout, every value is 8 bytes:
+
+        header      HEADER_WORDS words
+        fields      fields x NAME_BYTES, field names in row order
+        keys        capacity x KEY_BYTES, 'SERVICE SYMBOL' of each row
+        rows        capacity x (2 + fields) words:
+                        sequence    even when the row is stable, odd while it is written
+                        timestamp   epoch ms of the message that updated the row
+                        values      one double per field, NaN when never received
+
+    Seqlock: the writer makes the sequence odd, writes the row and makes it even again. A reader
+    copies the row between two reads of the sequence and retries if it was odd or changed.
+    Rows are keyed by service and symbol, QUOTE AAPL and OPTION AAPL... never share a row.
+    Keys are only appended, the published count is written after the row is ready.
+'''
+
+
+def _layout(capacity, fields):
+    # (keys offset, rows offset, row words, size in bytes)
+    keys = HEADER_WORDS * 8 + fields * NAME_BYTES
+    rows = keys + capacity * KEY_BYTES
+    stride = 2 + fields
+    return keys, rows, stride, rows + capacity * stride * 8
+
+
+def _attach(name):
+    # Attach to an existing segment without handing it to this process' resource tracker,
+    # which would otherwise unlink it when the reader exits.
+    try:
+        return shared_memory.SharedMemory(name, track = False)     # Python 3.13+
+    except TypeError:
+        segment = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+def _alive(pid):
+    # Whether the process pid still runs
+    if pid <= 0:
+        return False
+    if os.name == 'nt':
+        return True         # segments do not outlive their processes on Windows
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True         # runs, under another user
+    return True
+
+
+def _name(buffer, offset, size = NAME_BYTES):
+    return bytes(buffer[offset:offset + size]).rstrip(b'\x00').decode()
+
+
+class SharedQuotesWriter():
+    '''
+        Publishes the latest values of a TDQuoteBoard into a shared memory segment, started by
+        TDStreamerClient.share_quotes. publish(data) is called from the receive path after the level
+        one parsers merged the message.
+    '''
+
+    def __init__(self, quotes, name = SHARED_NAME, capacity = 4096, fields = SHARED_FIELDS):
+        '''
+            NAME: quotes
+            DESC: TDQuoteBoard the values are read from.
+            TYPE: Object
+
+            NAME: name
+            DESC: Shared memory segment name, readers open it with TDSharedQuotes(name).
+            TYPE: String
+
+            NAME: capacity
+            DESC: Rows the segment can hold, one per service and symbol, rows over it are not published.
+            TYPE: Int
+
+            NAME: fields
+            DESC: Quote board field names published for every symbol.
+            TYPE: Tuple
+        '''
+
+        self.quotes = quotes
+        self.name = name
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self.rows = {}          # (service, symbol) -> row
+        self.published = 0
+        self.full = False
+        self._lock = Lock()
+
+        self._keys, rows, self.stride, size = _layout(capacity, len(self.fields))
+        self._base = rows // 8          # first row, in words
+        try:
+            self.segment = shared_memory.SharedMemory(name, create = True, size = size)
+        except FileExistsError:
+            # Left behind by a streamer that did not stop sharing, unless its writer still runs
+            stale = _attach(name)
+            pid = 0
+            if stale.size >= HEADER_WORDS * 8:
+                with stale.buf.cast('Q') as words:
+                    pid = words[_PID]
+            if _alive(pid):
+                stale.close()
+                raise FileExistsError(f'Shared memory {name} is written by the running process {pid}, share the quotes under another name')
+            stale.close()
+            stale.unlink()
+            self.segment = shared_memory.SharedMemory(name, create = True, size = size)
+
+        buffer = self.segment.buf
+        self._words = buffer.cast('Q')
+        self._doubles = buffer.cast('d')
+
+        for n, field in enumerate(self.fields):
+            offset = HEADER_WORDS * 8 + n * NAME_BYTES
+            buffer[offset:offset + NAME_BYTES] = field.encode()[:NAME_BYTES].ljust(NAME_BYTES, b'\x00')
+        for n in range(capacity * self.stride):
+            self._doubles[self._base + n] = NAN
+        for row in range(capacity):
+            self._words[self._base + row * self.stride] = 0
+
+        words = self._words
+        words[_CAPACITY] = capacity
+        words[_FIELDS] = len(self.fields)
+        words[_COUNT] = 0
+        words[_PID] = os.getpid()
+        words[_MAGIC] = MAGIC
+
+        # service -> quote board column of each shared field, None when the service does not have it
+        self._columns = {service: [board.fields[field][0] if field in board.fields else None for field in self.fields]
+                         for service, board in quotes.boards.items()}
+
+        print("Sharing quotes at:".ljust(50) + name)
+
+    def __repr__(self):
+        return '<TD SharedQuotesWriter {} - Symbols = {}/{}>'.format(self.name, len(self.rows), self.capacity)
+
+    def _add(self, key):
+        with self._lock:
+            row = self.rows.get(key)
+            if row is not None:
+                return row
+            encoded = ' '.join(key).encode()
+            row = len(self.rows)
+            if row >= self.capacity or len(encoded) > KEY_BYTES:
+                if not self.full:
+                    self.full = True
+                    print("Shared quotes, symbol not published:".ljust(50) + ' '.join(key))
+                return None
+            offset = self._keys + row * KEY_BYTES
+            self.segment.buf[offset:offset + KEY_BYTES] = encoded.ljust(KEY_BYTES, b'\x00')
+            self.rows[key] = row
+            return row
+
+    def publish(self, data):
+        # Copies the rows of the symbols of one data entry from the quote board
+        service = data['service']
+        board = self.quotes.boards.get(service)
+        if board is None:
+            return
+        columns = self._columns[service]
+        words, doubles = self._words, self._doubles
+        timestamp = data['timestamp']
+        added = False
+        for content in data['content']:
+            symbol = content['key']
+            row = self.rows.get((service, symbol))
+            if row is None:
+                row = self._add((service, symbol))
+                if row is None:
+                    continue
+                added = True
+            line = board.rows[symbol]
+            base = self._base + row * self.stride
+            sequence = words[base]
+            words[base] = sequence + 1
+            words[base + 1] = timestamp
+            value = base + 2
+            for column in columns:
+                doubles[value] = column[line] if column is not None else NAN
+                value += 1
+            words[base] = sequence + 2
+            self.published += 1
+        if added:
+            # Readers only look at rows below the count, it is raised once the rows are written
+            words[_COUNT] = len(self.rows)
+
+    def close(self):
+        self._words.release()
+        self._doubles.release()
+        self.segment.close()
+        self.segment.unlink()
+        print("Stopped sharing quotes at:".ljust(50) + self.name)
+
+
+class TDSharedQuotes():
+    '''
+        Reads the quotes a TDStreamerClient publishes with share_quotes, from any local process.
+        Reads go straight to the shared memory, there is no socket nor serialization involved.
+
+        EXAMPLES:
+        # Streamer process
+        SessionObject.share_quotes(name = 'TDQuotes')
+
+        # Any other process
+        quotes = TDSharedQuotes('TDQuotes')
+        quotes.get('AAPL')                  # {'Bid Price': 115.3, ..., 'Timestamp': 1600084800123}
+        quotes.get('AAPL', 'Mark')
+        quotes.get('/ES', service = 'LEVELONE_FUTURES')
+        quotes.to_pandas()                  # every service and symbol
+    '''
+
+    def __init__(self, name = SHARED_NAME, retries = 1000, timeout = 1.0):
+        '''
+            NAME: name
+            DESC: Shared memory segment name.
+            TYPE: String
+
+            NAME: retries
+            DESC: Attempts to read a row that keeps changing before yielding the CPU.
+            TYPE: Int
+
+            NAME: timeout
+            DESC: Seconds a row may stay unreadable before TimeoutError is raised. RuntimeError is raised
+                  sooner when the writer process stopped in the middle of a row.
+            TYPE: Float
+        '''
+
+        self.name = name
+        self.retries = retries
+        self.timeout = timeout
+        self.segment = _attach(name)
+        buffer = self.segment.buf
+        self._words = buffer.cast('Q')
+        self._doubles = buffer.cast('d')
+
+        if self._words[_MAGIC] != MAGIC:
+            self.close()
+            raise ValueError(f'{name} is not a quotes segment')
+
+        self.capacity = self._words[_CAPACITY]
+        self.fields = tuple(_name(buffer, HEADER_WORDS * 8 + n * NAME_BYTES) for n in range(self._words[_FIELDS]))
+        self._index = {field: n for n, field in enumerate(self.fields)}
+        self._keys, rows, self.stride, _ = _layout(self.capacity, len(self.fields))
+        self._base = rows // 8
+        self.rows = {}      # (service, symbol) -> row
+        self._symbols = {}  # symbol -> row, of QUOTE when several services publish it
+
+    def __repr__(self):
+        return '<TD SharedQuotes {} - Symbols = {}>'.format(self.name, self._words[_COUNT])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def writer_pid(self):
+        return self._words[_PID]
+
+    def symbols(self, service = None):
+        # Published symbols, of one service or of all of them
+        self._refresh()
+        if service is None:
+            return list(self._symbols)
+        return [symbol for key, symbol in self.rows if key == service]
+
+    def _refresh(self):
+        # Picks up the rows published since the last look
+        count = self._words[_COUNT]
+        buffer = self.segment.buf
+        for row in range(len(self.rows), count):
+            service, symbol = _name(buffer, self._keys + row * KEY_BYTES, KEY_BYTES).split(' ', 1)
+            self.rows[(service, symbol)] = row
+            if symbol not in self._symbols or service == 'QUOTE':
+                self._symbols[symbol] = row
+
+    def _row(self, symbol, service):
+        rows = self._symbols if service is None else self.rows
+        key = symbol if service is None else (service, symbol)
+        row = rows.get(key)
+        if row is None:
+            self._refresh()
+            row = rows.get(key)
+        return row
+
+    def _read(self, row, start, stop):
+        # Consistent copy of the words start:stop of a row, and its timestamp
+        words, doubles = self._words, self._doubles
+        base = self._base + row * self.stride
+        attempts = 0
+        deadline = None
+        while True:
+            sequence = words[base]
+            if not sequence & 1:
+                timestamp = words[base + 1]
+                values = doubles[base + 2 + start:base + 2 + stop].tolist()
+                if words[base] == sequence:
+                    return values, timestamp
+            attempts += 1
+            if attempts >= self.retries:
+                attempts = 0
+                # A writer that died between the two sequence writes leaves the row odd for good
+                if not _alive(self.writer_pid):
+                    raise RuntimeError(f'The writer process {self.writer_pid} of {self.name} stopped while writing a row')
+                now = time.monotonic()
+                if deadline is None:
+                    deadline = now + self.timeout
+                elif now > deadline:
+                    raise TimeoutError(f'Row {row} of {self.name} kept changing for {self.timeout} s')
+                time.sleep(0)
+
+    def get(self, symbol, field = None, service = None):
+        '''
+            Latest value of field for symbol, or {field: value, 'Timestamp': epoch ms} of every field when
+            field is None. None for a symbol that is not published.
+            service picks the row of one level one service, None reads the QUOTE row, or the only
+            service publishing the symbol.
+        '''
+        row = self._row(symbol, service)
+        if row is None:
+            return None
+        if field is not None:
+            n = self._index[field]
+            return self._read(row, n, n + 1)[0][0]
+        values, timestamp = self._read(row, 0, len(self.fields))
+        record = dict(zip(self.fields, values))
+        record['Timestamp'] = timestamp
+        return record
+
+    def to_numpy(self):
+        '''
+            Returns (services, symbols, values, timestamps), values being a (rows x fields) float array.
+            Rows being written while they are copied are read again one by one.
+        '''
+        import numpy as np
+
+        self._refresh()
+        count = len(self.rows)
+        start, stop = self._base, self._base + count * self.stride
+        shared = np.frombuffer(self._words[start:stop], dtype = np.uint64).reshape(count, self.stride)
+        sequences = shared[:, 0].copy()
+        table = shared.copy()
+        changed = (shared[:, 0] != sequences) | (sequences & 1 == 1)
+        del shared
+        values_table = table.view(np.float64)
+
+        # Rows that were odd or changed during the copy
+        for row in np.flatnonzero(changed):
+            values, timestamp = self._read(row, 0, len(self.fields))
+            values_table[row, 2:] = values
+            table[row, 1] = timestamp
+
+        keys = list(self.rows)[:count]
+        services = np.array([service for service, _ in keys], dtype = object)
+        symbols = np.array([symbol for _, symbol in keys], dtype = object)
+        return services, symbols, values_table[:, 2:].copy(), table[:, 1].astype(np.int64)
+
+    def to_pandas(self):
+        # DataFrame indexed by Service and Ticker, one column per field and the Timestamp
+        import pandas as pd
+
+        services, symbols, values, timestamps = self.to_numpy()
+        index = pd.MultiIndex.from_arrays([services, symbols], names = ['Service', 'Ticker'])
+        frame = pd.DataFrame(values, columns = self.fields, index = index)
+        frame['Timestamp'] = timestamps
+        return frame
+
+    def close(self):
+        self._words.release()
+        self._doubles.release()
+        self.segment.close()
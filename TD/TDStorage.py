@@ -0,0 +1,608 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 12:05:48 2026
+
+@author: LC
+"""
+
+import os
+import csv
+import json
+import time
+import sqlite3
+from itertools import islice
+from threading import Thread, Condition
+from datetime import datetime
+
+from TDTime import is_time_column
+
+
+def record_fields(row):
+    '''
+        Splits a RecordBuffer row, (service, timestamp, key, [seq], content...) as built by
+        the ACCT_ACTIVITY parser, into (service, timestamp, key, sequence or None, JSON content).
+    '''
+    if len(row) >= 5 and isinstance(row[3], int):
+        sequence, rest = row[3], row[4:]
+    else:
+        sequence, rest = None, row[3:]
+    return row[0], row[1], row[2], sequence, json.dumps(rest[0] if len(rest) == 1 else rest, default=str)
+
+
+class StorageBackend():
+    '''
+        Interface of the storage backends used by TDStorageWriter.
+
+        The writer calls, from its own thread:
+            open(service, day, headers)     before the first write of a service for a given day
+            write(service, store, start, stop)  rows between absolute positions start and stop of the store
+            flush(service, fsync)           according to the flush policy
+            close(service)                  on unsubscription, day rollover and disconnection
+
+        store is a TickStore or a RecordBuffer, so a backend can read rows (store.since) or
+        columns (TickStore.column_buffers) whatever suits its format.
+    '''
+
+    def __init__(self, folder = './StreamData'):
+        self.folder = folder
+
+    def __repr__(self):
+        return '<TD {} {}>'.format(type(self).__name__, self.folder)
+
+    def is_open(self, service):
+        raise NotImplementedError
+
+    def open(self, service, day, headers):
+        raise NotImplementedError
+
+    def write(self, service, store, start, stop):
+        raise NotImplementedError
+
+    def flush(self, service, fsync = False):
+        raise NotImplementedError
+
+    def close(self, service):
+        raise NotImplementedError
+
+
+class CSVBackend(StorageBackend):
+    '''
+        CSV storage, one file per service and day: ./StreamData/{service}_{date}.csv
+    '''
+
+    def __init__(self, folder = './StreamData'):
+        StorageBackend.__init__(self, folder)
+        self._files = {}
+        self._writers = {}
+
+    def __repr__(self):
+        return '<TD CSVBackend {} - Open = {}>'.format(self.folder, list(self._files))
+
+    def is_open(self, service):
+        return service in self._files
+
+    def open(self, service, day, headers):
+
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+
+        path = os.path.join(self.folder, f'{service}_{day}.csv')
+        if not os.path.isfile(path):
+            #initial content
+            with open(path, 'w') as f:
+                f.write(headers) # TRAILING NEWLINE
+
+        self._files[service] = open(path, 'a', newline='')
+        self._writers[service] = csv.writer(self._files[service])
+
+    def write(self, service, store, start, stop):
+        # One writerows call per batch, rows are produced straight from the store without copying it
+        self._writers[service].writerows(islice(store.since(start), stop - start))
+
+    def flush(self, service, fsync = False):
+        f = self._files[service]
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
+
+    def close(self, service):
+        f = self._files.pop(service)
+        self._writers.pop(service, None)
+        f.close()
+
+
+class ParquetBackend(StorageBackend):
+    '''
+        Columnar binary storage with pyarrow, one file per service and session part:
+            ./StreamData/{service}_{date}_{part}.parquet     format = 'parquet'
+            ./StreamData/{service}_{date}_{part}.arrows      format = 'ipc' (Arrow IPC stream)
+
+        Rows are buffered and written as one row group when row_group_size rows are pending,
+        when max_delay seconds passed since the last row group, and on close. A new part is started
+        every time the file is reopened (reconnection) because Parquet files cannot be appended.
+
+        TickStore services keep their typed columns: epoch ms as timestamp[ms, UTC], prices float64,
+        sizes int64 and symbols dictionary encoded straight from the store codes.
+        Other services are stored as Service, Timestamp, Ticker, Sequence and Content (JSON).
+
+        Load a day back with ParquetBackend.load(service, day).
+    '''
+
+    def __init__(self, folder = './StreamData', format = 'parquet', row_group_size = 65536, max_delay = 60.0, compression = 'zstd'):
+        '''
+            NAME: format
+            DESC: 'parquet' or 'ipc'.
+            TYPE: String
+
+            NAME: row_group_size
+            DESC: Rows per row group (record batch for ipc).
+            TYPE: Int
+
+            NAME: max_delay
+            DESC: Seconds after which pending rows are written even if the row group is not full.
+            TYPE: Float
+
+            NAME: compression
+            DESC: Parquet codec ('zstd', 'snappy', 'gzip', None) or IPC codec ('zstd', 'lz4', None).
+            TYPE: String
+        '''
+
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+
+        if format not in ('parquet', 'ipc'):
+            raise ValueError(f'Unknown format {format}, valid ones are parquet and ipc')
+
+        StorageBackend.__init__(self, folder)
+        self.format = format
+        self.row_group_size = row_group_size
+        self.max_delay = max_delay
+        self.compression = compression
+
+        self._paths = {}
+        self._writers = {}
+        self._pending = {}      # service -> [record batches]
+        self._pending_rows = {}
+        self._last_write = {}
+
+    @property
+    def extension(self):
+        return 'parquet' if self.format == 'parquet' else 'arrows'
+
+    def is_open(self, service):
+        return service in self._paths
+
+    def open(self, service, day, headers):
+
+        if not os.path.isdir(self.folder):
+            os.makedirs(self.folder)
+
+        part = 0
+        while os.path.isfile(os.path.join(self.folder, f'{service}_{day}_{part}.{self.extension}')):
+            part += 1
+
+        # The file itself is created on the first row group, once the schema is known
+        self._paths[service] = os.path.join(self.folder, f'{service}_{day}_{part}.{self.extension}')
+        self._pending[service] = []
+        self._pending_rows[service] = 0
+        self._last_write[service] = time.monotonic()
+
+    def _tick_batches(self, store, start, stop):
+        pa = self.pa
+        for buffers in store.column_buffers(start, stop):
+            arrays = []
+            for (name, kind) in store.columns:
+                view = buffers[name]
+                length = len(view)
+                if kind == 'S':
+                    indices = pa.Array.from_buffers(pa.int32(), length, [None, pa.py_buffer(view)])
+                    arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array(store.categories[name], pa.string())))
+                elif kind == 'O':
+                    arrays.append(pa.array(view, pa.string()))
+                elif kind == 'q':
+                    arrow_type = pa.timestamp('ms', tz='UTC') if is_time_column(name) else pa.int64()
+                    arrays.append(pa.Array.from_buffers(arrow_type, length, [None, pa.py_buffer(view)]))
+                else:
+                    arrays.append(pa.Array.from_buffers(pa.float64(), length, [None, pa.py_buffer(view)]))
+            yield pa.RecordBatch.from_arrays(arrays, names=list(store.names))
+
+    def _record_batches(self, store, start, stop):
+        pa = self.pa
+        services, timestamps, tickers, sequences, contents = [], [], [], [], []
+        for row in islice(store.since(start), stop - start):
+            service, timestamp, ticker, sequence, content = record_fields(row)
+            services.append(service)
+            timestamps.append(timestamp)
+            tickers.append(ticker)
+            sequences.append(sequence)
+            contents.append(content)
+
+        yield pa.RecordBatch.from_arrays([pa.array(services, pa.string()).dictionary_encode(),
+                                          pa.array(timestamps, pa.timestamp('ms', tz='UTC')),
+                                          pa.array(tickers, pa.string()).dictionary_encode(),
+                                          pa.array(sequences, pa.int64()),
+                                          pa.array(contents, pa.string())],
+                                         names=['Service', 'Timestamp', 'Ticker', 'Sequence', 'Content'])
+
+    def write(self, service, store, start, stop):
+
+        if hasattr(store, 'column_buffers'):
+            batches = self._tick_batches(store, start, stop)
+        else:
+            batches = self._record_batches(store, start, stop)
+
+        for batch in batches:
+            self._pending[service].append(batch)
+            self._pending_rows[service] += batch.num_rows
+
+        if self._pending_rows[service] >= self.row_group_size:
+            self._write_row_group(service)
+
+    def _write_row_group(self, service):
+
+        if not self._pending_rows.get(service):
+            return
+
+        pa = self.pa
+        batches = self._pending[service]
+        # Dictionaries grow during the session, unify them so batches share one schema
+        table = pa.Table.from_batches(batches).unify_dictionaries().combine_chunks()
+
+        writer = self._writers.get(service)
+        if writer is None:
+            if self.format == 'parquet':
+                writer = self.pq.ParquetWriter(self._paths[service], table.schema, compression=self.compression)
+            else:
+                # Stream format, unlike the IPC file format it accepts dictionaries that grow between batches
+                options = pa.ipc.IpcWriteOptions(compression=self.compression)
+                writer = pa.ipc.new_stream(self._paths[service], table.schema, options=options)
+            self._writers[service] = writer
+
+        if self.format == 'parquet':
+            writer.write_table(table, row_group_size=max(table.num_rows, 1))
+        else:
+            writer.write_table(table, max_chunksize=max(table.num_rows, 1))
+
+        self._pending[service] = []
+        self._pending_rows[service] = 0
+        self._last_write[service] = time.monotonic()
+
+    def flush(self, service, fsync = False):
+        # Row groups are only cut when full or too old, small flushes would bloat the file
+        if time.monotonic() - self._last_write.get(service, 0) >= self.max_delay:
+            self._write_row_group(service)
+
+    def close(self, service):
+        self._write_row_group(service)
+        writer = self._writers.pop(service, None)
+        if writer is not None:
+            writer.close()
+        self._paths.pop(service, None)
+        self._pending.pop(service, None)
+        self._pending_rows.pop(service, None)
+        self._last_write.pop(service, None)
+
+    def load(self, service, day):
+        '''
+            Returns a pyarrow Table with every part stored for service on day ('YYYY-MM-DD').
+            Use .to_pandas() on the result for a DataFrame.
+        '''
+
+        prefix = f'{service}_{day}_'
+        paths = sorted(os.path.join(self.folder, name) for name in os.listdir(self.folder)
+                       if name.startswith(prefix) and name.endswith('.' + self.extension))
+
+        if self.format == 'parquet':
+            tables = [self.pq.read_table(path) for path in paths]
+        else:
+            tables = [self.pa.ipc.open_stream(self.pa.memory_map(path)).read_all() for path in paths]
+
+        if not tables:
+            return None
+        return self.pa.concat_tables(tables, promote_options='default').unify_dictionaries()
+
+
+class SQLiteBackend(StorageBackend):
+    '''
+        SQLite storage in a single local file (./StreamData/StreamData.db), one table per service.
+
+        The database runs in WAL mode so queries from other threads or processes do not block the
+        writer. Every batch is inserted with one prepared executemany inside a transaction that is
+        committed on flush (fsync = True also checkpoints the WAL into the main file).
+
+        TickStore services get typed columns (INTEGER epoch ms, REAL prices, INTEGER sizes, TEXT symbols),
+        other services Service, Timestamp, Ticker, Sequence and Content (JSON).
+        Every table is indexed on (Ticker, DateTime) or (Ticker, Timestamp).
+    '''
+
+    def __init__(self, folder = './StreamData', filename = 'StreamData.db', synchronous = 'NORMAL'):
+        '''
+            NAME: filename
+            DESC: Database file inside folder.
+            TYPE: String
+
+            NAME: synchronous
+            DESC: SQLite synchronous pragma: 'OFF', 'NORMAL' (safe with WAL) or 'FULL'.
+            TYPE: String
+        '''
+
+        StorageBackend.__init__(self, folder)
+        self.path = os.path.join(folder, filename)
+        self.synchronous = synchronous
+        self._connection = None
+        self._open = set()
+        self._tables = {}   # service -> insert statement
+
+    def _connect(self):
+        if self._connection is None:
+            if not os.path.isdir(self.folder):
+                os.makedirs(self.folder)
+            # Created from the writer thread, the only one using it
+            self._connection = sqlite3.connect(self.path, isolation_level='DEFERRED')
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(f'PRAGMA synchronous={self.synchronous}')
+        return self._connection
+
+    @staticmethod
+    def _column(name):
+        return '"' + name.replace('/', '_') + '"'
+
+    def is_open(self, service):
+        return service in self._open
+
+    def open(self, service, day, headers):
+        self._connect()
+        self._open.add(service)
+
+    def _create_table(self, service, store):
+        connection = self._connect()
+
+        if hasattr(store, 'columns'):
+            types = {'q': 'INTEGER', 'd': 'REAL', 'S': 'TEXT', 'O': 'TEXT'}
+            columns = [(self._column(name), types[kind]) for name, kind in store.columns]
+            time_column = self._column(store.names[0])
+        else:
+            columns = [('Service', 'TEXT'), ('Timestamp', 'INTEGER'), ('Ticker', 'TEXT'), ('Sequence', 'INTEGER'), ('Content', 'TEXT')]
+            time_column = 'Timestamp'
+
+        table = self._column(service)
+        connection.execute(f'CREATE TABLE IF NOT EXISTS {table} ({", ".join(name + " " + kind for name, kind in columns)})')
+        connection.execute(f'CREATE INDEX IF NOT EXISTS "{service}_symbol_time" ON {table} ("Ticker", {time_column})')
+        connection.commit()
+
+        self._tables[service] = f'INSERT INTO {table} VALUES ({", ".join("?" * len(columns))})'
+
+    def _tick_rows(self, store, start, stop):
+        for buffers in store.column_buffers(start, stop):
+            columns = []
+            for name, kind in store.columns:
+                if kind == 'S':
+                    categories = store.categories[name]
+                    columns.append([categories[code] for code in buffers[name]])
+                else:
+                    columns.append(buffers[name])
+            yield from zip(*columns)
+
+    def write(self, service, store, start, stop):
+        if service not in self._tables:
+            self._create_table(service, store)
+
+        rows = self._tick_rows(store, start, stop) if hasattr(store, 'column_buffers') else \
+            map(record_fields, islice(store.since(start), stop - start))
+        self._connection.executemany(self._tables[service], rows)
+
+    def flush(self, service, fsync = False):
+        if self._connection is not None and self._connection.in_transaction:
+            self._connection.commit()
+            if fsync:
+                self._connection.execute('PRAGMA wal_checkpoint(FULL)')
+
+    def close(self, service):
+        self.flush(service)
+        self._open.discard(service)
+        if not self._open and self._connection is not None:
+            self._connection.close()
+            self._connection = None
+            self._tables = {}
+
+    def query(self, sql, parameters = ()):
+        '''
+            Runs a read query on its own connection (safe from any thread while the writer is running).
+
+            EXAMPLES:
+            backend.query('SELECT * FROM TIMESALE_EQUITY WHERE Ticker = ? AND DateTime >= ?', ('SPY', 1600000000000))
+        '''
+        connection = sqlite3.connect(f'file:{self.path}?mode=ro', uri=True)
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+
+# database_type values accepted by TDStreamerClient
+BACKENDS = {'CSV': CSVBackend,
+            'PARQUET': ParquetBackend,
+            'SQLITE': SQLiteBackend,
+            'ARROW': lambda folder = './StreamData': ParquetBackend(folder, format = 'ipc')}
+
+
+def make_backend(database_type, folder = './StreamData'):
+    if database_type not in BACKENDS:
+        raise ValueError(f'Unknown database_type {database_type}, valid ones are {list(BACKENDS)}')
+    return BACKENDS[database_type](folder)
+
+
+class TDStorageWriter():
+    '''
+        Event driven writer for the streamed data.
+
+        The receive path calls notify(service) after appending rows. The writer thread sleeps on a
+        condition until then, and writes everything between the stored position
+        (subscriptions[service]['message_stored_count']) and the end of the store in one batch.
+
+        Flush policy:
+            flush_interval = 0      flush after every batch (lowest latency to disk)
+            flush_interval = x      flush at most every x seconds
+            fsync = True            also fsync on every flush (durable, slower)
+    '''
+
+    def __init__(self, subscriptions, backend = None, flush_interval = 0.0, fsync = False, day = None):
+        '''
+            NAME: subscriptions
+            DESC: TDStreamerClient.subscriptions dictionary.
+            TYPE: Dict
+
+            NAME: backend
+            DESC: Storage backend. Defaults to CSVBackend.
+            TYPE: Object
+
+            NAME: flush_interval
+            DESC: Seconds between flushes, 0 flushes after every batch.
+            TYPE: Float
+
+            NAME: fsync
+            DESC: fsync the files on flush.
+            TYPE: Boolean
+
+            NAME: day
+            DESC: Callable returning the current storage day as 'YYYY-MM-DD'.
+            TYPE: Callable
+        '''
+
+        self.subscriptions = subscriptions
+        self.backend = backend or CSVBackend()
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.day = day or (lambda: datetime.today().strftime('%Y-%m-%d'))
+
+        self._pending = set()
+        self._cond = Condition()
+        self._running = False
+        self._thread = None
+        self._last_flush = 0.0
+        self._dirty = set()
+
+        self.rows_written = 0
+        self.batches = 0
+        self.last_batch_latency = 0.0
+
+    def __repr__(self):
+        return '<TD StorageWriter - Running = {}, Rows = {}>'.format(self._running, self.rows_written)
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._today = self.day()
+        self._thread = Thread(name='storage_writer_thread',
+                              target=self._run,
+                              daemon = True)
+        self._thread.start()
+
+    def stop(self, timeout = 5):
+        # Writes what is pending, closes the files and ends the thread
+        with self._cond:
+            if not self._running:
+                return
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def notify(self, service):
+        # Called from the receive path, it only flags the service and wakes the writer
+        with self._cond:
+            self._pending.add(service)
+            self._cond.notify()
+
+    def lag(self):
+        # Rows appended but not yet written, per service
+        return {service: self.subscriptions[service]['data'].total - self.subscriptions[service]['message_stored_count']
+                for service in self.subscriptions
+                if self.subscriptions[service]['data'].total > self.subscriptions[service]['message_stored_count']}
+
+    def _run(self):
+
+        while True:
+            with self._cond:
+                if self._running and not self._pending:
+                    # Wake up once a second anyway for day rollover and unsubscribed services
+                    self._cond.wait(1)
+                pending = self._pending
+                self._pending = set()
+                running = self._running
+
+            self._housekeeping()
+            self._write(pending if running else set(self.subscriptions))
+
+            if not running:
+                break
+
+        for service in list(self.subscriptions):
+            if self.backend.is_open(service):
+                self.backend.flush(service, self.fsync)
+                self.backend.close(service)
+
+    def _housekeeping(self):
+
+        # check if new day started, prepares new set of files
+        today = self.day()
+        if today != self._today:
+            print("New day: Creating new set of files")
+            self._today = today
+            for service in self.subscriptions:
+                if self.backend.is_open(service):
+                    self.backend.close(service)
+
+        for service in self.subscriptions:
+            subscription = self.subscriptions[service]
+            #check if all subscriptions has an opened file, if not open it.
+            if subscription['subscribed'] and not self.backend.is_open(service):
+                self.backend.open(service, self._today, subscription['CSV_headers'])
+            #check if all opened files has an active susbscription, if not close it once it is written.
+            elif not subscription['subscribed'] and self.backend.is_open(service) and \
+                    subscription['message_stored_count'] >= subscription['data'].total:
+                self.backend.flush(service, self.fsync)
+                self.backend.close(service)
+
+    def _write(self, services):
+
+        started = time.perf_counter()
+        written = 0
+
+        for service in services:
+            subscription = self.subscriptions.get(service)
+            if subscription is None:
+                continue
+
+            start = subscription['message_stored_count']
+            stop = subscription['data'].total
+            if stop <= start:
+                continue
+
+            if not self.backend.is_open(service):
+                self.backend.open(service, self._today, subscription['CSV_headers'])
+
+            self.backend.write(service, subscription['data'], start, stop)
+            subscription['message_stored_count'] = stop
+            self._dirty.add(service)
+            written += stop - start
+
+        now = time.monotonic()
+        if self._dirty and now - self._last_flush >= self.flush_interval:
+            for service in self._dirty:
+                if self.backend.is_open(service):
+                    self.backend.flush(service, self.fsync)
+            self._dirty = set()
+            self._last_flush = now
+
+        if written:
+            self.rows_written += written
+            self.batches += 1
+            self.last_batch_latency = time.perf_counter() - started
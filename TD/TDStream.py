@@ -27,16 +27,33 @@ THE SOFTWARE.
 @author: LC
 """
 import os
-import csv
 import time
 import json
 import urllib
 import socket
 import websocket
 import xmltodict
-from pytz import timezone
-from threading import Thread
-from datetime import datetime, timedelta
+from threading import Thread, Event, current_thread
+from datetime import datetime
+
+from TDDispatcher import TDDispatcher
+from TDRouter import TDRouter
+from TDTickStore import TickStore, RecordBuffer, SCHEMAS
+from TDParsers import schema, make_parser
+from TDOrderBook import TDBookEngine
+from TDQuoteBoard import TDQuoteBoard
+from TDSharedQuotes import SharedQuotesWriter, SHARED_NAME, SHARED_FIELDS
+from TDBridge import TDBridgePublisher, BRIDGE_ADDRESS
+from TDCursor import TDCursor, CursorHub
+from TDBars import TDBarEngine
+from TDIndicators import TDIndicatorEngine
+from TDReconnect import TDReconnector
+from TDBackfill import TDBackfill
+from TDRetention import TDRetention
+from TDStorage import TDStorageWriter, make_backend
+from TDJournal import TDJournal
+from TDMetrics import TDMetrics
+from TDTime import ExchangeClock
 
 
 class TDStreamerClient():
@@ -84,9 +101,54 @@ class TDStreamerClient():
 
     '''
 
-    def __init__(self, TDAPI, cache_data = True):
+    def __init__(self, TDAPI, cache_data = True, observer_queue_size = 1000, observer_policy = 'drop_oldest',
+                 flush_interval = 0.0, fsync = False, database_type = 'CSV', journal = False, metrics_port = None,
+                 login_timeout = 30, credentials_ttl = 1800, stall_timeout = 30):
         '''
             Open API object in order to get credentials, url necessary for streaming login
+
+            NAME: observer_queue_size
+            DESC: Default bounded queue length for each observer registered with bind_to.
+            TYPE: Int
+
+            NAME: observer_policy
+            DESC: Default overflow policy for observers: 'block', 'drop_oldest' or 'conflate'.
+            TYPE: String
+
+            NAME: flush_interval
+            DESC: Seconds between storage flushes, 0 flushes after every written batch.
+            TYPE: Float
+
+            NAME: fsync
+            DESC: fsync storage files on every flush.
+            TYPE: Boolean
+
+            NAME: database_type
+            DESC: Storage backend for ./StreamData: 'CSV', 'SQLITE', 'PARQUET' or 'ARROW' (pyarrow needed for the last two).
+                  Any object implementing TDStorage.StorageBackend can be set later with set_storage_backend.
+            TYPE: String
+
+            NAME: journal
+            DESC: Record every raw frame in ./StreamData/Journal (see start_journal and TDJournal.TDReplay).
+            TYPE: Boolean
+
+            NAME: metrics_port
+            DESC: Serve the metrics registry (self.metrics) over HTTP on this port, /metrics in Prometheus format.
+            TYPE: Int
+
+            NAME: login_timeout
+            DESC: Seconds connect() waits for the LOGIN response.
+            TYPE: Float
+
+            NAME: credentials_ttl
+            DESC: Seconds the streamer credentials are reused after their token timestamp, when User Principals
+                  does not give the token expiration time.
+            TYPE: Float
+
+            NAME: stall_timeout
+            DESC: Seconds without any frame (heartbeats included) before the connection is considered stalled,
+                  dropped and reconnected. None disables it. See TDReconnect.TDReconnector.
+            TYPE: Float
         '''
 
         # Defines the logged in state. Must be logged in to make requests.
@@ -98,6 +160,18 @@ class TDStreamerClient():
         # default sleep behavior
         self.sleep = 2
 
+        # Set by the LOGIN response (or a connection error), connect() waits on it
+        self.login_timeout = login_timeout
+        self._login_done = Event()
+        self._logins = 0                # logins so far, the download rate loop of an older login stops
+
+        # Streamer credentials are reused until their token expires (epoch ms), see _grab_streaming_keys
+        self.credentials_ttl = credentials_ttl
+        self.credentials_expire = 0
+
+        # Stall detection and reconnection with backoff, see TDReconnect
+        self.reconnector = TDReconnector(self, stall_timeout = stall_timeout)
+
         self.subscriptions={}
         self.subscriptions['ACCT_ACTIVITY'] = {'CSV_headers':'Service,Timestamp,Ticker,Sequence,Content\n'}
         self.subscriptions['ACTIVES_NASDAQ'] = {'CSV_headers':'Service,Timestamp,Ticker,Content\n'}
@@ -110,7 +184,7 @@ class TDStreamerClient():
         self.subscriptions['LEVELONE_FUTURES'] = {'CSV_headers':'Service,Timestamp,Ticker,Content\n'}
         self.subscriptions['LEVELONE_FOREX'] = {'CSV_headers':'Service,Timestamp,Ticker,Content\n'}
         self.subscriptions['LISTED_BOOK'] = {'CSV_headers':'Service,Timestamp,Ticker,Content\n'}
-        self.subscriptions['NASDAQ_BOOK'] = {'CSV_headers':'DateTime,Ticker,Bid/Ask,Price,Size,Num_Orders,Router,Order_Size,ID,Message_Timestamp\n'}
+        self.subscriptions['NASDAQ_BOOK'] = {'CSV_headers':'DateTime,Ticker,Bid/Ask,Price,Size,Num_Orders,Message_Timestamp\n'}
         self.subscriptions['OPTIONS_BOOK'] = {'CSV_headers':'Service,Timestamp,Ticker,Content\n'}
         self.subscriptions['NEWS_HEADLINE'] = {'CSV_headers':'Service,Timestamp,Ticker,Sequence,Content\n'}
         self.subscriptions['OPTION'] = {'CSV_headers':'Service,Timestamp,Ticker,Content\n'}
@@ -121,28 +195,74 @@ class TDStreamerClient():
 
         for service in self.subscriptions:
             self.subscriptions[service]['subscribed'] = False
-            self.subscriptions[service]['CSVflag'] = False
             self.subscriptions[service]['message_stored_count'] = 0
-            self.subscriptions[service]['data'] = []
+            self.subscriptions[service]['data'] = RecordBuffer()
             self.subscriptions[service]['keys-seq'] = {}
 
 
-        #Set time difference between local time and Eastern Standard Time
-        self.hours = ((datetime.now().replace(tzinfo=None) - datetime.now(timezone('EST')).replace(tzinfo=None))).seconds/3600
+        # Exchange time (America/New_York, daylight saving aware) for exports and storage days
+        self.clock = ExchangeClock()
+
+        # Every service but ACCT_ACTIVITY is kept in a columnar store instead of one tuple per tick.
+        # Time is stored as epoch ms and only converted to exchange time when rows are read back.
+        for service in self.subscriptions:
+            columns = schema(service)
+            if columns is None:
+                continue
+            converters = None
+            if columns[0][0] == 'DateTime':
+                converters = {'DateTime': self.clock.to_datetime if service == 'CHART_EQUITY' else self.clock.to_str}
+            store = TickStore(service, columns = columns, chunk_size = 16384 if len(columns) <= 16 else 4096,
+                              converters = converters, sparse = service not in SCHEMAS)
+            self.subscriptions[service]['data'] = store
+            if service not in SCHEMAS:
+                self.subscriptions[service]['CSV_headers'] = ','.join(store.names) + '\n'
+
+        # Price level state of the book services, the book stores only keep the levels that changed
+        self.books = TDBookEngine()
+
+        # Latest full record of every level one symbol, the level one stores only keep what changed
+        self.quotes = TDQuoteBoard()
+        self.shared_quotes = None       # shared memory copy of the board for other processes, see share_quotes
+        self.bridge = None              # decoded data for local subscriber processes, see start_bridge
+
+        # One decoder per service, rebuilt with the requested fields on every subscription
+        self.parsers = {}
+        for service in self.subscriptions:
+            self._build_parser(service)
 
         #Set saving method
         self.cache_data = cache_data
-        self.database_type = 'CSV'
-        self.segregation = True
+        self.database_type = database_type
 
-        #Store observers callback functions
+        #Store observers callback functions, each one is served by its own dispatcher worker
         self._observers = []
+        self.dispatcher = TDDispatcher(maxsize = observer_queue_size, policy = observer_policy)
+        self.router = TDRouter(self.dispatcher)
+
+        # OHLCV bars built from the TIMESALE trades, none until intervals are added: self.bars.add('m1, t100')
+        self.bars = TDBarEngine(self.dispatcher)
+
+        # Incremental indicators on streaming services or bars: self.indicators.add('ema20', 'EMA', 'm1', period = 20)
+        self.indicators = TDIndicatorEngine(self.bars, clock = self.clock)
+
+        # CHART_EQUITY minutes missed during a disconnection are requested from the price history on reconnect
+        self.backfill = TDBackfill(self)
 
         # Define a dictionary that defines response types
         self.response_types = {}
-        self.response_types['notify'] = []
-        self.response_types['response'] = []
-        self.response_types['snapshot'] = []
+        self.response_types['notify'] = RecordBuffer()
+        self.response_types['response'] = RecordBuffer()
+        self.response_types['snapshot'] = RecordBuffer()
+
+        # Retention limits for the in memory data. Evicted chunks are spilled to ./StreamData/Spill when
+        # the data is cached, and dropped otherwise (retention.spill). Heartbeats are capped by default,
+        # everything else is kept until set_retention is called.
+        self.retention = TDRetention(spill = cache_data)
+        self.set_retention('notify', max_count = 1000)
+
+        # Cursors waiting for new rows are woken after every message, see cursor()
+        self.cursors = CursorHub()
 
 
         # Create StreamData folder for CSV storadge if it does not exist
@@ -154,8 +274,38 @@ class TDStreamerClient():
         self.TDAPI = TDAPI
 
         self.dataLen = 0  #in order to measure download rate
-
-        self.today = datetime.today()-timedelta(hours=self.hours)
+        self.messages_received = 0
+        self.last_message_time = None   # server timestamp (ms) of the last data frame
+
+        # Raw frame journal, and the flag TDReplay sets while it feeds a journal back
+        self.journal = None
+        self.replaying = False
+        if journal:
+            self.start_journal()
+
+        self.today = self.clock.now()
+
+        # Writer thread fed from the receive path, it stores new rows as soon as they are segregated
+        self.storage_writer = TDStorageWriter(self.subscriptions,
+                                              backend = make_backend(database_type) if cache_data else None,
+                                              flush_interval = flush_interval,
+                                              fsync = fsync,
+                                              day = self._storage_day)
+
+        # Throughput and latency metrics, pull them with self.metrics.snapshot() or over HTTP
+        self.metrics = TDMetrics()
+        self.metrics.gauge('observer_queued', lambda: {name: stats['queued'] for name, stats in self.dispatcher.stats().items()},
+                           label = 'observer', help = 'Messages waiting in the observer queue')
+        self.metrics.gauge('observer_dropped', lambda: {name: stats['dropped'] + stats['conflated'] for name, stats in self.dispatcher.stats().items()},
+                           label = 'observer', help = 'Messages dropped or conflated by the observer queue')
+        self.metrics.gauge('observer_lag_seconds', lambda: {name: stats['lag'] for name, stats in self.dispatcher.stats().items()},
+                           label = 'observer')
+        if cache_data:
+            self.metrics.gauge('writer_lag_rows', self.storage_writer.lag, label = 'service', help = 'Rows not yet stored')
+            self.metrics.gauge('writer_batch_seconds', lambda: self.storage_writer.last_batch_latency)
+        self.metrics.gauge('retention_evicted_rows', lambda: dict(self.retention.evicted), label = 'service')
+        if metrics_port is not None:
+            self.metrics.serve(metrics_port)
 
         print("TDStream Initialized at:".ljust(50)+str(datetime.now()))
 
@@ -166,79 +316,157 @@ class TDStreamerClient():
         # define the string representation
         return '<TD Streaming API - Connected = {}>'.format(self.IsLoggedIn)
 
-    def bind_to(self, callback):
-        print(f'{callback} bounded')
-        self._observers.append(callback)
+    @property
+    def segregation(self):
+        # Kept for code written against the old segregation chain: every service has a parser and a
+        # typed table now, data is always segregated and can no longer be stored as received
+        return True
 
-    def _grab_streaming_keys(self):
-        if self.TDAPI:
-            # Make request to User Principals endpoint to get streaming info, the connection URL and credential for LogIn.
-            userPrincipalsResponse = self.TDAPI.get_user_principals(fields = ['streamerSubscriptionKeys', 'streamerConnectionInfo'])
-            # Create timestamp, we need to get the timestamp in order to make our next request, but it needs to be parsed
-            epoch = datetime.utcfromtimestamp(0)
-            tokenTimeStamp = datetime.strptime(userPrincipalsResponse['streamerInfo']['tokenTimestamp'], "%Y-%m-%dT%H:%M:%S+0000")
-            tokenTimeStampAsMs = (tokenTimeStamp - epoch).total_seconds() * 1000
-            # we need to define our credentials that we will need to make our stream
-            self.credentials = {"userid": userPrincipalsResponse['accounts'][0]['accountId'],
-                                "token": userPrincipalsResponse['streamerInfo']['token'],
-                                "company": userPrincipalsResponse['accounts'][0]['company'],
-                                "segment": userPrincipalsResponse['accounts'][0]['segment'],
-                                "cddomain": userPrincipalsResponse['accounts'][0]['accountCdDomainId'],
-                                "usergroup": userPrincipalsResponse['streamerInfo']['userGroup'],
-                                "accesslevel":userPrincipalsResponse['streamerInfo']['accessLevel'],
-                                "authorized": "Y",
-                                "timestamp": int(tokenTimeStampAsMs),
-                                "appid": userPrincipalsResponse['streamerInfo']['appId'],
-                                "acl": userPrincipalsResponse['streamerInfo']['acl'] }
-            # Grab the streamer key for ACCT_ACTIVITY method (Account activity subscription)
-            self.streamerSubscriptionKey = userPrincipalsResponse['streamerSubscriptionKeys']['keys'][0]['key']
-            # grab the URI
-            self.uri = "wss://" + userPrincipalsResponse['streamerInfo']['streamerSocketUrl'] + "/ws"
-
-
-    def _is_connected(self):
-        # check internet connectivity
-        try:
-            # connect to the host -- tells us if the host is actually
-            # reachable
-            socket.create_connection(("www.google.com", 80))
-            return True
-        except OSError:
-            pass
-        return False
+    @segregation.setter
+    def segregation(self, value):
+        if not value:
+            print('segregation can no longer be turned off, every service is stored by its parser')
 
+    def bind_to(self, callback, queue_size = None, policy = None, services = None, symbols = None, fields = None, name = None):
+        '''
+            Register an observer. It will be called from its own worker thread.
 
-    def _keep_alive(self):
-        #Method that recover connection after it drop
+            Without filters it is called with the callBack message (None) after every data frame.
+            With services, symbols or fields it is only called for the frames holding matching
+            contents, with the list of their decoded records (see TDRouter.decode):
+                [{'service': 'QUOTE', 'timestamp': ..., 'key': 'AAPL', 'Bid Price': 115.3, ...}, ...]
 
-        print('Recovering connection')
-        internet = self._is_connected()
+            NAME: queue_size
+            DESC: Pending messages kept for this observer. Defaults to observer_queue_size.
+            TYPE: Int
 
-        #Wait to have internet back in case this was the reson of the interruption
-        while not internet:
-            internet = self._is_connected()
-            time.sleep(self.sleep)
+            NAME: policy
+            DESC: What to do when the queue is full: 'block', 'drop_oldest' or 'conflate'. Defaults to observer_policy.
+                  Observers with filters can also use 'symbols': the latest merged record of each symbol is
+                  delivered when the observer is ready, append only services (TIMESALE...) stay lossless.
+            TYPE: String
 
-        #Restart the streamer
-        self.connect()
+            NAME: services
+            DESC: Services separated by commas, or iterable.
+            TYPE: String
 
-        #subscribe everything as it was before interruption
-        if self.IsLoggedIn:
-            for service in self.subscriptions:
+            NAME: symbols
+            DESC: Symbols separated by commas, or iterable.
+            TYPE: String
 
-                if self.subscriptions[service]['subscribed']:
+            NAME: fields
+            DESC: Field ids or names (ie. 'Bid Price, Ask Price'). Records only carry these fields and
+                  contents without any of them are skipped.
+            TYPE: String
 
-                    ID = self.subscriptions[service]['ID']
+            NAME: name
+            DESC: Name of the observer in observer_stats and of its thread. Defaults to the qualified name
+                  of the callback, with its id when it is already taken (same method of two objects).
+            TYPE: String
 
-                    fields = self.subscriptions[service]['fields']
-                    keys = ", ".join(list(self.subscriptions[service]['keys-seq'].keys()))
+            EXAMPLES:
+            SessionObject.bind_to(on_quote, services = 'QUOTE', symbols = 'AAPL, SPY', fields = 'Bid Price, Ask Price')
+        '''
+        print(f'{callback} bounded')
+        if callback not in self._observers:
+            self._observers.append(callback)
+        routed = services is not None or symbols is not None or fields is not None
+        if policy == 'symbols' and not routed:
+            raise ValueError("The 'symbols' policy needs services, symbols or fields, it conflates records")
+        self.dispatcher.register(callback, maxsize = queue_size, policy = policy, broadcast = not routed, name = name)
+        if routed:
+            self.router.add(callback, services = services, symbols = symbols, fields = fields)
+        else:
+            self.router.remove(callback)
+
+    def unbind(self, callback):
+        if callback in self._observers:
+            self._observers.remove(callback)
+        self.router.remove(callback)
+        self.dispatcher.unregister(callback)
 
-                    subs_request = [service, ID, 'SUBS', keys, fields]
+    def observer_stats(self):
+        # Per observer queue depth, lag and drop counters
+        return self.dispatcher.stats()
 
-                    self.subs_request(subs_request)
+    def _credentials_valid(self):
+        # Cached credentials with a token that is still valid for a minute
+        return getattr(self, 'credentials', None) is not None and time.time() * 1000 + 60000 < self.credentials_expire
 
+    def _grab_streaming_keys(self):
+        if self.TDAPI and not self._credentials_valid():
+            # Make request to User Principals endpoint to get streaming info, the connection URL and credential for LogIn.
+            userPrincipalsResponse = self.TDAPI.get_user_principals(fields = ['streamerSubscriptionKeys', 'streamerConnectionInfo'])
+            self._streaming_info(userPrincipalsResponse)
+
+    def _streaming_info(self, userPrincipalsResponse):
+        # Create timestamp, we need to get the timestamp in order to make our next request, but it needs to be parsed
+        epoch = datetime.utcfromtimestamp(0)
+        tokenTimeStamp = datetime.strptime(userPrincipalsResponse['streamerInfo']['tokenTimestamp'], "%Y-%m-%dT%H:%M:%S+0000")
+        tokenTimeStampAsMs = (tokenTimeStamp - epoch).total_seconds() * 1000
+        if 'tokenExpirationTime' in userPrincipalsResponse['streamerInfo']:
+            tokenExpiration = datetime.strptime(userPrincipalsResponse['streamerInfo']['tokenExpirationTime'], "%Y-%m-%dT%H:%M:%S+0000")
+            self.credentials_expire = int((tokenExpiration - epoch).total_seconds() * 1000)
+        else:
+            self.credentials_expire = int(tokenTimeStampAsMs + self.credentials_ttl * 1000)
+        # we need to define our credentials that we will need to make our stream
+        self.credentials = {"userid": userPrincipalsResponse['accounts'][0]['accountId'],
+                            "token": userPrincipalsResponse['streamerInfo']['token'],
+                            "company": userPrincipalsResponse['accounts'][0]['company'],
+                            "segment": userPrincipalsResponse['accounts'][0]['segment'],
+                            "cddomain": userPrincipalsResponse['accounts'][0]['accountCdDomainId'],
+                            "usergroup": userPrincipalsResponse['streamerInfo']['userGroup'],
+                            "accesslevel":userPrincipalsResponse['streamerInfo']['accessLevel'],
+                            "authorized": "Y",
+                            "timestamp": int(tokenTimeStampAsMs),
+                            "appid": userPrincipalsResponse['streamerInfo']['appId'],
+                            "acl": userPrincipalsResponse['streamerInfo']['acl'] }
+        # Grab the streamer key for ACCT_ACTIVITY method (Account activity subscription)
+        self.streamerSubscriptionKey = userPrincipalsResponse['streamerSubscriptionKeys']['keys'][0]['key']
+        # grab the URI
+        self.uri = "wss://" + userPrincipalsResponse['streamerInfo']['streamerSocketUrl'] + "/ws"
+
+    def _keep_alive(self):
+        # Recover the connection after it dropped, and subscribe everything as it was before the interruption
+        self.reconnector.schedule()
+
+    def _drop_connection(self):
+        # Shuts a stalled socket down without a closing handshake, the receive loop sees the end of
+        # the stream and the close callback starts the reconnection. WebSocket.shutdown() only
+        # closes the file descriptor, which websocket-client 1.x does not notice while it waits on it.
+        sock = getattr(getattr(self.td_websocket, 'sock', None), 'sock', None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def resubscribe(self, services = None):
+        '''
+            Sends the subscriptions of services (every subscribed service when None) again, in one message.
+        '''
+        requests = []
+        for service, subscription in self.subscriptions.items():
+            if not subscription['subscribed'] or (services is not None and service not in services):
+                continue
+            keys = subscription['keys-seq']
+            for key in keys:
+                keys[key] = -1
+            if service == 'ACCT_ACTIVITY':
+                # The subscription key comes with the credentials, it may have been renewed
+                keys = {self.streamerSubscriptionKey: -1}
+                subscription['keys-seq'] = keys
+            requests.append(self._subs_entry(service, subscription['ID'], 'SUBS', ", ".join(keys), subscription['fields']))
+
+        if requests:
+            return self.data_request({"requests": requests})
 
     def connect(self):
+        '''
+            Opens the websocket and logs in, returns once the LOGIN response arrived: True when logged in,
+            False on a refused login, a connection error or after login_timeout seconds.
+            Streamer credentials of a previous connect are reused while their token is valid.
+        '''
 
         self.UserLogoff = False
 
@@ -253,32 +481,38 @@ class TDStreamerClient():
             # Turn off seeing the send message.
             websocket.enableTrace(False)
 
-            # Initalize a new websocket object.
+            # Initalize a new websocket object. websocket-client 1.x calls every handler with the
+            # WebSocketApp first (and on_close with the close code and reason), 0.x only does it for
+            # plain functions: these take ws in both.
             self.td_websocket = websocket.WebSocketApp(self.uri,
-                                  on_message = self._websocket_on_message,
-                                  on_error = self._websocket_on_error,
-                                  on_close = self._websocket_on_close)
+                                  on_message = lambda ws, message: self._websocket_on_message(message),
+                                  on_error = lambda ws, error: self._websocket_on_error(error),
+                                  on_close = lambda ws, *args: self._websocket_on_close())
 
             # Define what to do on the open, in this case send our login request.
-            self.td_websocket.on_open = self._websocket_on_open
+            self.td_websocket.on_open = lambda ws: self._websocket_on_open()
 
             # Create a new thread
             self.td_websocket_thread = Thread(name='td_websocket_thread',
                                               target=self.td_websocket.run_forever,
                                               daemon = True)
 
-            # Start the thread.
+            # Start the thread, the LOGIN response (or an error) sets the event
+            self._login_done.clear()
             self.td_websocket_thread.start()
 
-            while not self.IsLoggedIn and not self.error:
-                print('Waiting on "Logged in" message')
-                time.sleep(1)
+            if not self._login_done.wait(self.login_timeout):
+                print('No "Logged in" message after:'.ljust(50) + str(self.login_timeout) + ' s')
+                self.error = True
+                self.td_websocket.close()
 
             if self.IsLoggedIn:
                 print("Streamer started")
         else:
             print("Streamer already started")
 
+        return self.IsLoggedIn
+
 
     def _websocket_on_open(self):
 
@@ -288,6 +522,7 @@ class TDStreamerClient():
     def _websocket_on_error(self, error):
 
         self.error = True
+        self._login_done.set()
         error_str = str(error)
 
         print('-'*40)
@@ -296,13 +531,21 @@ class TDStreamerClient():
 
     def _websocket_on_close(self):
 
+        if current_thread() is not self.td_websocket_thread:
+            # Late close of a socket replaced by a reconnection
+            return
+
         # No longer Logged In
         self.IsLoggedIn = False
+        self._login_done.set()
 
         print('-'*40)
         print('Websocket is Closed.')
         print('Time Closed:'.ljust(50)+str(datetime.now()))
 
+        # Write what is pending and close the files, the writer starts again on next login
+        self.storage_writer.stop()
+
         if not self.UserLogoff: #if user logged off
             self._keep_alive()
 
@@ -310,10 +553,20 @@ class TDStreamerClient():
 
         # Handle the messages it receives
 
-        self.dataLen += len(message)
+        received = time.time()
+        self.reconnector.frame(received)
+        size = len(message)
+        self.dataLen += size
+        self.messages_received += 1
+
+        if self.journal is not None:
+            self.journal.write(message)
 
         # Load the message
+        started = time.perf_counter()
         message = json.loads(message, strict = False)
+        decoded = time.perf_counter()
+        self.metrics.frame(size, decoded - started)
 
         # Grab the Keys
         msg_keys = message.keys()
@@ -327,31 +580,204 @@ class TDStreamerClient():
             self._handle_response_snapshot(content = message)
         elif 'data' in msg_keys:
             self._handle_response_data(content = message)
+            self.metrics.data(message, received, time.perf_counter() - decoded)
+            self.reconnector.data(message, received)
+
+        if self.retention.policies:
+            self._enforce_retention()
+
+        if self.backfill.pending:
+            self.backfill.drain()
+
+        if self.cursors.waiting:
+            self.cursors.notify()
+
+    def start_journal(self, folder = './StreamData/Journal'):
+        '''
+            Starts recording every raw frame received, with its local receive time, into a compressed journal.
+            Replay it with TDJournal.TDReplay.
+        '''
+        if self.journal is None:
+            self.journal = TDJournal(folder)
+        self.journal.start()
+        print("Journal started at:".ljust(50) + str(self.journal.path))
+
+    def stop_journal(self):
+        if self.journal is not None:
+            self.journal.stop()
+            self.journal = None
+
+    def share_quotes(self, name = SHARED_NAME, capacity = 4096, fields = SHARED_FIELDS):
+        '''
+            Publishes the quote board of the level one services into a shared memory segment, so other
+            local processes can read the latest quotes without their own login: TDSharedQuotes(name).
+
+            NAME: name
+            DESC: Shared memory segment name. FileExistsError when another running streamer writes it.
+            TYPE: String
+
+            NAME: capacity
+            DESC: Symbols the segment can hold.
+            TYPE: Int
+
+            NAME: fields
+            DESC: Quote board fields published for every symbol.
+            TYPE: Tuple
+        '''
+        self.stop_sharing_quotes()
+        self.shared_quotes = SharedQuotesWriter(self.quotes, name = name, capacity = capacity, fields = fields)
+        return self.shared_quotes
+
+    def stop_sharing_quotes(self):
+        # Removes the segment, readers attached to it keep their last values
+        if self.shared_quotes is not None:
+            shared, self.shared_quotes = self.shared_quotes, None
+            shared.close()
+
+    def start_bridge(self, address = BRIDGE_ADDRESS, queue_size = 10000, pending_size = 10000):
+        '''
+            Re-broadcasts the data as decoded records to local processes, which subscribe per
+            service/symbol topic with TDBridge.TDBridgeClient instead of logging in themselves.
 
-    def _downloadRate(self):
-        # Method that run in a separate thread and check if websocket connection is alive
-        while self.IsLoggedIn:
+            NAME: address
+            DESC: Unix domain socket path, or (host, port) for a local TCP socket.
+            TYPE: String or Tuple
+
+            NAME: queue_size
+            DESC: Frames kept per subscriber before the oldest ones are dropped.
+            TYPE: Int
+
+            NAME: pending_size
+            DESC: Messages waiting to be fanned out before the oldest ones are dropped.
+            TYPE: Int
+        '''
+        self.stop_bridge()
+        self.bridge = TDBridgePublisher(address, queue_size = queue_size, pending_size = pending_size)
+        self.bridge.start()
+        return self.bridge
+
+    def stop_bridge(self):
+        if self.bridge is not None:
+            bridge, self.bridge = self.bridge, None
+            bridge.stop()
+
+    def set_retention(self, name, max_count = None, max_age = None, max_bytes = None):
+        '''
+            Limits the data kept in memory for a service or a response type, rows over the limit are
+            spilled to disk and can still be read with read_data (dropped when cache_data is False,
+            unless retention.spill is set). Call without limits to remove the policy.
+
+            NAME: name
+            DESC: Service name (ie. 'TIMESALE_EQUITY') or response type ('notify', 'response', 'snapshot').
+            TYPE: String
+
+            NAME: max_count
+            DESC: Maximum rows in memory.
+            TYPE: Int
+
+            NAME: max_age
+            DESC: Maximum age in seconds of the rows in memory.
+            TYPE: Float
+
+            NAME: max_bytes
+            DESC: Maximum memory in bytes.
+            TYPE: Int
+
+            EXAMPLES:
+            SessionObject.set_retention('NASDAQ_BOOK', max_count = 500000)
+            SessionObject.set_retention('notify', max_age = 3600)
+        '''
+        if name not in self.subscriptions and name not in self.response_types:
+            raise KeyError(f'Unknown service or response type {name}')
+
+        self.retention.set_policy(name, max_count = max_count, max_age = max_age, max_bytes = max_bytes)
+
+    def _data_store(self, name):
+        if name in self.subscriptions:
+            return self.subscriptions[name]['data']
+        return self.response_types[name]
+
+    def _enforce_retention(self):
+        for name in list(self.retention.policies):
+            stored = None
+            if name in self.subscriptions and self.cache_data:
+                # Never evict rows the storage writer has not stored yet
+                stored = self.subscriptions[name]['message_stored_count']
+            self.retention.enforce(name, self._data_store(name), stored = stored)
+
+    def read_data(self, name, start = 0, stop = None):
+        '''
+            Iterates the rows of a service or response type from absolute position start to stop,
+            across the spilled chunks on disk and the rows in memory.
+
+            EXAMPLES:
+            rows = list(SessionObject.read_data('TIMESALE_EQUITY'))
+        '''
+        return self.retention.read(name, self._data_store(name), start = start, stop = stop)
+
+    def cursor(self, name, symbols = None, start = None, timeout = None):
+        '''
+            Returns a TDCursor over the rows of a service or response type. It iterates (or async
+            iterates) the rows stored after its own position and waits for the next ones, reading
+            them in place from the store.
+
+            NAME: name
+            DESC: Service name (ie. 'TIMESALE_EQUITY') or response type ('notify', 'response', 'snapshot').
+            TYPE: String
+
+            NAME: symbols
+            DESC: Symbols separated by commas, or iterable. Every symbol when None. Services only,
+                  ValueError for the response types.
+            TYPE: String
+
+            NAME: start
+            DESC: Absolute position to start from (0 = every row, spilled ones included). Only new rows when None.
+            TYPE: Int
+
+            NAME: timeout
+            DESC: Seconds the iteration waits for a new row before it stops. Forever when None.
+            TYPE: Float
+
+            EXAMPLES:
+            for row in SessionObject.cursor('TIMESALE_EQUITY', symbols = 'AAPL'):
+                print(row)
+        '''
+        return TDCursor(self, name, symbols = symbols, start = start, timeout = timeout)
+
+    def _downloadRate(self, login):
+        # Method that run in a separate thread and check if websocket connection is alive.
+        # Each login starts its own loop, the loop of a previous login stops on the next one.
+        while self.IsLoggedIn and login == self._logins:
             self.downloadRate = self.dataLen
             self.dataLen = 0
+            self.metrics.tick()
+            if self.bars.intervals and self.last_message_time is not None:
+                self.bars.expire(self.last_message_time)
+            self.reconnector.check()
             #print(str(self.downloadRate) + ' bytes/sec')
             time.sleep(1)
 
     def _handle_response_response(self, content = None):
+        if self.replaying:
+            # A replayed LOGIN or QOS must not change the state of this client
+            self.response_types['response'].append(content)
+            return
+
         #the first response is the login answer, if it ok set the LoggedIn to True
         if (content['response'][0]['command'] == 'LOGIN') and (content['response'][0]['content']['code'] == 0):
             self.IsLoggedIn = True
             ##self.UserLogoff = False
             print("Logged in at:".ljust(50) + str(datetime.fromtimestamp(int(content['response'][0]['timestamp'])/1000))[:-3])
-            self.downloadRate_thread = Thread(name='downloadRate_thread',
-                                              target=self._downloadRate,
-                                              daemon = True)
-            self.downloadRate_thread.start()
-
-            if self.cache_data:
-                self.cache_store_thread = Thread(name='cache_store_thread',
-                                    target=self._cache_store,
-                                    daemon = True)
-                self.cache_store_thread.start()
+            self._on_login()
+            self._login_done.set()
+
+        elif content['response'][0]['command'] == 'LOGIN':
+            # Refused, the credentials are requested again on next connect
+            self.credentials_expire = 0
+            self.error = True
+            response = str("LOGIN " + str(content['response'][0]['content']['msg']) + " at:")
+            print(response.ljust(50) + str(datetime.fromtimestamp(int(content['response'][0]['timestamp'])/1000))[:-3])
+            self._login_done.set()
 
         elif content['response'][0]['command'] == 'QOS':
             response = str(str(content['response'][0]['service'])+" "+str(content['response'][0]['content']['msg'])+" at:")
@@ -364,6 +790,18 @@ class TDStreamerClient():
 
         self.response_types['response'].append(content)
 
+    def _on_login(self):
+        self.reconnector.reset()
+        self._logins += 1
+        self.downloadRate_thread = Thread(name='downloadRate_thread',
+                                          target=self._downloadRate,
+                                          args=(self._logins,),
+                                          daemon = True)
+        self.downloadRate_thread.start()
+
+        if self.cache_data:
+            self.storage_writer.start()
+
     def _handle_response_notify(self, content = None):
        self.response_types['notify'].append(content)
 
@@ -382,113 +820,56 @@ class TDStreamerClient():
 
 
     def _data_segregation(self,message):
-        ''' The part below segregate data on specifics tables with time adjusted (3600), and whatever left get stored in a single Table '''
-
-        if self.segregation:
-            for i in range(0,len(message['data'])):
-                data = message['data'][i]
-
-                if data['service'] == 'ACCT_ACTIVITY':
-                    for j in range(0, len(data['content'])):
-                        content = data['content'][j]
-                        #service, timestamp, seq, key, MessageType, account#, Content
-                        if content['2'] != 'SUBSCRIBED' and content['2'] != 'ERROR':
-                            data_tuple = (data['service'], data['timestamp'], content['key'], content['seq'], content['2'],
-                                          content['1'], xmltodict.parse(content['3'], dict_constructor=dict)[str(content['2']+"Message")]) #dict to avoid OrderedDict
-                        else:
-                            data_tuple = (data['service'], data['timestamp'], content['key'], content['seq'], content['2'])
-                        #data_tuple = (data['service'], data['timestamp'], json.dumps(data['content'][j]))
-                        self.subscriptions[data['service']]['data'].append(data_tuple)
-                        self._seq_test(data['service'],content)
-
-                elif data['service'] == 'TIMESALE_EQUITY':
-                    for j in range(0, len(data['content'])):
-                        content = data['content'][j]
-                        #DateTime, Ticker, Sequence, Price, Size, LastSequence
-                        data_tuple = ((datetime.fromtimestamp(content['1']/1000)-timedelta(hours=self.hours)).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
-                                      content['key'], content['seq'], content['2'], content['3'], content['4'],data['timestamp'])
-
-                        self.subscriptions[data['service']]['data'].append(data_tuple)
-                        self._seq_test(data['service'],content)
-
-                elif data['service'] == 'CHART_EQUITY':
-                    for j in range(0, len(data['content'])):
-                        content = data['content'][j]
-                        #DateTime, Ticker, Sequence, open_price, high, low ,close_price, volume, LastSequence, ChartDay
-                        data_tuple = ((datetime.fromtimestamp(content['7']/1000))-timedelta(hours=self.hours),
-                                      content['key'], content['seq'], content['1'], content['2'], content['3'],
-                                      content['4'], content['5'], content['6'], content['8'],data['timestamp'])
-
-                        self.subscriptions[data['service']]['data'].append(data_tuple)
-                        self._seq_test(data['service'],content)
-
-                elif data['service'] == 'NASDAQ_BOOK':
-
-                    for j in range(0, len(data['content'])):    #run between tickets
-                        content = data['content'][j]
-
-                        for k in range(0, len(content['2'])):  # Run between Bids
-                            content2 = content['2'][k]
-                            for t in range(0, len(content2['3'])): #Run betwen orders
-
-                                content3 = content2['3'][t]
-                                #DateTime, Ticker, [Bid/Ask], Price, Size, Num_Orders, Router, Size, ID, Message_Timestamp
-                                data_tuple = (((datetime.fromtimestamp(content['1']/1000))-timedelta(hours=self.hours)).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
-                                              content['key'], 'Bid', content2['0'], content2['1'], content2['2'],content3['0'],
-                                              content3['1'], content3['2'], data['timestamp'])
-
-                                #self.data['level_2_nasdaq'].append(data_tuple)
-                                self.subscriptions[data['service']]['data'].append(data_tuple)
-
-                        for k in range(0, len(content['3'])):  # Run between asks
-                            content2 = content['3'][k]
-                            for t in range(0, len(content2['3'])): #Run betwen orders
-                                content3 = content2['3'][t]
-                                #DateTime, Ticker, [Bid/Ask], Price, Size, Num_Orders, Router, Size, ID, Message_Timestamp
-                                data_tuple = (((datetime.fromtimestamp(content['1']/1000))-timedelta(hours=self.hours)).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
-                                              content['key'], 'Ask', content2['0'], content2['1'], content2['2'],content3['0'],
-                                              content3['1'], content3['2'], data['timestamp'])
-
-                                #self.data['level_2_nasdaq'].append(data_tuple)
-                                self.subscriptions[data['service']]['data'].append(data_tuple)
-
-                else: #Actives, Levelone, Quote, Option
-                    self._noseg(data)
-
-        else: #If no segregation
-            for i in range(0,len(message['data'])):
-                data = message['data'][i]
-                self._noseg(data)
+        ''' Segregates every data entry on its service table with the parser of the service, entries of services without a parser (not streamed by TD) are not stored '''
+
+        for data in message['data']:
+            if data['service'] in self.backfill.services and self.backfill.enabled and not self.replaying:
+                # Holds the bars of the symbols being backfilled until their history is merged, the others pass
+                data = self.backfill.filter(data)
+                if data is None:
+                    continue
+            parser = self.parsers.get(data['service'])
+            if parser is not None:
+                parser(data)
+            if self.shared_quotes is not None:
+                self.shared_quotes.publish(data)
+            if self.bars.intervals and data['service'] in self.bars.services:
+                self.bars.update(data)
+            if self.indicators.sources and data['service'] in self.indicators.sources:
+                self.indicators.update(data)
+
+        self.last_message_time = message['data'][-1]['timestamp']
+
+        if self.router.routes:
+            self.router.route(message['data'])
+
+        if self.bridge is not None:
+            self.bridge.publish(message['data'])
+
+        if self.cache_data:
+            for data in message['data']:
+                self.storage_writer.notify(data['service'])
 
         self.callBack()
 
 
-    def _noseg(self, data):
-        for j in range(0, len(data['content'])):
-            content = data['content'][j]
-            msg_keys = content.keys()
-            if 'seq' in msg_keys:
-                data_tuple = (data['service'], data['timestamp'], content['key'], content['seq'], content)
-                self._seq_test(data['service'],content)
-
-            else:
-                #service, timestamp, symbol, content
-                data_tuple = (data['service'], data['timestamp'], content['key'], content)
-
-            self.subscriptions[data['service']]['data'].append(data_tuple)
+    def _build_parser(self, service, fields = None):
+        self.parsers[service] = make_parser(service, self.subscriptions[service]['data'], fields = fields,
+                                             seq_test = self._seq_test, books = self.books,
+                                             quotes = self.quotes)
 
     def callBack(self,message=None):
-        #Triggers external function/method stored in observers list in a independed thread to be detached from wahtever loop it may have.
-        for callback in self._observers:
-            callback_thread = Thread(name='callback_thread',
-                                               target=callback(message),
-                                               daemon = True)
-            callback_thread.start()
+        #Triggers external function/method stored in observers list. Only enqueues, each observer runs in its own worker thread.
+        #A message (ie. 'MISS SEQUENCE') is a control message, delivered to every observer whatever its policy.
+        self.dispatcher.publish(message, control = message is not None)
 
     def _seq_test(self,service,content):
 
-        if self.subscriptions[service]['keys-seq'][content['key']] + 1 != content['seq']:
-            if self.subscriptions[service]['keys-seq'][content['key']] != -1:
+        last_seq = self.subscriptions[service]['keys-seq'].get(content['key'], -1)
+        if last_seq + 1 != content['seq']:
+            if last_seq != -1:
+                self.metrics.incr('sequence_gaps', service)
+            if last_seq != -1 and not self.replaying:
                 if service == 'ACCT_ACTIVITY':
                     # check for sequence inconsistency in Account acctivy that mnay lead in a
                     # bad interpretation if so callback to reread all account stats
@@ -521,6 +902,7 @@ class TDStreamerClient():
             self.subscriptions[service]['subscribed'] = True
             self.subscriptions[service]['ID'] = ID
             self.subscriptions[service]['fields'] = fields
+            self._build_parser(service, fields)
 
             if  command == 'SUBS':
                 self.subscriptions[service]['keys-seq'] = {}
@@ -528,73 +910,22 @@ class TDStreamerClient():
                 self.subscriptions[service]['keys-seq'][key] = -1
 
 
-    def _csv_open(self, service):
-
-        #Prepare the CSV files an open them to store the data
-        self.today = datetime.today()-timedelta(hours=self.hours)
-        today = self.today.strftime('%Y-%m-%d')
-
-
-        if not os.path.isfile(f'./StreamData/{service}_{today}.csv'):
-            #initial content
-
-            with open(f'./StreamData/{service}_{today}.csv','w') as f:
-                f.write(self.subscriptions[service]['CSV_headers']) # TRAILING NEWLINE
-
-        self.subscriptions[service]['CSV'] = open(f'./StreamData/{service}_{today}.csv','a',newline='')
-        self.subscriptions[service]['Writer'] = csv.writer(self.subscriptions[service]['CSV'])
-        self.subscriptions[service]['CSVflag'] = True
-
-
-    def _csv_close(self,service):
-        #close CSV files when connection drops or logoff
-        self.subscriptions[service]['CSVflag'] = False
-        self.subscriptions[service]['CSV'].close()
-
-    def _cache_store(self):
-
-        while self.IsLoggedIn:
-
-            #check if all subscriptions has an opened CSV, if not open it.
-            for service in self.subscriptions:
-                if self.subscriptions[service]['subscribed'] and not self.subscriptions[service]['CSVflag']:
-                    self._csv_open(service)
-
-            # check if new day started, prepares new set of files
-            if ((datetime.now()-timedelta(hours=self.hours)).day - self.today.day) > 0:
-                print("New day: Creating new set of CSVs")
-
-                for service in self.susbscriptions:
-                    if self.subscriptions[service]['CSVflag']:
-                        self._csv_close(service)
-                        self._csv_open(service)
-
-            #For new data between datacount and subs data lenght, segregate and store
-            for service in self.subscriptions:
-                data_length = len(self.subscriptions[service]['data'])
-
-                if self.subscriptions[service]['message_stored_count'] < data_length:
-                    new = data_length - self.subscriptions[service]['message_stored_count']
-                    newData = self.subscriptions[service]['data'][-new:]
-
-                    for data in newData:
-                        self.subscriptions[service]['Writer'].writerow(data)
-
-                    self.subscriptions[service]['message_stored_count'] = data_length
-
-            #check if all opened CSV has an active susbscription, if not close it.
-            for service in self.subscriptions:
-                if self.subscriptions[service]['CSVflag'] and not self.subscriptions[service]['subscribed']:
-                    self._csv_close(service)
+    def set_storage_backend(self, backend):
+        '''
+            Replaces the storage backend (see TDStorage.StorageBackend). Must be called while logged off.
 
-            #if no new data, sleep
-            else:
-                time.sleep(1)
+            EXAMPLES:
+            SessionObject.set_storage_backend(ParquetBackend(row_group_size = 100000))
+        '''
+        if self.storage_writer.running:
+            raise RuntimeError('Storage backend can only be changed while the storage writer is stopped')
+        self.storage_writer.backend = backend
+        self.database_type = type(backend).__name__
 
-        #Close all CSV
-        for service in self.subscriptions:
-            if self.subscriptions[service]['CSVflag']:
-                self._csv_close(service)
+    def _storage_day(self):
+        # Storage files roll over on exchange time
+        self.today = self.clock.now()
+        return self.today.strftime('%Y-%m-%d')
 
 
     '''****************************************
@@ -678,22 +1009,24 @@ class TDStreamerClient():
         self._subs_manage(subscription)
 
         subs_request= {
-                        "requests": [
-                                    {
-                                    "service": subscription[0],
-                                    "requestid": subscription[1],
-                                    "command": subscription[2],
-                                    "account": self.credentials['userid'],
-                                    "source": self.credentials['appid'],
-                                    "parameters": {
-                                                    "keys": subscription[3],
-                                                    "fields": subscription[4]
-                                                  }
-                                    }
-                                    ]
+                        "requests": [self._subs_entry(*subscription)]
                       }
 
-        self.data_request(subs_request)
+        return self.data_request(subs_request)
+
+    def _subs_entry(self, service, ID, command, keys, fields):
+        # One request of a subscription message, several can be sent in the same message
+        return {
+                "service": service,
+                "requestid": ID,
+                "command": command,
+                "account": self.credentials['userid'],
+                "source": self.credentials['appid'],
+                "parameters": {
+                                "keys": keys,
+                                "fields": fields
+                              }
+                }
 
     def data_request(self, data_request):
         # Method for request handler. This method is the one that make the actual requests to WebSocket
@@ -743,7 +1076,7 @@ class TDStreamerClient():
                                     ]
                       }
 
-        self.data_request(data_request)
+        return self.data_request(data_request)
 
     def data_request_news_story(self, keys):
 
@@ -783,7 +1116,7 @@ class TDStreamerClient():
                                     ]
                       }
 
-        self.data_request(data_request)
+        return self.data_request(data_request)
 
     def data_request_chart_history_futures(self, symbol = '/ES', frequency = 'm5', period = 'd5', start_time = None, end_time = None):
 
@@ -863,7 +1196,7 @@ class TDStreamerClient():
                                     ]
                       }
 
-        self.data_request(data_request)
+        return self.data_request(data_request)
 
 
     '''********************************************
@@ -898,7 +1231,7 @@ class TDStreamerClient():
 
         subs_request = ["ACCT_ACTIVITY", "3", command, self.streamerSubscriptionKey, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_actives_nasdaq(self, command = "SUBS", keys = 'NASDAQ-60', fields = '0,1'):
 
@@ -936,7 +1269,7 @@ class TDStreamerClient():
 
         subs_request = ["ACTIVES_NASDAQ", "4", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
 
     def data_request_actives_nyse(self, command = "SUBS", keys = 'NYSE-60', fields = '0,1'):
@@ -976,7 +1309,7 @@ class TDStreamerClient():
 
         subs_request = ["ACTIVES_NYSE", "5", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
 
     def data_request_actives_otcbb(self, command = "SUBS", keys = 'OTCBB-60', fields = '0,1'):
@@ -1016,7 +1349,7 @@ class TDStreamerClient():
 
         subs_request = ["ACTIVES_OTCBB", "6", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
 
     def data_request_actives_options(self, command = "SUBS", keys = 'OPTS-DESC-60', fields = '0,1'):
@@ -1061,7 +1394,7 @@ class TDStreamerClient():
 
         subs_request = ["ACTIVES_OPTIONS", "7", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
 
     def data_request_chart_equity(self, command = "SUBS", keys = 'SPY, AAPL', fields = '0,1,2,3,4,5,6,7,8'):
@@ -1101,7 +1434,7 @@ class TDStreamerClient():
 
         subs_request = ["CHART_EQUITY", "8", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
 
     def data_request_chart_futures(self, command = "SUBS", keys = '/ES', fields = '0,1,2,3,4,5,6'):
@@ -1138,7 +1471,7 @@ class TDStreamerClient():
 
         subs_request = ["CHART_FUTURES", "9", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_chart_options(self, keys, command = "SUBS", fields = '0,1,2,3,4,5,6'):
 
@@ -1175,7 +1508,7 @@ class TDStreamerClient():
 
         subs_request = ["CHART_OPTIONS", "10", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_quote(self, command = "SUBS", keys = 'SPY, AAPL', fields = '0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,22,23,24,25,26,27,28,29,30,31,32,33,34,37,38,39,40,41,42,43,44,45,46,47,48,49,50,51,52'):
 
@@ -1261,7 +1594,7 @@ class TDStreamerClient():
 
         subs_request = ["QUOTE", "11", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_option(self, keys, command = "SUBS", fields = '0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,343,35,36,37,38,39,40,41'):
 
@@ -1331,7 +1664,7 @@ class TDStreamerClient():
 
         subs_request = ["OPTION", "12", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
 
     def data_request_listed_book(self, command = "SUBS", keys = 'SPY, AAPL', fields = '0,1,2,3'):
@@ -1363,7 +1696,7 @@ class TDStreamerClient():
 
         subs_request = ["LISTED_BOOK", "13", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_nasdaq_book(self, command = "SUBS", keys = 'SPY, AAPL', fields = '0,1,2,3'):
 
@@ -1395,7 +1728,7 @@ class TDStreamerClient():
 
         subs_request = ["NASDAQ_BOOK", "14", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_options_book(self, keys, command = "SUBS", fields = '0,1,2,3'):
 
@@ -1428,7 +1761,7 @@ class TDStreamerClient():
 
         subs_request = ["OPTIONS_BOOK", "15", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_levelone_futures(self, command = "SUBS", keys = '/ES', fields = '0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28,29,30,31,32,33,34,35'):
 
@@ -1490,7 +1823,7 @@ class TDStreamerClient():
 
         subs_request = ["LEVELONE_FUTURES", "16", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_levelone_forex(self, command = "SUBS", keys = 'EUR/USD', fields = '0,1,2,3,4,5,6,7,8,9,10,11,12,13,14,15,16,17,18,19,20,21,22,23,24,25,26,27,28'):
 
@@ -1549,7 +1882,7 @@ class TDStreamerClient():
 
         subs_request = ["LEVELONE_FOREX", "17", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
 
     def data_request_timesale_equity(self, command = "SUBS", keys = 'SPY, AAPL', fields = '0,1,2,3,4'):
@@ -1584,7 +1917,7 @@ class TDStreamerClient():
 
         subs_request = ["TIMESALE_EQUITY", "18", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_timesale_futures(self, command = "SUBS", keys = '/ES', fields = '0,1,2,3,4'):
 
@@ -1618,7 +1951,7 @@ class TDStreamerClient():
 
         subs_request = ["TIMESALE_FUTURES", "19", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_timesale_options(self, keys, command = "SUBS", fields = '0,1,2,3,4'):
 
@@ -1651,7 +1984,7 @@ class TDStreamerClient():
 
         subs_request = ["TIMESALE_OPTIONS", "20", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
     def data_request_news_headline(self, command = "SUBS", keys = 'SPY, AAPL', fields = '0,1,2,3,4,5,6,7,8,9,10'):
 
@@ -1690,7 +2023,7 @@ class TDStreamerClient():
 
         subs_request = ["NEWS_HEADLINE", "21", command, keys, fields]
 
-        self.subs_request(subs_request)
+        return self.subs_request(subs_request)
 
 
 
@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 10:02:17 2026
+
+@author: LC
+"""
+
+import sys
+import time
+from array import array
+from threading import Lock
+
+
+# Column kinds
+#   q   int64   (epoch ms, sequences, sizes, volumes)
+#   d   float64 (prices)
+#   S   dictionary encoded string, stored as int32 codes
+#   O   object (free text close to unique per row), a list evicted with its chunk
+KINDS = ('q', 'd', 'S', 'O')
+
+# Default schemas for the services that used to be stored as one tuple per tick.
+# Column order is the CSV order so rows stay compatible with the CSV headers.
+SCHEMAS = {
+    'TIMESALE_EQUITY': (('DateTime', 'q'), ('Ticker', 'S'), ('Sequence', 'q'), ('Price', 'd'),
+                        ('Size', 'q'), ('LastSequence', 'q'), ('Message_Timestamp', 'q')),
+
+    'CHART_EQUITY': (('DateTime', 'q'), ('Ticker', 'S'), ('Sequence', 'q'), ('Open', 'd'),
+                     ('High', 'd'), ('Low', 'd'), ('Close', 'd'), ('Volume', 'q'),
+                     ('LastSequence', 'q'), ('ChartDay', 'q'), ('Message_Timestamp', 'q')),
+
+    # Book level events: one row per level that changed since the previous snapshot, Size 0 = level removed
+    'NASDAQ_BOOK': (('DateTime', 'q'), ('Ticker', 'S'), ('Bid/Ask', 'S'), ('Price', 'd'),
+                    ('Size', 'q'), ('Num_Orders', 'q'), ('Message_Timestamp', 'q')),
+    }
+
+
+def _text_nbytes(col, used):
+    # Object column: the list and the strings it holds
+    return sys.getsizeof(col) + sum(sys.getsizeof(value) for value in col[:used])
+
+
+class _ChunkedStore():
+    '''
+        Chunk bookkeeping shared by TickStore and RecordBuffer.
+
+        Rows live in fixed size chunks. Only whole, sealed chunks can be evicted from the head
+        (see TDRetention), so positions are tracked in two ways:
+            index       position among the rows still in memory (list like indexing)
+            position    absolute position since the store was created, offset + index
+    '''
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.offset = 0         # rows evicted from the head
+        self._chunks = []
+        self._sealed_at = []    # time each full chunk was sealed, aligned with self._chunks
+        self._sealed_bytes = [] # bytes of each full chunk, measured once when it is sealed
+        self._fill = 0          # rows used in the last chunk
+        self._count = 0         # rows in memory
+        self._lock = Lock()     # guards chunk list changes against readers taking snapshots
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def total(self):
+        # Rows ever appended, including evicted ones
+        return self.offset + self._count
+
+    def _add_chunk(self, chunk):
+        with self._lock:
+            if self._chunks:
+                self._sealed_at.append(time.time())
+                self._sealed_bytes.append(self._row_nbytes(self._chunks[-1], self.chunk_size))
+            self._chunks.append(chunk)
+            self._fill = 0
+
+    def _chunk_rows(self):
+        # (chunk, used rows) pairs
+        last = len(self._chunks) - 1
+        return [(chunk, self._fill if n == last else self.chunk_size) for n, chunk in enumerate(self._chunks)]
+
+    def _rows(self, chunk, used, start = 0):
+        raise NotImplementedError
+
+    def _row_nbytes(self, chunk, used):
+        raise NotImplementedError
+
+    @property
+    def nbytes(self):
+        # Sealed chunks as measured when they were sealed, plus the rows of the last one
+        with self._lock:
+            sealed = sum(self._sealed_bytes)
+            last = self._chunks[-1] if self._chunks else None
+            fill = self._fill
+        return sealed + (self._row_nbytes(last, fill) if last is not None else 0)
+
+    def __iter__(self):
+        return self.since(self.offset)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step == 1:
+                rows = self.since(self.offset + start)
+                return [row for row, _ in zip(rows, range(stop - start))]
+            return [self[i] for i in range(start, stop, step)]
+
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f'{type(self).__name__} index out of range')
+
+        return next(self._rows(self._chunks[index // self.chunk_size], index % self.chunk_size + 1, index % self.chunk_size))
+
+    def since(self, position):
+        '''
+            Yields the in memory rows from absolute position onwards, without copying the store.
+        '''
+
+        with self._lock:
+            start = max(position - self.offset, 0)
+            chunks = self._chunk_rows()
+
+        i = start % self.chunk_size
+        for chunk, used in chunks[start // self.chunk_size:]:
+            yield from self._rows(chunk, used, i)
+            i = 0
+
+    def segments(self, start, stop):
+        '''
+            Yields (chunk, first, last) covering the in memory rows between absolute positions start and stop.
+        '''
+
+        with self._lock:
+            begin = max(start - self.offset, 0)
+            end = min(stop - self.offset, self._count)
+            chunks = self._chunk_rows()
+
+        while begin < end:
+            chunk, used = chunks[begin // self.chunk_size]
+            first = begin % self.chunk_size
+            last = min(used, first + end - begin)
+            yield chunk, first, last
+            begin += last - first
+
+    def sealed_chunks(self):
+        '''
+            Returns (first position, rows, sealed time, bytes) for every full chunk that can be evicted.
+        '''
+
+        with self._lock:
+            sealed = list(zip(self._sealed_at, self._sealed_bytes))
+            offset = self.offset
+
+        return [(offset + n * self.chunk_size, self.chunk_size, sealed_at, nbytes)
+                for n, (sealed_at, nbytes) in enumerate(sealed)]
+
+    def evict(self, n_chunks = 1):
+        '''
+            Removes the n oldest sealed chunks. Returns [(first position, payload)], payload can be
+            turned back into rows with decode().
+        '''
+
+        evicted = []
+        with self._lock:
+            n_chunks = min(n_chunks, len(self._sealed_at))
+            for _ in range(n_chunks):
+                chunk = self._chunks.pop(0)
+                self._sealed_at.pop(0)
+                self._sealed_bytes.pop(0)
+                evicted.append((self.offset, self._payload(chunk)))
+                self.offset += self.chunk_size
+                self._count -= self.chunk_size
+
+        return evicted
+
+    def _payload(self, chunk):
+        return chunk
+
+    def decode(self, payload):
+        return list(self._rows(payload, self.chunk_size))
+
+
+class RecordBuffer(_ChunkedStore):
+    '''
+        Chunked list of records (tuples or dicts) for the services without a columnar schema
+        and for the notify/response/snapshot messages.
+    '''
+
+    def __init__(self, chunk_size = 1024):
+        _ChunkedStore.__init__(self, chunk_size)
+
+    def __repr__(self):
+        return '<TD RecordBuffer - Rows = {}, Evicted = {}>'.format(self._count, self.offset)
+
+    def append(self, record):
+        if not self._chunks or self._fill == self.chunk_size:
+            self._add_chunk([])
+
+        self._chunks[-1].append(record)
+        self._fill += 1
+        self._count += 1
+
+    def _rows(self, chunk, used, start = 0):
+        return iter(chunk[start:used])
+
+    def _row_nbytes(self, chunk, used):
+        # Shallow estimate: the record plus its direct members
+        size = sys.getsizeof(chunk)
+        for record in chunk[:used]:
+            size += sys.getsizeof(record)
+            if isinstance(record, (tuple, list)):
+                size += sum(sys.getsizeof(value) for value in record)
+        return size
+
+
+class TickStore(_ChunkedStore):
+    '''
+        Columnar, append only store for the ticks of one streaming service.
+
+        Rows are written into fixed size chunks of typed arrays (one array per column). Chunks are
+        preallocated and never resized, so NumPy views taken with to_numpy/chunks share the memory
+        with the store (zero copy) and stay valid while new ticks keep arriving.
+
+        The store still behaves like the old list of tuples: len(), iteration and indexing/slicing
+        return row tuples, with the converters applied (e.g. epoch ms to a formatted date).
+    '''
+
+    def __init__(self, service, columns = None, chunk_size = 16384, converters = None, sparse = False):
+        '''
+            NAME: service
+            DESC: Service name, used to pick the default schema.
+            TYPE: String
+
+            NAME: columns
+            DESC: Sequence of (name, kind) with kind in 'q' int64, 'd' float64, 'S' dictionary encoded string, 'O' object.
+            TYPE: Tuple
+
+            NAME: chunk_size
+            DESC: Rows per chunk.
+            TYPE: Int
+
+            NAME: converters
+            DESC: {column name: callable} applied to the values when rows are materialized.
+            TYPE: Dict
+
+            NAME: sparse
+            DESC: Rows may leave columns out (see append_sparse). Missing values read as NaN, 0 or ''.
+            TYPE: Boolean
+        '''
+
+        _ChunkedStore.__init__(self, chunk_size)
+
+        self.service = service
+        self.columns = tuple(columns or SCHEMAS[service])
+        self.names = tuple(name for name, kind in self.columns)
+        self.kinds = tuple(kind for name, kind in self.columns)
+        for kind in self.kinds:
+            if kind not in KINDS:
+                raise ValueError(f'Unknown column kind {kind}, valid ones are {KINDS}')
+
+        self.converters = converters or {}
+
+        # Dictionary encoding: one code table per string column. Codes never change,
+        # so evicted chunks can still be decoded with the current tables. The tables are never
+        # pruned: high cardinality text goes in 'O' columns, which are evicted with their chunk.
+        self.categories = {name: [] for name, kind in self.columns if kind == 'S'}
+        self._codes = {name: {} for name in self.categories}
+        self._encoders = [self._encoder(name) if kind == 'S' else None for name, kind in self.columns]
+
+        # Sparse stores preallocate chunks with the missing values: code 0 is '' and doubles start as NaN
+        self.sparse = sparse
+        if sparse:
+            for name in self.categories:
+                self._encode(name, '')
+
+    def __repr__(self):
+        return '<TD TickStore {} - Rows = {}, Evicted = {}, Bytes = {}>'.format(self.service, self._count, self.offset, self.nbytes)
+
+    def _new_chunk(self):
+        chunk = []
+        for kind in self.kinds:
+            if kind == 'd' and self.sparse:
+                chunk.append(array('d', [float('nan')]) * self.chunk_size)
+                continue
+            if kind == 'O':
+                chunk.append([''] * self.chunk_size)
+                continue
+            typecode = 'i' if kind == 'S' else kind
+            chunk.append(array(typecode, bytes(array(typecode).itemsize * self.chunk_size)))
+        self._add_chunk(chunk)
+        return chunk
+
+    def _encode(self, name, value):
+        codes = self._codes[name]
+        code = codes.get(value)
+        if code is None:
+            code = len(self.categories[name])
+            codes[value] = code
+            self.categories[name].append(value)
+        return code
+
+    def _encoder(self, name):
+        codes = self._codes[name]
+        encode = self._encode
+
+        def encoder(value):
+            code = codes.get(value)
+            return code if code is not None else encode(name, value)
+        return encoder
+
+    def append(self, values):
+        '''
+            Appends one row. values must follow the column order.
+        '''
+
+        if not self._chunks or self._fill == self.chunk_size:
+            chunk = self._new_chunk()
+        else:
+            chunk = self._chunks[-1]
+
+        i = self._fill
+        try:
+            # Arrays take the numbers as they come, only strings need encoding
+            for col, encode, value in zip(chunk, self._encoders, values):
+                col[i] = encode(value) if encode else value
+        except (TypeError, OverflowError):
+            # None, floats in integer columns, numbers sent as strings
+            for col, kind, name, value in zip(chunk, self.kinds, self.names, values):
+                if kind == 'S':
+                    col[i] = self._encode(name, value)
+                elif kind == 'q':
+                    col[i] = 0 if value is None else int(float(value)) if isinstance(value, str) else int(value)
+                elif kind == 'O':
+                    col[i] = value
+                else:
+                    col[i] = float(value) if value is not None else float('nan')
+
+        # Count last so readers never see a half written row
+        self._fill += 1
+        self._count += 1
+
+    def append_sparse(self, items):
+        '''
+            Appends one row from (column index, value) pairs, only for sparse stores.
+            Columns left out keep their missing value.
+        '''
+
+        if not self._chunks or self._fill == self.chunk_size:
+            chunk = self._new_chunk()
+        else:
+            chunk = self._chunks[-1]
+
+        i = self._fill
+        kinds = self.kinds
+        for index, value in items:
+            kind = kinds[index]
+            if kind == 'd':
+                chunk[index][i] = float(value) if value is not None else float('nan')
+            elif kind == 'q':
+                chunk[index][i] = int(value) if value is not None else 0
+            elif kind == 'O':
+                chunk[index][i] = value
+            else:
+                chunk[index][i] = self._encode(self.names[index], value)
+
+        self._fill += 1
+        self._count += 1
+
+    def _rows(self, chunk, used, start = 0):
+        decoders = []
+        for kind, name in zip(self.kinds, self.names):
+            categories = self.categories[name] if kind == 'S' else None
+            decoders.append((categories, self.converters.get(name)))
+
+        for i in range(start, used):
+            row = []
+            for col, (categories, converter) in zip(chunk, decoders):
+                value = col[i]
+                if categories is not None:
+                    value = categories[value]
+                if converter:
+                    value = converter(value)
+                row.append(value)
+            yield tuple(row)
+
+    def _row_nbytes(self, chunk, used):
+        return sum(col.itemsize * used if kind != 'O' else _text_nbytes(col, used) for kind, col in zip(self.kinds, chunk))
+
+    '''****************************************
+    ************* Export **********************
+    ****************************************'''
+
+    def column_buffers(self, start, stop):
+        '''
+            Yields one {column: memoryview} per chunk segment between absolute positions start and stop.
+            The views point into the store (no copy), string columns are their int32 codes and object
+            columns lists of their values.
+        '''
+
+        for chunk, first, last in self.segments(start, stop):
+            yield {name: memoryview(col)[first:last] if kind != 'O' else col[first:last]
+                   for name, kind, col in zip(self.names, self.kinds, chunk)}
+
+    def chunks(self):
+        '''
+            Yields one {column: numpy array} per chunk. Arrays are views on the store memory (zero copy),
+            except the object columns which are copied. String columns are returned as their int32 codes,
+            decode them with self.categories.
+        '''
+        import numpy as np
+
+        with self._lock:
+            chunks = self._chunk_rows()
+
+        for chunk, used in chunks:
+            yield {name: np.frombuffer(col, dtype=col.typecode)[:used] if kind != 'O' else np.array(col[:used], dtype=object)
+                   for name, kind, col in zip(self.names, self.kinds, chunk)}
+
+    def to_numpy(self):
+        '''
+            Returns {column: numpy array}. With a single chunk the arrays are zero copy views,
+            otherwise chunks are concatenated once.
+        '''
+        import numpy as np
+
+        parts = list(self.chunks())
+        if not parts:
+            return {name: np.empty(0, dtype={'S': 'i', 'O': object}.get(kind, kind)) for name, kind in self.columns}
+        if len(parts) == 1:
+            return parts[0]
+        return {name: np.concatenate([part[name] for part in parts]) for name in self.names}
+
+    def to_pandas(self, tz = None):
+        '''
+            Returns a pandas DataFrame. String columns become Categoricals built on the stored codes.
+
+            NAME: tz
+            DESC: Timezone for the time columns (DateTime, *Timestamp), ie. 'America/New_York'.
+                  None leaves them as int64 epoch ms.
+            TYPE: String
+        '''
+        import pandas as pd
+        from TDTime import is_time_column
+
+        arrays = self.to_numpy()
+        frame = {}
+        for name, kind in self.columns:
+            if kind == 'S':
+                frame[name] = pd.Categorical.from_codes(arrays[name], categories=list(self.categories[name]))
+            elif tz is not None and kind == 'q' and is_time_column(name):
+                frame[name] = pd.to_datetime(arrays[name], unit='ms', utc=True).tz_convert(tz)
+            else:
+                frame[name] = arrays[name]
+        return pd.DataFrame(frame, copy=False)
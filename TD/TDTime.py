@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 18:02:45 2026
+
+@author: LC
+"""
+
+from datetime import datetime, timedelta
+from pytz import timezone
+
+
+# US exchanges run on New York time, EST in winter and EDT in summer.
+# pytz 'EST' is a fixed UTC-5 zone and is one hour off during daylight saving time.
+EXCHANGE_TIMEZONE = 'America/New_York'
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def is_time_column(name):
+    # Store columns holding epoch ms
+    return name == 'DateTime' or name.endswith('Timestamp')
+
+
+class ExchangeClock():
+    '''
+        Epoch ms to exchange time conversions for exports and file names.
+
+        Ticks are stored as int64 epoch ms and only converted when they are read back. The UTC offset
+        is cached per hour (daylight saving changes on the hour), and formatted seconds are cached so
+        exporting thousands of ticks of the same second formats the date once.
+
+        EXAMPLES:
+        clock = ExchangeClock()
+        clock.to_str(1600084800123)         # '2020-09-14 08:00:00.123'
+        clock.to_datetime(1600084800123)    # naive exchange time
+        clock.today()                       # '2020-09-14', storage day
+    '''
+
+    def __init__(self, zone = EXCHANGE_TIMEZONE, cache_size = 65536):
+        '''
+            NAME: zone
+            DESC: Exchange timezone name.
+            TYPE: String
+
+            NAME: cache_size
+            DESC: Formatted seconds kept in the cache.
+            TYPE: Int
+        '''
+
+        self.zone = timezone(zone)
+        self.cache_size = cache_size
+        self._offsets = {}      # epoch hour -> UTC offset in ms
+        self._seconds = {}      # epoch second -> 'YYYY-MM-DD HH:MM:SS'
+
+    def __repr__(self):
+        return '<TD ExchangeClock {}>'.format(self.zone)
+
+    def offset(self, ms):
+        # UTC offset of the exchange at ms, in ms
+        hour = ms // 3600000
+        offset = self._offsets.get(hour)
+        if offset is None:
+            offset = int(datetime.fromtimestamp(hour * 3600, self.zone).utcoffset().total_seconds() * 1000)
+            self._offsets[hour] = offset
+        return offset
+
+    def to_datetime(self, ms):
+        # Naive exchange time
+        return EPOCH + timedelta(milliseconds = ms + self.offset(ms))
+
+    def to_aware(self, ms):
+        # Timezone aware exchange time
+        return datetime.fromtimestamp(ms / 1000, self.zone)
+
+    def to_str(self, ms):
+        # 'YYYY-MM-DD HH:MM:SS.mmm' exchange time
+        second, millis = divmod(ms, 1000)
+        text = self._seconds.get(second)
+        if text is None:
+            if len(self._seconds) >= self.cache_size:
+                self._seconds.clear()
+            text = self._seconds[second] = self.to_datetime(second * 1000).strftime('%Y-%m-%d %H:%M:%S')
+        return f'{text}.{millis:03d}'
+
+    def now(self):
+        # Timezone aware current exchange time
+        return datetime.now(self.zone)
+
+    def today(self):
+        return self.now().strftime('%Y-%m-%d')